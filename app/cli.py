@@ -0,0 +1,328 @@
+"""
+Bulk classification of query logs.
+
+Streams NDJSON or CSV from a file or stdin, classifies it in vectorized
+chunks (optionally across several worker processes, each with its own
+model) and writes the input records with ``intent``, ``confidence`` and
+``entities`` added, in input order. At most ``2 * workers`` chunks are in
+flight, so memory stays bounded however large the input is.
+
+When reading from a file, a checkpoint (``<output>.offset``) records the
+input byte offset and output size after every written chunk; rerunning the
+same command resumes from there.
+
+Usage:
+    nearbynlu-classify queries.ndjson -o classified.ndjson --workers 4
+    nearbynlu-classify queries.csv -o classified.csv --text-field query
+    zcat queries.ndjson.gz | nearbynlu-classify - --format ndjson > classified.ndjson
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Tuple
+
+PREDICTION_FIELDS = ["intent", "confidence", "entities", "model_version"]
+
+# Model of this process, created by _init_worker
+_model = None
+
+
+def _init_worker():
+    global _model
+    from .models.nlu_model import NLUModel
+    # Keep loading messages out of results written to stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        _model = NLUModel()
+
+
+def _classify(texts: List[Optional[str]], locations: List[Optional[str]]) -> List[Optional[Dict]]:
+    """Classify one chunk; records without text get None."""
+    indices = [i for i, text in enumerate(texts) if text]
+    predictions = _model.predict_batch([texts[i] for i in indices], [locations[i] for i in indices])
+    results = [None] * len(texts)
+    for i, prediction in zip(indices, predictions):
+        results[i] = prediction
+    return results
+
+
+def _ndjson_records(stream, offset: int) -> Iterator[Tuple[Dict, int]]:
+    """Yield (record, byte offset after it) for each non-blank line."""
+    for line in iter(stream.readline, b""):
+        offset += len(line)
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("not a JSON object")
+        except ValueError as e:
+            record = {"error": f"Invalid JSON: {e}"}
+        yield record, offset
+
+
+def _csv_records(stream, offset: int, header: List[str]) -> Iterator[Tuple[Dict, int]]:
+    """Yield (record, byte offset after it) for each CSV row, including multi-line rows."""
+    position = [offset]
+
+    def lines():
+        # csv.reader pulls exactly the lines of one row, so position is exact between rows
+        for line in iter(stream.readline, b""):
+            position[0] += len(line)
+            yield line.decode("utf-8")
+
+    for row in csv.reader(lines()):
+        if row:
+            yield dict(zip(header, row)), position[0]
+
+
+def read_chunks(records: Iterator[Tuple[Dict, int]], chunk_size: int, text_field: str, location_field: str):
+    """
+    Group records into chunks.
+
+    Yields:
+        Tuple[List[Dict], List[str], List[str], int]: Records, their texts and
+        locations, and the input byte offset after the chunk's last record
+    """
+    chunk, offset = [], None
+    for record, offset in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield _split(chunk, text_field, location_field) + (offset,)
+            chunk = []
+    if chunk:
+        yield _split(chunk, text_field, location_field) + (offset,)
+
+
+def _split(chunk: List[Dict], text_field: str, location_field: str):
+    texts = [record.get(text_field) if "error" not in record else None for record in chunk]
+    texts = [str(text) if text not in (None, "") else None for text in texts]
+    locations = [record.get(location_field) or None for record in chunk]
+    return chunk, texts, locations
+
+
+def load_checkpoint(path: str) -> Optional[Dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_checkpoint(path: str, state: Dict):
+    """Atomically record how far the run has got."""
+    with open(path + ".tmp", "w") as f:
+        json.dump(state, f)
+    os.replace(path + ".tmp", path)
+
+
+class ResultWriter:
+    """Writes classified records as NDJSON or CSV to a text stream."""
+
+    def __init__(self, stream, fmt: str, input_fields: List[str], write_header: bool = True):
+        self.stream = stream
+        self.fmt = fmt
+        if fmt == "csv":
+            fields = list(input_fields) + [f for f in PREDICTION_FIELDS + ["error"] if f not in input_fields]
+            self.writer = csv.DictWriter(stream, fieldnames=fields, extrasaction="ignore")
+            if write_header:
+                self.writer.writeheader()
+
+    def write(self, records: List[Dict], predictions: List[Optional[Dict]]):
+        for record, prediction in zip(records, predictions):
+            row = dict(record)
+            if prediction is not None:
+                row.update(prediction)
+            elif "error" not in row:
+                row["error"] = "No text to classify"
+            if self.fmt == "csv":
+                if isinstance(row.get("entities"), dict):
+                    row["entities"] = json.dumps(row["entities"])
+                self.writer.writerow(row)
+            else:
+                self.stream.write(json.dumps(row) + "\n")
+
+
+def classify_stream(
+    input_stream,
+    output_stream,
+    fmt: str = "ndjson",
+    output_format: Optional[str] = None,
+    chunk_size: int = 512,
+    workers: int = 1,
+    text_field: str = "query",
+    location_field: str = "location",
+    start_offset: int = 0,
+    csv_header: Optional[List[str]] = None,
+    write_header: bool = True,
+    on_chunk=None,
+    progress_interval: float = 5.0,
+) -> int:
+    """
+    Classify every record of a binary input stream and write the results.
+
+    Args:
+        input_stream: Binary stream positioned at start_offset (after the
+            header for CSV input)
+        output_stream: Text stream for the results
+        fmt (str): Input format, "ndjson" or "csv"
+        output_format (str): Output format; defaults to the input format
+        chunk_size (int): Records classified per vectorized batch
+        workers (int): Worker processes; 1 classifies in this process
+        text_field (str): Field (or CSV column) holding the query text
+        location_field (str): Optional field with the query's location
+        start_offset (int): Byte offset of input_stream's position
+        csv_header (List[str]): CSV column names
+        write_header (bool): Write a CSV header before the first row
+        on_chunk: Called with (input offset, rows done) after each chunk is written
+        progress_interval (float): Seconds between progress lines on stderr (0 disables)
+
+    Returns:
+        int: Number of records written
+    """
+    if fmt == "csv":
+        records = _csv_records(input_stream, start_offset, csv_header)
+    else:
+        records = _ndjson_records(input_stream, start_offset)
+    input_fields = csv_header or [text_field, location_field]
+    writer = ResultWriter(output_stream, output_format or fmt, input_fields, write_header)
+    chunks = read_chunks(records, chunk_size, text_field, location_field)
+
+    rows = 0
+    started = last_report = time.perf_counter()
+
+    def emit(records, predictions, offset):
+        nonlocal rows, last_report
+        writer.write(records, predictions)
+        rows += len(records)
+        if on_chunk is not None:
+            on_chunk(offset, rows)
+        now = time.perf_counter()
+        if progress_interval and now - last_report >= progress_interval:
+            last_report = now
+            print(f"{rows} rows, {rows / (now - started):.0f} rows/s", file=sys.stderr)
+
+    if workers <= 1:
+        _init_worker()
+        for chunk, texts, locations, offset in chunks:
+            emit(chunk, _classify(texts, locations), offset)
+    else:
+        # Spawned workers don't inherit this process's TensorFlow state
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(workers, initializer=_init_worker) as pool:
+            pending = deque()
+            for chunk, texts, locations, offset in chunks:
+                pending.append((chunk, pool.apply_async(_classify, (texts, locations)), offset))
+                # Bounded look-ahead; results are written strictly in input order
+                if len(pending) >= 2 * workers:
+                    chunk, result, offset = pending.popleft()
+                    emit(chunk, result.get(), offset)
+            while pending:
+                chunk, result, offset = pending.popleft()
+                emit(chunk, result.get(), offset)
+
+    elapsed = time.perf_counter() - started
+    if progress_interval:
+        print(f"Classified {rows} rows in {elapsed:.1f}s ({rows / elapsed if elapsed else 0:.0f} rows/s)",
+              file=sys.stderr)
+    return rows
+
+
+def _detect_format(path: str, fmt: Optional[str]) -> str:
+    if fmt:
+        return fmt
+    return "csv" if path.lower().endswith(".csv") else "ndjson"
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Classify NDJSON or CSV query logs in bulk")
+    parser.add_argument("input", help="Input file, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="Output file, or - for stdout")
+    parser.add_argument("--format", choices=["ndjson", "csv"], help="Input format (default: from the extension)")
+    parser.add_argument("--output-format", choices=["ndjson", "csv"], help="Output format (default: input format)")
+    parser.add_argument("--text-field", default="query")
+    parser.add_argument("--location-field", default="location")
+    parser.add_argument("--chunk-size", type=int, default=512, help="Records per vectorized batch")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes, each loading the model")
+    parser.add_argument("--offset", type=int, help="Start at this input byte offset instead of the checkpoint")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start over")
+    parser.add_argument("--progress-interval", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    fmt = _detect_format(args.input, args.format)
+    output_format = args.output_format or (
+        _detect_format(args.output, None) if args.output != "-" else fmt
+    )
+    from_stdin = args.input == "-"
+    to_stdout = args.output == "-"
+    checkpoint = None if from_stdin or to_stdout else args.output + ".offset"
+
+    input_stream = sys.stdin.buffer if from_stdin else open(args.input, "rb")
+    header = None
+    if fmt == "csv":
+        header = next(csv.reader([input_stream.readline().decode("utf-8")]), [])
+    data_start = input_stream.tell() if not from_stdin else 0
+
+    state = None if args.restart or checkpoint is None else load_checkpoint(checkpoint)
+    offset = data_start
+    if args.offset is not None:
+        if from_stdin:
+            parser.error("--offset needs a seekable input file")
+        offset = max(args.offset, data_start)
+    elif state is not None:
+        offset = state["input_offset"]
+        print(f"Resuming at input byte {offset} ({state['rows']} rows done)", file=sys.stderr)
+
+    if to_stdout:
+        output_stream = sys.stdout
+    elif state is not None or args.offset is not None and os.path.exists(args.output):
+        # Drop anything written after the last checkpoint
+        output_stream = open(args.output, "r+", newline="")
+        output_stream.truncate(state["output_offset"] if state is not None else os.path.getsize(args.output))
+        output_stream.seek(0, io.SEEK_END)
+    else:
+        output_stream = open(args.output, "w", newline="")
+    write_header = output_stream is sys.stdout or output_stream.tell() == 0
+    if not from_stdin:
+        input_stream.seek(offset)
+
+    rows_before = state["rows"] if state is not None else 0
+
+    def on_chunk(input_offset, rows):
+        output_stream.flush()
+        if checkpoint is not None:
+            os.fsync(output_stream.fileno())
+            save_checkpoint(checkpoint, {
+                "input_offset": input_offset,
+                "output_offset": output_stream.tell(),
+                "rows": rows_before + rows,
+            })
+
+    try:
+        classify_stream(
+            input_stream, output_stream, fmt, output_format,
+            chunk_size=args.chunk_size,
+            workers=args.workers,
+            text_field=args.text_field,
+            location_field=args.location_field,
+            start_offset=offset,
+            csv_header=header,
+            write_header=write_header,
+            on_chunk=on_chunk,
+            progress_interval=args.progress_interval,
+        )
+    finally:
+        if not from_stdin:
+            input_stream.close()
+        if not to_stdout:
+            output_stream.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,13 +8,152 @@ load_dotenv()
 GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY")
 
 # Model Configuration
-MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "models", "transformer_nlu_model")
+MODEL_PATH = os.getenv(
+    "NLU_MODEL_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "models", "transformer_nlu_model")
+)
 TOKENIZER_CONFIG_PATH = os.path.join(os.path.dirname(__file__), "models", "tokenizer_config.json")
+LABEL_ENCODER_PATH = os.getenv(
+    "NLU_LABEL_ENCODER_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "models", "transformer_label_encoder.pkl")
+)
+
+# Sentence encoder: a hub model name, or a local directory written by tools/pin_encoder.py
+ENCODER_PATH = os.getenv("NLU_ENCODER_PATH", "all-MiniLM-L6-v2")
+# Encoder backend: "torch" (SentenceTransformer), "onnx" or "onnx-int8" (ONNX Runtime,
+# using the directory written by tools/export_encoder.py)
+ENCODER_BACKEND = os.getenv("NLU_ENCODER_BACKEND", "torch").lower()
+ONNX_ENCODER_PATH = os.getenv(
+    "NLU_ONNX_ENCODER_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "models", "encoder_onnx")
+)
+# Entity gazetteer (see app/models/entity_extractor.py for the format)
+ENTITY_LEXICON_PATH = os.getenv(
+    "NLU_ENTITY_LEXICON_PATH",
+    os.path.join(os.path.dirname(__file__), "models", "lexicon.json")
+)
+# Nearest-neighbour fast path: directory written by tools/build_intent_index.py ("" disables).
+# Queries at least INTENT_INDEX_THRESHOLD cosine-similar to a training sentence take its
+# intent without running the classifier; INTENT_INDEX_AUDIT_RATE of those hits also run
+# the classifier to measure agreement.
+INTENT_INDEX_PATH = os.getenv("NLU_INTENT_INDEX_PATH", "")
+INTENT_INDEX_THRESHOLD = float(os.getenv("NLU_INTENT_INDEX_THRESHOLD", "0.92"))
+INTENT_INDEX_NPROBE = int(os.getenv("NLU_INTENT_INDEX_NPROBE", "8"))
+INTENT_INDEX_AUDIT_RATE = float(os.getenv("NLU_INTENT_INDEX_AUDIT_RATE", "0.05"))
+# Hashed n-gram first stage: file written by tools/train_cascade.py ("" disables). Queries it
+# classifies with at least NLU_CASCADE_THRESHOLD confidence skip the transformer; 0 uses the
+# threshold tuned into the file (or the model's INTENT_CONFIDENCE_THRESHOLD).
+CASCADE_PATH = os.getenv("NLU_CASCADE_PATH", "")
+CASCADE_THRESHOLD = float(os.getenv("NLU_CASCADE_THRESHOLD", "0")) or None
+# Load models from local files only, with no network lookups
+MODEL_OFFLINE = os.getenv("NLU_MODEL_OFFLINE", "False").lower() == "true"
+# Versioned classifier bundles (see app/models/model_bundle.py; "" loads NLU_MODEL_PATH and
+# NLU_LABEL_ENCODER_PATH instead). The bundle named in CURRENT, or the highest-sorting one, is
+# served; the directory is polled every NLU_MODEL_WATCH_INTERVAL seconds (0 disables) and a new
+# version is loaded, warmed up and swapped in without a restart.
+MODEL_BUNDLES_DIR = os.getenv("NLU_MODEL_BUNDLES_DIR", "")
+MODEL_WATCH_INTERVAL = float(os.getenv("NLU_MODEL_WATCH_INTERVAL", "10"))
+# Seconds a swap waits for requests still running on the old bundle before releasing it
+MODEL_DRAIN_TIMEOUT = float(os.getenv("NLU_MODEL_DRAIN_TIMEOUT", "30"))
+
+# Startup Configuration
+# Bind immediately and load the model in the background; /ready reports progress
+LAZY_MODEL_LOADING = os.getenv("NLU_LAZY_MODEL_LOADING", "False").lower() == "true"
+WARMUP_ENABLED = os.getenv("NLU_WARMUP_ENABLED", "True").lower() == "true"
+
+# Shared inference sidecar: when set, workers send predictions to the
+# process started with `python -m app.models.inference_server` on this socket
+INFERENCE_SOCKET = os.getenv("NLU_INFERENCE_SOCKET", "")
+
+# Inference Configuration
+# "compiled" runs the classifier through a traced tf.function, "keras" uses Model.predict,
+# "numpy" runs the file written by tools/export_classifier.py without importing TensorFlow
+INFERENCE_MODE = os.getenv("NLU_INFERENCE_MODE", "compiled").lower()
+NUMPY_CLASSIFIER_PATH = os.getenv(
+    "NLU_NUMPY_CLASSIFIER_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "models", "intent_classifier.npz")
+)
+
+# Inference Batching Configuration
+BATCHING_ENABLED = os.getenv("NLU_BATCHING_ENABLED", "False").lower() == "true"
+BATCH_MAX_SIZE = int(os.getenv("NLU_BATCH_MAX_SIZE", "32"))
+BATCH_MAX_WAIT_MS = float(os.getenv("NLU_BATCH_MAX_WAIT_MS", "5"))
+BATCH_MAX_QUEUE = int(os.getenv("NLU_BATCH_MAX_QUEUE", "1024"))
+BATCH_ENQUEUE_TIMEOUT = float(os.getenv("NLU_BATCH_ENQUEUE_TIMEOUT", "0"))
+BATCH_STREAM_CHUNK_SIZE = int(os.getenv("NLU_BATCH_STREAM_CHUNK_SIZE", "256"))
+
+# Embedding Cache Configuration (a budget of 0 disables the cache, an empty path disables persistence)
+EMBEDDING_CACHE_MAX_BYTES = int(float(os.getenv("NLU_EMBEDDING_CACHE_MB", "64")) * 1024 * 1024)
+EMBEDDING_CACHE_TTL = float(os.getenv("NLU_EMBEDDING_CACHE_TTL", "0")) or None
+EMBEDDING_CACHE_PATH = os.getenv("NLU_EMBEDDING_CACHE_PATH", "")
 
 # API Configuration
 API_HOST = "0.0.0.0"
 API_PORT = 8000
 DEBUG = os.getenv("DEBUG", "False").lower() == "true"
+# Shared secret for the /admin endpoints, sent in the X-Admin-Token header ("" disables them)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Maps Cache Configuration ("memory", "sqlite" or "none")
+MAPS_CACHE_BACKEND = os.getenv("MAPS_CACHE_BACKEND", "memory").lower()
+MAPS_CACHE_PATH = os.getenv("MAPS_CACHE_PATH", "maps_cache.sqlite3")
+MAPS_CACHE_MAX_ENTRIES = int(os.getenv("MAPS_CACHE_MAX_ENTRIES", "10000"))
+GEOCODE_CACHE_TTL = float(os.getenv("GEOCODE_CACHE_TTL", str(30 * 24 * 3600)))
+PLACES_CACHE_TTL = float(os.getenv("PLACES_CACHE_TTL", "300"))
+PLACES_COORDINATE_PRECISION = int(os.getenv("PLACES_COORDINATE_PRECISION", "3"))
+
+# Local place index answering nearby searches without the live API (see app/services/place_index.py;
+# build one with tools/build_place_index.py). An empty path disables it; a max age of 0 never expires.
+PLACE_INDEX_PATH = os.getenv("PLACE_INDEX_PATH", "")
+PLACE_INDEX_MAX_AGE = float(os.getenv("PLACE_INDEX_MAX_AGE_DAYS", "30")) * 24 * 3600 or None
+
+# Routing table from intents and category entities to Places searches (see app/services/router.py)
+MAPS_ROUTES_PATH = os.getenv(
+    "MAPS_ROUTES_PATH",
+    os.path.join(os.path.dirname(__file__), "services", "routes.json")
+)
+
+# Async Maps Client Configuration
+MAPS_ASYNC_CLIENT = os.getenv("MAPS_ASYNC_CLIENT", "True").lower() == "true"
+MAPS_API_BASE_URL = os.getenv("MAPS_API_BASE_URL", "https://maps.googleapis.com")
+MAPS_MAX_CONNECTIONS = int(os.getenv("MAPS_MAX_CONNECTIONS", "100"))
+MAPS_MAX_KEEPALIVE = int(os.getenv("MAPS_MAX_KEEPALIVE", "20"))
+MAPS_PER_HOST_LIMIT = int(os.getenv("MAPS_PER_HOST_LIMIT", "20"))
+MAPS_RATE_LIMIT_QPS = float(os.getenv("MAPS_RATE_LIMIT_QPS", "50"))
+MAPS_RATE_LIMIT_BURST = float(os.getenv("MAPS_RATE_LIMIT_BURST", "50"))
+MAPS_MAX_RETRIES = int(os.getenv("MAPS_MAX_RETRIES", "3"))
+MAPS_RETRY_BACKOFF = float(os.getenv("MAPS_RETRY_BACKOFF", "0.25"))
+MAPS_REQUEST_TIMEOUT = float(os.getenv("MAPS_REQUEST_TIMEOUT", "5"))
+
+# Concurrency Configuration
+INFERENCE_WORKERS = int(os.getenv("NLU_INFERENCE_WORKERS", "4"))
+INFERENCE_MAX_PENDING = int(os.getenv("NLU_INFERENCE_MAX_PENDING", "64"))
+MAPS_IO_WORKERS = int(os.getenv("MAPS_IO_WORKERS", "16"))
+MAPS_IO_MAX_PENDING = int(os.getenv("MAPS_IO_MAX_PENDING", "128"))
+QUERY_TIMEOUT_SECONDS = float(os.getenv("QUERY_TIMEOUT_SECONDS", "10"))
+# Geocode the request's location while the model runs; the coordinates are
+# dropped if the prediction needs no Places search
+MAPS_SPECULATIVE_GEOCODE = os.getenv("MAPS_SPECULATIVE_GEOCODE", "True").lower() == "true"
+
+# Overload Control
+# Pressure is max(in-flight /query requests / OVERLOAD_MAX_IN_FLIGHT, recent p90 latency /
+# OVERLOAD_TARGET_LATENCY_MS). Past each threshold new requests skip the Maps search, then
+# skip the model (embedding cache or keyword fallback), then get a 503 with Retry-After.
+OVERLOAD_CONTROL_ENABLED = os.getenv("OVERLOAD_CONTROL_ENABLED", "True").lower() == "true"
+OVERLOAD_MAX_IN_FLIGHT = int(os.getenv("OVERLOAD_MAX_IN_FLIGHT", "64"))
+OVERLOAD_TARGET_LATENCY_MS = float(os.getenv("OVERLOAD_TARGET_LATENCY_MS", "1000"))
+OVERLOAD_SKIP_MAPS_AT = float(os.getenv("OVERLOAD_SKIP_MAPS_AT", "0.6"))
+OVERLOAD_MODEL_FREE_AT = float(os.getenv("OVERLOAD_MODEL_FREE_AT", "0.8"))
+OVERLOAD_REJECT_AT = float(os.getenv("OVERLOAD_REJECT_AT", "1.0"))
+OVERLOAD_WINDOW_SECONDS = float(os.getenv("OVERLOAD_WINDOW_SECONDS", "2"))
+# Requests the latency window must hold before latency counts towards pressure
+OVERLOAD_MIN_LATENCY_SAMPLES = int(os.getenv("OVERLOAD_MIN_LATENCY_SAMPLES", "20"))
+
+# Metrics Configuration
+# Per-stage histograms and counters, exposed in Prometheus text format on GET /metrics
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+# Add a Server-Timing header with the per-stage durations of each request
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "False").lower() == "true"
 
 # Logging Configuration
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
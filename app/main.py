@@ -1,20 +1,52 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
+import asyncio
+import hmac
+import json
 import os
+import time
 from pydantic import BaseModel
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 # Import our services
 from app.services.api_builder import APIBuilder
+from app.services.executors import ExecutorOverloadedError
+from app.services.overload import OverloadController, ServerOverloadedError
+from app.models.batching import BatchQueueFullError
+from app.models.nlu_model import ModelNotReadyError
+from app.metrics import (
+    CONTENT_TYPE, HTTP_REQUEST_SECONDS, REGISTRY,
+    end_request_timing, server_timing_header, start_request_timing
+)
+from app.config import (
+    ADMIN_TOKEN, BATCH_STREAM_CHUNK_SIZE, QUERY_TIMEOUT_SECONDS, LAZY_MODEL_LOADING,
+    METRICS_ENABLED, SERVER_TIMING_ENABLED
+)
 
 # Load environment variables
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # In lazy mode the server binds right away and the model loads in the background
+    api_builder.nlu_model.start_loading()
+    # Swap in new model bundles as they are published
+    api_builder.nlu_model.start_watching()
+    yield
+    api_builder.nlu_model.stop_watching()
+    # Persist the embedding cache so the next process starts warm
+    api_builder.nlu_model.save_embedding_cache()
+    if api_builder.async_google_maps is not None:
+        await api_builder.async_google_maps.aclose()
+
 app = FastAPI(
     title="NearbyNLU",
     description="Natural Language Understanding for Location-Based Queries",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -26,19 +58,54 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    if not (METRICS_ENABLED or SERVER_TIMING_ENABLED):
+        return await call_next(request)
+
+    timings, token = start_request_timing() if SERVER_TIMING_ENABLED else (None, None)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        if token is not None:
+            end_request_timing(token)
+    elapsed = time.perf_counter() - started
+
+    if METRICS_ENABLED:
+        # Label by route template so the path label stays low-cardinality
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        HTTP_REQUEST_SECONDS.observe(elapsed, request.method, route, str(response.status_code))
+    if timings is not None:
+        response.headers["Server-Timing"] = server_timing_header(timings, elapsed)
+    return response
+
 # Initialize our services
-api_builder = APIBuilder()
+api_builder = APIBuilder(lazy=LAZY_MODEL_LOADING)
 
 class QueryRequest(BaseModel):
     query: str
     location: Optional[str] = None
 
+class BatchQueryRequest(BaseModel):
+    queries: List[str]
+    location: Optional[str] = None
+
+class ReloadRequest(BaseModel):
+    version: Optional[str] = None
+
 class QueryResponse(BaseModel):
     intent: str
     entities: Dict
     confidence: float
     api_call: Optional[Dict] = None
     results: Optional[list] = None
+    # Set when the server was overloaded: "maps_skipped", "cached" or "keyword"
+    degraded: Optional[str] = None
+    # Classifier bundle that answered (None for keyword fallbacks)
+    model_version: Optional[str] = None
+    # "cascade" when the n-gram first stage answered without the transformer
+    stage: Optional[str] = None
 
 @app.get("/")
 async def root():
@@ -48,34 +115,159 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics")
+async def metrics():
+    """Expose stage latencies, batch sizes, cache and queue stats for Prometheus."""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
+
+@app.get("/ready")
+async def readiness_check():
+    """Report whether the model has finished loading (503 until it has)."""
+    readiness = api_builder.nlu_model.readiness()
+    status_code = 200 if api_builder.nlu_model.is_ready else 503
+    return JSONResponse(status_code=status_code, content=readiness)
+
+@app.post("/admin/model/reload")
+async def reload_model(request: Optional[ReloadRequest] = None, x_admin_token: Optional[str] = Header(None)):
+    """
+    Load a model bundle, warm it up and swap it in without a restart.
+
+    Queries keep being served by the current model while the new one loads;
+    requests already running finish on the old one.
+
+    Args:
+        request: Optional ReloadRequest naming the version; defaults to the
+            bundle CURRENT names (or the latest one)
+        x_admin_token: Must match ADMIN_TOKEN
+
+    Returns:
+        The new and previous version, and whether a swap happened
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled")
+    if not hmac.compare_digest((x_admin_token or "").encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+    version = request.version if request is not None else None
+    try:
+        # Loading takes seconds; keep it off the event loop and the bounded request pools
+        return await asyncio.get_running_loop().run_in_executor(None, api_builder.nlu_model.reload, version)
+    except ModelNotReadyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reloading model: {str(e)}")
+
 @app.post("/query", response_model=QueryResponse)
 async def process_query(request: QueryRequest):
     """
     Process a natural language query and return location-based results.
     
+    Under load the overload controller may skip the Maps search or the
+    model (flagged in "degraded"), or reject the request with a 503.
+
     Args:
         request: QueryRequest containing the user's query and optional location
         
     Returns:
         QueryResponse containing the processed results
     """
+    overload = api_builder.overload
+    level = None
+    started = time.perf_counter()
     try:
-        # Build the full query including location if provided
-        full_query = request.query
-        if request.location:
-            full_query = f"{request.query} near {request.location}"
-            
-        # Process the query using our API builder
-        response = api_builder.build_api_call(full_query)
+        if overload is not None:
+            level = overload.acquire()
 
+        # The location stays out of the classified text; it is geocoded
+        # alongside inference and only used for the Places search
+        response = await asyncio.wait_for(
+            api_builder.build_api_call_async(
+                request.query,
+                location=request.location,
+                level=OverloadController.FULL if level is None else level
+            ),
+            timeout=QUERY_TIMEOUT_SECONDS
+        )
         
         return response
         
+    except ServerOverloadedError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Server overloaded: {str(e)}",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except ModelNotReadyError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": "5"}
+        )
+    except (ExecutorOverloadedError, BatchQueueFullError) as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Server overloaded: {str(e)}",
+            headers={"Retry-After": "1"}
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=504,
+            detail=f"Query timed out after {QUERY_TIMEOUT_SECONDS:g}s"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error processing query: {str(e)}"
         )
+    finally:
+        if level is not None:
+            overload.release(level, time.perf_counter() - started)
+
+@app.post("/query/batch")
+async def process_query_batch(request: BatchQueryRequest):
+    """
+    Classify a list of natural language queries.
+
+    Results are streamed back as NDJSON, one line per query in input order,
+    so large batches are never held in memory as a single response.
+    
+    Args:
+        request: BatchQueryRequest containing the queries and optional location
+        
+    Returns:
+        StreamingResponse yielding one JSON object per query
+    """
+    if not api_builder.nlu_model.is_ready:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Model not ready (state: {api_builder.nlu_model.loading_state})",
+            headers={"Retry-After": "5"}
+        )
+
+    queries = request.queries
+
+    async def generate():
+        for start in range(0, len(queries), BATCH_STREAM_CHUNK_SIZE):
+            chunk = queries[start:start + BATCH_STREAM_CHUNK_SIZE]
+            try:
+                predictions = await api_builder.inference_executor.run(
+                    api_builder.nlu_model.predict_batch, chunk, [request.location] * len(chunk)
+                )
+            except Exception as e:
+                predictions = [{"error": f"Error processing query: {str(e)}"}] * len(chunk)
+
+            for offset, prediction in enumerate(predictions):
+                line = {"index": start + offset, "query": request.queries[start + offset]}
+                line.update(prediction)
+                yield json.dumps(line) + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,268 @@
+"""
+Lightweight in-process metrics with Prometheus text exposition.
+
+Request-path code records stage durations with ``timed("stage")``; each
+observation is a perf_counter pair, a bisect and a locked increment, so
+instrumentation stays on in production (see benchmarks/bench_metrics.py).
+Point-in-time values that already live elsewhere (cache stats, executor
+queue depth) are read by collectors when /metrics is scraped instead of
+being tracked on every call.
+
+When Server-Timing is enabled the HTTP middleware starts a per-request
+timing scope and every stage recorded under it is also summed into the
+response's Server-Timing header.
+"""
+
+import bisect
+import contextvars
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .config import METRICS_ENABLED
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+# (labels, value) pairs of one metric family
+Samples = List[Tuple[Dict[str, str], float]]
+# (name, type, help, samples) as returned by collectors
+MetricFamily = Tuple[str, str, str, Samples]
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonically increasing count, optionally split by label values."""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        return self._values.get(labelvalues, 0.0)
+
+    def samples(self) -> Samples:
+        with self._lock:
+            values = list(self._values.items())
+        return [(dict(zip(self.labelnames, key)), value) for key, value in values]
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(labels)} {_format_value(value)}" for labels, value in self.samples()]
+
+
+class Histogram:
+    """Bucketed distribution of observations, optionally split by label values."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last one is +Inf), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *labelvalues: str) -> int:
+        series = self._series.get(labelvalues)
+        return series[2] if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            snapshot = [(key, list(series[0]), series[1], series[2]) for key, series in self._series.items()]
+
+        lines = []
+        for key, counts, total, count in snapshot:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                bucket_labels = dict(labels, le=_format_value(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class Registry:
+    """Holds metrics plus scrape-time collectors and renders them for Prometheus."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._collectors: Dict[str, Callable[[], Iterable[MetricFamily]]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def register_collector(self, name: str, collector: Callable[[], Iterable[MetricFamily]]):
+        """
+        Add (or replace) a function called on every scrape.
+
+        Args:
+            name (str): Collector name; registering the same name again replaces it
+            collector: Returns (name, type, help, [(labels, value), ...]) tuples
+        """
+        with self._lock:
+            self._collectors[name] = collector
+
+    def unregister_collector(self, name: str):
+        with self._lock:
+            self._collectors.pop(name, None)
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors.items())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render())
+
+        families: Dict[str, Tuple[str, str, Samples]] = {}
+        for collector_name, collector in collectors:
+            try:
+                collected = list(collector())
+            except Exception as e:
+                print(f"Error collecting metrics from {collector_name}: {e}")
+                continue
+            # Several collectors may report the same family (e.g. one per executor)
+            for name, metric_type, help, samples in collected:
+                families.setdefault(name, (metric_type, help, []))[2].extend(samples)
+
+        for name, (metric_type, help, samples) in families.items():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "nearbynlu_stage_seconds", "Time spent in each request-processing stage", ("stage",)
+))
+STAGE_ERRORS = REGISTRY.register(Counter(
+    "nearbynlu_stage_errors_total", "Exceptions raised by each stage, including upstream Maps calls", ("stage",)
+))
+INFERENCE_BATCH_SIZE = REGISTRY.register(Histogram(
+    "nearbynlu_inference_batch_size", "Texts per encoder/classifier pass", buckets=SIZE_BUCKETS
+))
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "nearbynlu_http_request_seconds", "HTTP request latency", ("method", "path", "status")
+))
+
+_request_timings: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar(
+    "nearbynlu_request_timings", default=None
+)
+
+
+def record_stage(stage: str, seconds: float, failed: bool = False):
+    """Record one stage duration in the histogram and the current request's timings."""
+    if METRICS_ENABLED:
+        STAGE_SECONDS.observe(seconds, stage)
+        if failed:
+            STAGE_ERRORS.inc(stage)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+def record_batch_size(size: int):
+    if METRICS_ENABLED:
+        INFERENCE_BATCH_SIZE.observe(size)
+
+
+class timed:
+    """
+    Context manager that records the duration of the enclosed block as a stage.
+
+    Works around ``await`` as well, measuring wall time. A block that raises
+    also increments the stage's error counter.
+    """
+
+    __slots__ = ("stage", "started")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record_stage(self.stage, time.perf_counter() - self.started, failed=exc_type is not None)
+        return False
+
+
+def start_request_timing() -> Tuple[Dict[str, float], contextvars.Token]:
+    """Begin collecting stage timings for the current request context."""
+    timings: Dict[str, float] = {}
+    return timings, _request_timings.set(timings)
+
+
+def end_request_timing(token: contextvars.Token):
+    _request_timings.reset(token)
+
+
+def server_timing_header(timings: Dict[str, float], total: Optional[float] = None) -> str:
+    """
+    Format stage timings as a Server-Timing header value.
+
+    Args:
+        timings (Dict[str, float]): Stage name -> seconds
+        total (float): Overall request time in seconds, if known
+
+    Returns:
+        str: e.g. "encode;dur=3.1, classify;dur=0.4, total;dur=4.0" (milliseconds)
+    """
+    entries = [f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in timings.items()]
+    if total is not None:
+        entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries)
@@ -0,0 +1,191 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+
+class BatchQueueFullError(RuntimeError):
+    """Raised when the batcher's request queue is at capacity."""
+
+
+class BatchStats:
+    """Rolling per-batch size and latency statistics."""
+
+    def __init__(self, window: int = 1024):
+        self._lock = threading.Lock()
+        self._sizes = deque(maxlen=window)
+        self._latencies = deque(maxlen=window)
+        self._waits = deque(maxlen=window)
+        self.total_batches = 0
+        self.total_requests = 0
+        self.rejected = 0
+
+    def record(self, size: int, latency: float, wait: float):
+        with self._lock:
+            self._sizes.append(size)
+            self._latencies.append(latency)
+            self._waits.append(wait)
+            self.total_batches += 1
+            self.total_requests += size
+
+    def record_rejection(self):
+        with self._lock:
+            self.rejected += 1
+
+    @staticmethod
+    def _percentile(values: List[float], pct: float) -> float:
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Summarize the recent batches.
+
+        Returns:
+            dict: Totals plus mean/max batch size and p50/p95/p99 batch latency
+                  and queue wait (in milliseconds) over the rolling window
+        """
+        with self._lock:
+            sizes = list(self._sizes)
+            latencies = list(self._latencies)
+            waits = list(self._waits)
+            totals = {
+                "total_batches": self.total_batches,
+                "total_requests": self.total_requests,
+                "rejected": self.rejected,
+            }
+
+        totals.update({
+            "mean_batch_size": (sum(sizes) / len(sizes)) if sizes else 0.0,
+            "max_batch_size": max(sizes) if sizes else 0,
+            "latency_ms_p50": self._percentile(latencies, 50) * 1000,
+            "latency_ms_p95": self._percentile(latencies, 95) * 1000,
+            "latency_ms_p99": self._percentile(latencies, 99) * 1000,
+            "wait_ms_p50": self._percentile(waits, 50) * 1000,
+            "wait_ms_p95": self._percentile(waits, 95) * 1000,
+        })
+        return totals
+
+
+class MicroBatcher:
+    """
+    Dynamic batching engine.
+
+    Concurrent callers submit single items; a background worker collects them
+    for up to ``max_wait_ms`` or until ``max_batch_size`` items are queued,
+    runs ``process_batch`` once on the whole list and hands each caller its
+    own result. The queue is bounded: once ``max_queue_size`` items are
+    pending, ``submit`` waits up to ``enqueue_timeout`` seconds and then
+    raises ``BatchQueueFullError``.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        max_queue_size: int = 1024,
+        enqueue_timeout: float = 0.0,
+        stats_window: int = 1024,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.enqueue_timeout = enqueue_timeout
+        self.stats = BatchStats(window=stats_window)
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._stopped = threading.Event()
+        self._worker = threading.Thread(target=self._run, name="nlu-micro-batcher", daemon=True)
+        self._worker.start()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, item: Any) -> Future:
+        """
+        Queue an item for the next batch.
+
+        Args:
+            item: A single input for ``process_batch``
+
+        Returns:
+            Future: Resolves to this item's result
+
+        Raises:
+            BatchQueueFullError: If the queue stays full for ``enqueue_timeout``
+        """
+        if self._stopped.is_set():
+            raise RuntimeError("MicroBatcher has been stopped")
+        future = Future()
+        try:
+            if self.enqueue_timeout > 0:
+                self._queue.put((item, future, time.monotonic()), timeout=self.enqueue_timeout)
+            else:
+                self._queue.put_nowait((item, future, time.monotonic()))
+        except queue.Full:
+            self.stats.record_rejection()
+            raise BatchQueueFullError(
+                f"Inference queue is full ({self._queue.maxsize} pending requests)"
+            )
+        return future
+
+    def run(self, item: Any, timeout: Optional[float] = None) -> Any:
+        """Submit an item and block until its result is ready."""
+        return self.submit(item).result(timeout=timeout)
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the worker after it drains the requests already queued."""
+        self._stopped.set()
+        self._worker.join(timeout=timeout)
+
+    def _collect(self) -> list:
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not (self._stopped.is_set() and self._queue.empty()):
+            batch = self._collect()
+            if not batch:
+                continue
+
+            items = [item for item, _, _ in batch]
+            started = time.monotonic()
+            wait = started - min(enqueued for _, _, enqueued in batch)
+            try:
+                results = self.process_batch(items)
+                if len(results) != len(items):
+                    raise RuntimeError(
+                        f"process_batch returned {len(results)} results for {len(items)} inputs"
+                    )
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            finally:
+                self.stats.record(len(items), time.monotonic() - started, wait)
+
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
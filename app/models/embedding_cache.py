@@ -0,0 +1,187 @@
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Rough per-entry bookkeeping cost (OrderedDict node, tuple, timestamps)
+ENTRY_OVERHEAD_BYTES = 128
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(text: str, location: Optional[str] = None) -> str:
+    """
+    Normalize query text for embedding and cache lookup.
+
+    The text is case-folded and its whitespace collapsed, neither of which
+    changes what the uncased MiniLM tokenizer sees. The API keeps a
+    structured location out of the text, but callers that still append it
+    as "near {location}" get that suffix dropped: the place name carries no
+    intent signal, and keeping it would give every city its own cache entry.
+
+    Args:
+        text (str): Query text
+        location (str): Location given with the query, if any
+
+    Returns:
+        str: Normalized query
+    """
+    normalized = _WHITESPACE.sub(" ", text.casefold()).strip()
+    if location:
+        suffix = " near " + _WHITESPACE.sub(" ", location.casefold()).strip()
+        if normalized.endswith(suffix):
+            normalized = normalized[:-len(suffix)]
+    return normalized
+
+
+class EmbeddingCache:
+    """
+    Thread-safe LRU cache of sentence embeddings with an optional TTL.
+
+    Entries are evicted least-recently-used first once their estimated
+    memory exceeds ``max_bytes``. The cache can be saved to and loaded from
+    an ``.npz`` file so a restarted process starts warm.
+    """
+
+    def __init__(self, max_bytes: int, ttl: Optional[float] = None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl if ttl and ttl > 0 else None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _entry_size(key: str, vector: np.ndarray) -> int:
+        return vector.nbytes + sys.getsizeof(key) + ENTRY_OVERHEAD_BYTES
+
+    def _expired(self, stored_at: float, now: float) -> bool:
+        return self.ttl is not None and now - stored_at > self.ttl
+
+    def _remove(self, key: str):
+        vector, _ = self._entries.pop(key)
+        self._bytes -= self._entry_size(key, vector)
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Look up several keys, returning None for each miss."""
+        now = time.time()
+        found = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and self._expired(entry[1], now):
+                    self._remove(key)
+                    entry = None
+                if entry is None:
+                    self.misses += 1
+                    found.append(None)
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    found.append(entry[0])
+        return found
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        return self.get_many([key])[0]
+
+    def put_many(self, keys: Sequence[str], vectors: Sequence[np.ndarray], stored_at: Optional[float] = None):
+        """Insert or refresh several entries, evicting LRU entries as needed."""
+        stored_at = time.time() if stored_at is None else stored_at
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                vector = np.array(vector, dtype=np.float32)
+                vector.setflags(write=False)
+                size = self._entry_size(key, vector)
+                if size > self.max_bytes:
+                    continue
+                if key in self._entries:
+                    self._remove(key)
+                self._entries[key] = (vector, stored_at)
+                self._bytes += size
+                while self._bytes > self.max_bytes:
+                    oldest = next(iter(self._entries))
+                    self._remove(oldest)
+                    self.evictions += 1
+
+    def put(self, key: str, vector: np.ndarray):
+        self.put_many([key], [vector])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+    def save(self, path: str):
+        """
+        Persist unexpired entries to an .npz file, oldest first.
+
+        The file is written to a temporary path and renamed into place so a
+        crash mid-write never leaves a truncated cache behind.
+        """
+        now = time.time()
+        with self._lock:
+            items = [
+                (key, vector, stored_at)
+                for key, (vector, stored_at) in self._entries.items()
+                if not self._expired(stored_at, now)
+            ]
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        if items:
+            vectors = np.stack([vector for _, vector, _ in items])
+        else:
+            vectors = np.zeros((0, 0), dtype=np.float32)
+        np.savez(
+            tmp_path,
+            keys=np.array([key for key, _, _ in items], dtype=str),
+            vectors=vectors,
+            stored_at=np.array([stored_at for _, _, stored_at in items], dtype=np.float64),
+        )
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> int:
+        """
+        Load entries saved by ``save``, skipping expired ones.
+
+        Returns:
+            int: Number of entries loaded
+        """
+        with np.load(path, allow_pickle=False) as data:
+            keys = [str(key) for key in data["keys"]]
+            vectors = data["vectors"]
+            stored_at = data["stored_at"]
+
+        now = time.time()
+        loaded = 0
+        for key, vector, timestamp in zip(keys, vectors, stored_at):
+            if self._expired(float(timestamp), now):
+                continue
+            self.put_many([key], [vector], stored_at=float(timestamp))
+            loaded += 1
+        return loaded
@@ -0,0 +1,132 @@
+"""
+Sentence encoder backends.
+
+Every backend exposes the subset of the SentenceTransformer API NLUModel
+uses: ``encode(texts) -> float32 matrix`` and
+``get_sentence_embedding_dimension()``.
+
+- "torch": the original full-precision SentenceTransformer
+- "onnx": the same transformer exported to ONNX and run with ONNX Runtime
+- "onnx-int8": the ONNX export with dynamically quantized int8 weights
+
+The ONNX directories are produced by tools/export_encoder.py.
+"""
+
+import json
+import os
+from typing import List, Sequence
+
+import numpy as np
+
+ONNX_MODEL_FILES = {
+    "onnx": "model.onnx",
+    "onnx-int8": "model_int8.onnx",
+}
+ENCODER_CONFIG_FILE = "encoder_config.json"
+
+
+def mean_pool(token_embeddings: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """Average token embeddings over the non-padding positions."""
+    mask = attention_mask[..., None].astype(np.float32)
+    summed = (token_embeddings * mask).sum(axis=1)
+    counts = np.clip(mask.sum(axis=1), 1e-9, None)
+    return summed / counts
+
+
+def l2_normalize(embeddings: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.clip(norms, 1e-12, None)
+
+
+class SentenceTransformerEncoder:
+    """Full-precision PyTorch encoder via sentence-transformers."""
+
+    def __init__(self, path: str, offline: bool = False):
+        from sentence_transformers import SentenceTransformer
+
+        if offline:
+            self.model = SentenceTransformer(path, local_files_only=True)
+        else:
+            self.model = SentenceTransformer(path)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: Sequence[str], batch_size: int = 64) -> np.ndarray:
+        return np.asarray(self.model.encode(list(texts), batch_size=batch_size), dtype=np.float32)
+
+
+class OnnxEncoder:
+    """
+    Transformer encoder exported to ONNX, run on CPU with ONNX Runtime.
+
+    Reproduces the SentenceTransformer pipeline: tokenize, run the
+    transformer, mean-pool over the attention mask and L2-normalize.
+    """
+
+    def __init__(self, model_dir: str, model_file: str = "model.onnx", num_threads: int = 0):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        with open(os.path.join(model_dir, ENCODER_CONFIG_FILE)) as f:
+            self.config = json.load(f)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, model_file), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {node.name for node in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir, local_files_only=True)
+        self.max_seq_length = self.config.get("max_seq_length", 256)
+        self.normalize = self.config.get("normalize", True)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.config["embedding_dim"]
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        tokens = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=self.max_seq_length, return_tensors="np"
+        )
+        feed = {name: tokens[name].astype(np.int64) for name in self.input_names if name in tokens}
+        token_embeddings = self.session.run(None, feed)[0]
+        embeddings = mean_pool(token_embeddings, tokens["attention_mask"])
+        if self.normalize:
+            embeddings = l2_normalize(embeddings)
+        return embeddings.astype(np.float32)
+
+    def encode(self, texts: Sequence[str], batch_size: int = 64) -> np.ndarray:
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+        return np.concatenate([
+            self._encode_batch(texts[start:start + batch_size])
+            for start in range(0, len(texts), batch_size)
+        ])
+
+
+def load_encoder(backend: str, path: str, onnx_path: str, offline: bool = False):
+    """
+    Create the configured sentence encoder.
+
+    Args:
+        backend (str): "torch", "onnx" or "onnx-int8"
+        path (str): SentenceTransformer model name or directory (torch backend)
+        onnx_path (str): Directory written by tools/export_encoder.py (ONNX backends)
+        offline (bool): Disallow network lookups
+
+    Returns:
+        An encoder with encode() and get_sentence_embedding_dimension()
+    """
+    if offline:
+        # Never reach out to the Hugging Face hub for a pinned local model
+        os.environ["HF_HUB_OFFLINE"] = "1"
+        os.environ["TRANSFORMERS_OFFLINE"] = "1"
+
+    if backend == "torch":
+        return SentenceTransformerEncoder(path, offline=offline)
+    if backend in ONNX_MODEL_FILES:
+        return OnnxEncoder(onnx_path, ONNX_MODEL_FILES[backend])
+    raise ValueError(f"Unknown encoder backend: {backend}")
@@ -0,0 +1,148 @@
+import json
+import os
+import re
+from typing import Dict, List, NamedTuple
+
+# Phrases in the lexicon may use this placeholder to match any number
+NUMBER_TOKEN = "<num>"
+
+_TOKEN = re.compile(r"\d+(?:\.\d+)?|\w+(?:['-]\w+)*")
+_NUMBER = re.compile(r"\d+(?:\.\d+)?$")
+
+DEFAULT_LEXICON_PATH = os.path.join(os.path.dirname(__file__), "lexicon.json")
+
+
+class EntitySpan(NamedTuple):
+    label: str
+    value: str
+    start: int
+    end: int
+    text: str
+
+
+class GazetteerExtractor:
+    """
+    Dictionary-driven entity extractor.
+
+    All lexicon phrases are compiled into one token-level trie. Extraction
+    tokenizes the text once and walks the trie from each token, keeping the
+    leftmost-longest match, so matches always fall on word boundaries and
+    the per-query cost depends on the text length and the longest phrase,
+    not on the number of lexicon entries.
+
+    Lexicon format::
+
+        {
+          "version": "1",
+          "entities": {
+            "<label>": {"<value>": ["phrase", "another phrase", ...], ...},
+            ...
+          }
+        }
+
+    A phrase token "<num>" matches any number; "{num}" in the value is
+    replaced with the matched number(s).
+    """
+
+    def __init__(self, lexicon: Dict):
+        self.version = str(lexicon.get("version", "unversioned"))
+        self._trie = {}
+        self.max_phrase_tokens = 0
+        self.size = 0
+        for label, values in lexicon.get("entities", {}).items():
+            for value, phrases in values.items():
+                for phrase in phrases:
+                    self._add(phrase, label, value)
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_LEXICON_PATH) -> "GazetteerExtractor":
+        with open(path) as f:
+            return cls(json.load(f))
+
+    @staticmethod
+    def _tokenize(text: str):
+        return [(match.group().casefold(), match.start(), match.end()) for match in _TOKEN.finditer(text)]
+
+    def _phrase_tokens(self, phrase: str) -> List[str]:
+        tokens = []
+        for part in phrase.split():
+            if part == NUMBER_TOKEN:
+                tokens.append(NUMBER_TOKEN)
+            else:
+                tokens.extend(token for token, _, _ in self._tokenize(part))
+        return tokens
+
+    def _add(self, phrase: str, label: str, value: str):
+        tokens = self._phrase_tokens(phrase)
+        if not tokens:
+            return
+        node = self._trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        # Later entries for the same phrase override earlier ones
+        node[None] = (label, value)
+        self.max_phrase_tokens = max(self.max_phrase_tokens, len(tokens))
+        self.size += 1
+
+    def extract_spans(self, text: str) -> List[EntitySpan]:
+        """
+        Find all non-overlapping lexicon matches, leftmost-longest first.
+
+        Args:
+            text (str): Input text
+
+        Returns:
+            List[EntitySpan]: Matches in text order with character offsets
+        """
+        tokens = self._tokenize(text)
+        spans = []
+        i = 0
+        while i < len(tokens):
+            node = self._trie
+            best = None
+            numbers = []
+            best_numbers = None
+            j = i
+            while j < len(tokens):
+                token = tokens[j][0]
+                child = node.get(token)
+                if child is None and _NUMBER.match(token):
+                    child = node.get(NUMBER_TOKEN)
+                    if child is not None:
+                        numbers = numbers + [token]
+                if child is None:
+                    break
+                node = child
+                j += 1
+                if None in node:
+                    best = (j, node[None])
+                    best_numbers = numbers
+            if best is None:
+                i += 1
+                continue
+
+            end, (label, value) = best
+            if best_numbers:
+                value = value.replace("{num}", " ".join(best_numbers))
+            start_char, end_char = tokens[i][1], tokens[end - 1][2]
+            spans.append(EntitySpan(label, value, start_char, end_char, text[start_char:end_char]))
+            i = end
+        return spans
+
+    def extract(self, text: str) -> Dict[str, str]:
+        """Return the first matched value for each entity label."""
+        entities = {}
+        for span in self.extract_spans(text):
+            entities.setdefault(span.label, span.value)
+        return entities
+
+
+_extractors: Dict[str, GazetteerExtractor] = {}
+
+
+def get_extractor(path: str = DEFAULT_LEXICON_PATH) -> GazetteerExtractor:
+    """Compile the lexicon at path once and share the extractor."""
+    extractor = _extractors.get(path)
+    if extractor is None:
+        extractor = _extractors[path] = GazetteerExtractor.from_file(path)
+    return extractor
@@ -0,0 +1,243 @@
+"""
+Shared inference sidecar.
+
+One process loads the NLU model and serves predictions over a Unix domain
+socket; every uvicorn/gunicorn worker talks to it through RemoteNLUModel
+instead of holding its own copy of the encoder and classifier.
+
+Wire format: each message is a 4-byte big-endian length followed by a UTF-8
+JSON object. Requests carry an "op" ("predict_batch", "ready" or "reload"); responses
+carry either a "results" list or an "error" with its exception "type".
+
+Run the sidecar with:
+    python -m app.models.inference_server --socket /tmp/nearbynlu.sock
+"""
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import struct
+import threading
+from typing import Dict, List, Optional
+
+from .batching import BatchQueueFullError
+from .nlu_model import ModelNotReadyError
+
+HEADER = struct.Struct(">I")
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+
+class InferenceServerError(RuntimeError):
+    """Raised by RemoteNLUModel when the sidecar reports an unexpected error."""
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionError("Inference socket closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def send_message(sock: socket.socket, message: Dict):
+    payload = json.dumps(message).encode("utf-8")
+    sock.sendall(HEADER.pack(len(payload)) + payload)
+
+
+def recv_message(sock: socket.socket) -> Dict:
+    (size,) = HEADER.unpack(_recv_exactly(sock, HEADER.size))
+    if size > MAX_MESSAGE_BYTES:
+        raise ValueError(f"Message of {size} bytes exceeds the {MAX_MESSAGE_BYTES} byte limit")
+    return json.loads(_recv_exactly(sock, size).decode("utf-8"))
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        model = self.server.model
+        while True:
+            try:
+                request = recv_message(self.request)
+            except (ConnectionError, OSError):
+                return
+
+            try:
+                if request.get("op") == "ready":
+                    response = {"results": model.readiness()}
+                elif request.get("op") == "predict_batch":
+                    texts = request["texts"]
+                    locations = request.get("locations")
+                    if len(texts) == 1:
+                        # Single queries go through the micro-batcher (if enabled)
+                        # so concurrent workers share encoder and classifier passes
+                        results = [model.predict(texts[0], (locations or [None])[0])]
+                    else:
+                        results = model.predict_batch(texts, locations)
+                    response = {"results": results}
+                elif request.get("op") == "reload":
+                    response = {"results": model.reload(request.get("version"))}
+                else:
+                    response = {"error": f"Unknown op: {request.get('op')}", "type": "ValueError"}
+            except Exception as e:
+                response = {"error": str(e), "type": type(e).__name__}
+
+            try:
+                send_message(self.request, response)
+            except OSError:
+                return
+
+
+class InferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serves one shared NLUModel to many worker processes over a Unix socket."""
+
+    daemon_threads = True
+    # One persistent connection per worker thread, so allow a deep accept queue
+    request_queue_size = 128
+
+    def __init__(self, socket_path: str, model):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        self.model = model
+        super().__init__(socket_path, _Handler)
+        os.chmod(socket_path, 0o660)
+
+
+class RemoteNLUModel:
+    """
+    Client for the inference sidecar with the same predict API as NLUModel.
+
+    Each thread keeps its own persistent connection; a broken connection
+    is re-opened once before the error is surfaced.
+    """
+
+    def __init__(self, socket_path: str, timeout: Optional[float] = 30.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.loading_state = "not_loaded"
+        self._local = threading.local()
+        self._ready = False
+        self.model_version = None
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def _call(self, request: Dict):
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                send_message(sock, request)
+                response = recv_message(sock)
+                break
+            except (ConnectionError, OSError):
+                self._close()
+                if attempt:
+                    raise
+
+        if "error" in response:
+            raise self._error(response)
+        return response["results"]
+
+    @staticmethod
+    def _error(response: Dict) -> Exception:
+        error_types = {
+            "ModelNotReadyError": ModelNotReadyError,
+            "BatchQueueFullError": BatchQueueFullError,
+            "ValueError": ValueError,
+            "FileNotFoundError": FileNotFoundError,
+        }
+        return error_types.get(response.get("type"), InferenceServerError)(response["error"])
+
+    def predict(self, text: str, location: Optional[str] = None) -> Dict:
+        return self.predict_batch([text], [location])[0]
+
+    def predict_batch(self, texts: List[str], locations: Optional[List[Optional[str]]] = None) -> List[Dict]:
+        texts = list(texts)
+        if not texts:
+            return []
+        results = self._call({"op": "predict_batch", "texts": texts, "locations": locations})
+        # The sidecar may have swapped models since the last readiness check
+        self.model_version = results[-1].get("model_version", self.model_version)
+        return results
+
+    def readiness(self) -> Dict:
+        try:
+            readiness = self._call({"op": "ready"})
+        except (ConnectionError, OSError) as e:
+            readiness = {"status": "unavailable", "error": str(e)}
+        self.loading_state = readiness["status"]
+        self._ready = readiness["status"] == "ready"
+        self.model_version = readiness.get("model_version", self.model_version)
+        return readiness
+
+    def reload(self, version: Optional[str] = None) -> Dict:
+        """Ask the sidecar to load and swap in a model bundle (see NLUModel.reload)."""
+        result = self._call({"op": "reload", "version": version})
+        self.model_version = result["version"]
+        return result
+
+    @property
+    def is_ready(self) -> bool:
+        if not self._ready:
+            self.readiness()
+        return self._ready
+
+    def start_loading(self):
+        """The sidecar owns model loading; nothing to do in the worker."""
+        return None
+
+    def start_watching(self):
+        """The sidecar watches the model bundles; nothing to do in the worker."""
+        return None
+
+    def stop_watching(self):
+        return None
+
+    def save_embedding_cache(self, path: Optional[str] = None):
+        """The embedding cache lives in the sidecar."""
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the NLU model to local workers over a Unix socket")
+    parser.add_argument("--socket", default=os.getenv("NLU_INFERENCE_SOCKET", "/tmp/nearbynlu.sock"))
+    args = parser.parse_args()
+
+    from .nlu_model import NLUModel
+
+    model = NLUModel()
+    model.start_watching()
+    server = InferenceServer(args.socket, model)
+    print(f"Inference server listening on {args.socket}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        model.stop_watching()
+        model.save_embedding_cache()
+        server.server_close()
+        os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
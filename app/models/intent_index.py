@@ -0,0 +1,288 @@
+"""
+Nearest-neighbour index of labelled training-sentence embeddings.
+
+NLUModel consults the index before the classifier: when a query embedding
+is close enough (cosine similarity) to a stored sentence, the stored intent
+is returned without running the classifier.
+
+On disk an index is a directory written by tools/build_intent_index.py:
+
+- index.json: dimension, intent names and IVF settings
+- embeddings.npy: contiguous float32 matrix of L2-normalized embeddings
+- labels.npy: int32 intent id per row
+- centroids.npy, list_offsets.npy: only for IVF indexes
+
+The matrices are memory-mapped on load. Large corpora can be built as an
+IVF index: rows are clustered with spherical k-means and stored sorted by
+cluster, so a query only scores the rows of its ``nprobe`` closest clusters
+(each a contiguous slice of the memory map). Rows added at runtime go to a
+small in-memory segment that is searched exhaustively until the next save.
+"""
+
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .encoders import l2_normalize
+
+INDEX_FILE = "index.json"
+INDEX_FORMAT_VERSION = 1
+
+
+def spherical_kmeans(embeddings: np.ndarray, clusters: int, iterations: int = 20, seed: int = 0) -> np.ndarray:
+    """
+    Cluster L2-normalized rows by cosine similarity.
+
+    Args:
+        embeddings (np.ndarray): Normalized float32 matrix
+        clusters (int): Number of centroids
+        iterations (int): Assignment/update rounds
+        seed (int): Seed for the initial centroid sample
+
+    Returns:
+        np.ndarray: Normalized float32 centroid matrix
+    """
+    rng = np.random.default_rng(seed)
+    clusters = min(clusters, len(embeddings))
+    centroids = embeddings[rng.choice(len(embeddings), clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = assign(embeddings, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, embeddings)
+        empty = ~sums.any(axis=1)
+        # Re-seed empty clusters so no list ends up unused
+        sums[empty] = embeddings[rng.choice(len(embeddings), int(empty.sum()))]
+        centroids = l2_normalize(sums).astype(np.float32)
+    return centroids
+
+
+def assign(embeddings: np.ndarray, centroids: np.ndarray, chunk_size: int = 65536) -> np.ndarray:
+    """Return the closest centroid for every row, scoring in chunks to bound memory."""
+    return np.concatenate([
+        np.argmax(embeddings[start:start + chunk_size] @ centroids.T, axis=1)
+        for start in range(0, len(embeddings), chunk_size)
+    ]) if len(embeddings) else np.zeros(0, dtype=np.int64)
+
+
+class IntentIndex:
+    """
+    Cosine-similarity lookup from sentence embeddings to intents.
+
+    Args:
+        embeddings (np.ndarray): Row-normalized float32 matrix (may be a memory map)
+        labels (np.ndarray): Intent id per row
+        intents (List[str]): Intent name per id
+        centroids (np.ndarray): IVF centroids, or None for an exhaustive index
+        list_offsets (np.ndarray): Start row of each IVF list, plus the total row count
+        nprobe (int): IVF lists scored per query
+    """
+
+    def __init__(
+        self,
+        embeddings: np.ndarray,
+        labels: np.ndarray,
+        intents: List[str],
+        centroids: Optional[np.ndarray] = None,
+        list_offsets: Optional[np.ndarray] = None,
+        nprobe: int = 8,
+    ):
+        self.embeddings = embeddings
+        self.labels = labels
+        self.intents = list(intents)
+        self._intent_ids = {intent: i for i, intent in enumerate(self.intents)}
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.nprobe = nprobe
+        self.dim = embeddings.shape[1]
+        # Rows added since load: (embeddings, labels), replaced as a whole on add()
+        self._added = (np.zeros((0, self.dim), dtype=np.float32), np.zeros(0, dtype=np.int32))
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(
+        cls,
+        embeddings: np.ndarray,
+        intents: Sequence[str],
+        ivf_lists: int = 0,
+        nprobe: int = 8,
+    ) -> "IntentIndex":
+        """
+        Build an index from embeddings and their intent names.
+
+        Args:
+            embeddings (np.ndarray): One embedding per training sentence
+            intents (Sequence[str]): Intent of each sentence
+            ivf_lists (int): Number of IVF clusters; 0 builds an exhaustive index
+            nprobe (int): IVF lists scored per query
+
+        Returns:
+            IntentIndex: In-memory index; call save() to write it out
+        """
+        embeddings = l2_normalize(np.asarray(embeddings, dtype=np.float32)).astype(np.float32)
+        names = sorted(set(intents))
+        ids = {name: i for i, name in enumerate(names)}
+        labels = np.array([ids[intent] for intent in intents], dtype=np.int32)
+
+        if not ivf_lists:
+            return cls(np.ascontiguousarray(embeddings), labels, names, nprobe=nprobe)
+
+        centroids = spherical_kmeans(embeddings, ivf_lists)
+        embeddings, labels, offsets = cls._sort_by_list(embeddings, labels, centroids)
+        return cls(embeddings, labels, names, centroids, offsets, nprobe)
+
+    @staticmethod
+    def _sort_by_list(embeddings: np.ndarray, labels: np.ndarray, centroids: np.ndarray):
+        assignments = assign(embeddings, centroids)
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=len(centroids))
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return np.ascontiguousarray(embeddings[order]), labels[order], offsets
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True, nprobe: Optional[int] = None) -> "IntentIndex":
+        """
+        Open an index directory written by save().
+
+        Args:
+            path (str): Index directory
+            mmap (bool): Memory-map the matrices instead of reading them into memory
+            nprobe (int): Override the stored IVF nprobe
+
+        Returns:
+            IntentIndex: The loaded index
+        """
+        with open(os.path.join(path, INDEX_FILE)) as f:
+            meta = json.load(f)
+        if meta.get("format_version") != INDEX_FORMAT_VERSION:
+            raise ValueError(f"Unsupported intent index format: {meta.get('format_version')}")
+
+        mode = "r" if mmap else None
+        embeddings = np.load(os.path.join(path, "embeddings.npy"), mmap_mode=mode)
+        labels = np.load(os.path.join(path, "labels.npy"), mmap_mode=mode)
+        centroids = list_offsets = None
+        if meta.get("ivf_lists"):
+            centroids = np.load(os.path.join(path, "centroids.npy"))
+            list_offsets = np.load(os.path.join(path, "list_offsets.npy"))
+        return cls(
+            embeddings, labels, meta["intents"], centroids, list_offsets,
+            nprobe if nprobe is not None else meta.get("nprobe", 8)
+        )
+
+    def save(self, path: str):
+        """
+        Write the index, including rows added since load, to a directory.
+
+        Added rows are merged into the stored matrix; an IVF index assigns
+        them to the existing centroids without re-clustering.
+        """
+        added_embeddings, added_labels = self._added
+        embeddings = np.concatenate([np.asarray(self.embeddings), added_embeddings]).astype(np.float32)
+        labels = np.concatenate([np.asarray(self.labels), added_labels]).astype(np.int32)
+        offsets = None
+        if self.centroids is not None:
+            embeddings, labels, offsets = self._sort_by_list(embeddings, labels, self.centroids)
+
+        os.makedirs(path, exist_ok=True)
+        arrays = {"embeddings.npy": embeddings, "labels.npy": labels}
+        if offsets is not None:
+            arrays.update({"centroids.npy": self.centroids, "list_offsets.npy": offsets})
+        # Write everything under temporary names first so readers never see a mix
+        for name, array in arrays.items():
+            with open(os.path.join(path, name + ".tmp"), "wb") as f:
+                np.save(f, array)
+        meta = {
+            "format_version": INDEX_FORMAT_VERSION,
+            "dim": self.dim,
+            "count": len(labels),
+            "intents": self.intents,
+            "ivf_lists": 0 if self.centroids is None else len(self.centroids),
+            "nprobe": self.nprobe,
+        }
+        with open(os.path.join(path, INDEX_FILE + ".tmp"), "w") as f:
+            json.dump(meta, f, indent=2)
+        for name in list(arrays) + [INDEX_FILE]:
+            os.replace(os.path.join(path, name + ".tmp"), os.path.join(path, name))
+
+    def __len__(self) -> int:
+        return len(self.labels) + len(self._added[1])
+
+    def add(self, embeddings: np.ndarray, intents: Sequence[str]):
+        """
+        Add labelled embeddings without rebuilding the index.
+
+        Args:
+            embeddings (np.ndarray): One embedding per sentence
+            intents (Sequence[str]): Intent of each sentence; new intents are allowed
+        """
+        embeddings = l2_normalize(np.asarray(embeddings, dtype=np.float32)).astype(np.float32)
+        with self._lock:
+            for intent in intents:
+                if intent not in self._intent_ids:
+                    self._intent_ids[intent] = len(self.intents)
+                    self.intents.append(intent)
+            labels = np.array([self._intent_ids[intent] for intent in intents], dtype=np.int32)
+            added_embeddings, added_labels = self._added
+            self._added = (
+                np.concatenate([added_embeddings, embeddings]),
+                np.concatenate([added_labels, labels]),
+            )
+
+    def _candidates(self, query: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if self.centroids is None:
+            return self.embeddings, self.labels
+        nprobe = min(self.nprobe, len(self.centroids))
+        lists = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        slices = [slice(self.list_offsets[i], self.list_offsets[i + 1]) for i in lists]
+        return (
+            np.concatenate([self.embeddings[s] for s in slices]),
+            np.concatenate([self.labels[s] for s in slices]),
+        )
+
+    def search(self, queries: np.ndarray) -> Tuple[np.ndarray, List[Optional[str]]]:
+        """
+        Find the most similar stored sentence for each query.
+
+        Args:
+            queries (np.ndarray): Query embedding matrix
+
+        Returns:
+            Tuple[np.ndarray, List[str]]: Best cosine similarity per query
+            (-1 if the index is empty) and the intent of that neighbour (None if empty)
+        """
+        queries = l2_normalize(np.asarray(queries, dtype=np.float32))
+        similarities = np.full(len(queries), -1.0, dtype=np.float32)
+        labels = np.full(len(queries), -1, dtype=np.int64)
+
+        def keep_best(rows, scores, row_labels):
+            if not scores.shape[1]:
+                return
+            best = np.argmax(scores, axis=1)
+            best_scores = scores[np.arange(len(best)), best]
+            better = best_scores > similarities[rows]
+            similarities[rows[better]] = best_scores[better]
+            labels[rows[better]] = row_labels[best[better]]
+
+        if self.centroids is None:
+            keep_best(np.arange(len(queries)), queries @ self.embeddings.T, self.labels)
+        else:
+            for row, query in enumerate(queries):
+                embeddings, row_labels = self._candidates(query)
+                keep_best(np.array([row]), (embeddings @ query)[None, :], row_labels)
+
+        added_embeddings, added_labels = self._added
+        keep_best(np.arange(len(queries)), queries @ added_embeddings.T, added_labels)
+
+        intents = [self.intents[label] if label >= 0 else None for label in labels]
+        return similarities, intents
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "rows": len(self),
+            "added_rows": len(self._added[1]),
+            "dim": self.dim,
+            "intents": len(self.intents),
+            "ivf_lists": 0 if self.centroids is None else len(self.centroids),
+        }
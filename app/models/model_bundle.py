@@ -0,0 +1,142 @@
+"""
+Versioned classifier bundles that can be swapped in while serving.
+
+A bundles directory (NLU_MODEL_BUNDLES_DIR) holds one subdirectory per
+version, written by tools/publish_model.py:
+
+- <version>/classifier/: Keras SavedModel ("compiled" and "keras" modes)
+- <version>/label_encoder.pkl: the matching label encoder
+- <version>/intent_classifier.npz: exported classifier ("numpy" mode)
+- <version>/bundle.json: written last, so a bundle without it is incomplete
+- CURRENT: optional; names the version to serve
+
+Without CURRENT the highest-sorting complete version is served, so dated or
+zero-padded version names roll forward as new bundles are published. The
+sentence encoder and the intent index are not part of a bundle: every
+version must take the embeddings of the configured encoder, and an index
+built for an older label set should be rebuilt alongside it.
+"""
+
+import json
+import os
+import pickle
+import time
+from typing import Dict, List, Optional
+
+BUNDLE_FILE = "bundle.json"
+CURRENT_FILE = "CURRENT"
+CLASSIFIER_DIR = "classifier"
+LABEL_ENCODER_FILE = "label_encoder.pkl"
+NUMPY_CLASSIFIER_FILE = "intent_classifier.npz"
+
+# Version reported when the classifier comes from NLU_MODEL_PATH rather than a bundle
+DEFAULT_VERSION = "default"
+
+
+def bundle_path(bundles_dir: str, version: str) -> str:
+    """Return a version's directory, rejecting names that would leave bundles_dir."""
+    if not version or version in (".", "..") or os.sep in version or (os.altsep and os.altsep in version):
+        raise ValueError(f"Invalid model version: {version!r}")
+    return os.path.join(bundles_dir, version)
+
+
+def list_versions(bundles_dir: str) -> List[str]:
+    """Return the complete bundle versions in bundles_dir, sorted."""
+    if not os.path.isdir(bundles_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(bundles_dir)
+        if os.path.isfile(os.path.join(bundles_dir, name, BUNDLE_FILE))
+    )
+
+
+def current_version(bundles_dir: str) -> Optional[str]:
+    """
+    Return the version that should be served.
+
+    Returns:
+        str: The version named in CURRENT, else the latest complete bundle,
+        or None if there is neither
+    """
+    try:
+        with open(os.path.join(bundles_dir, CURRENT_FILE)) as f:
+            version = f.read().strip()
+        if version:
+            return version
+    except FileNotFoundError:
+        pass
+    versions = list_versions(bundles_dir)
+    return versions[-1] if versions else None
+
+
+def set_current(bundles_dir: str, version: str):
+    """Point CURRENT at a version, atomically so a watcher never reads a partial name."""
+    bundle_path(bundles_dir, version)
+    path = os.path.join(bundles_dir, CURRENT_FILE)
+    with open(path + ".tmp", "w") as f:
+        f.write(version + "\n")
+    os.replace(path + ".tmp", path)
+
+
+def write_manifest(path: str, version: str, metadata: Optional[Dict] = None):
+    """Mark a bundle directory complete; call once every artifact is in place."""
+    manifest = {"version": version, "created_at": time.time()}
+    manifest.update(metadata or {})
+    with open(os.path.join(path, BUNDLE_FILE + ".tmp"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(os.path.join(path, BUNDLE_FILE + ".tmp"), os.path.join(path, BUNDLE_FILE))
+
+
+class ModelBundle:
+    """
+    One classifier version: the model, its label encoder and forward pass.
+
+    NLUModel counts the requests running on each bundle in ``in_flight`` so
+    a swap can wait for the old one to drain before releasing it. A bundle
+    swapped out before it drained is marked ``retired`` and released by the
+    last request still running on it.
+    """
+
+    def __init__(self, version: str, model, label_encoder, forward=None, manifest: Optional[Dict] = None):
+        self.version = version
+        self.model = model
+        self.label_encoder = label_encoder
+        self.forward = forward
+        self.manifest = manifest or {}
+        self.in_flight = 0
+        self.retired = False
+
+    @classmethod
+    def load(cls, bundles_dir: str, version: str, mode: str = "compiled") -> "ModelBundle":
+        """
+        Load a bundle's classifier and label encoder (without the forward pass).
+
+        Args:
+            bundles_dir (str): Directory holding one subdirectory per version
+            version (str): Version to load
+            mode (str): Inference mode; "numpy" loads the exported classifier,
+                which doubles as the label encoder
+
+        Returns:
+            ModelBundle: The loaded bundle
+        """
+        path = bundle_path(bundles_dir, version)
+        manifest_path = os.path.join(path, BUNDLE_FILE)
+        if not os.path.isfile(manifest_path):
+            raise FileNotFoundError(f"Model bundle {version!r} is missing or incomplete (no {BUNDLE_FILE})")
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+        if mode == "numpy":
+            from .numpy_classifier import NumpyClassifier
+            model = label_encoder = NumpyClassifier.from_file(os.path.join(path, NUMPY_CLASSIFIER_FILE))
+        else:
+            import tensorflow as tf
+            model = tf.keras.models.load_model(os.path.join(path, CLASSIFIER_DIR))
+            with open(os.path.join(path, LABEL_ENCODER_FILE), "rb") as f:
+                label_encoder = pickle.load(f)
+        return cls(version, model, label_encoder, manifest=manifest)
+
+    def release(self):
+        """Drop the references to the model so its memory can be reclaimed."""
+        self.model = self.label_encoder = self.forward = None
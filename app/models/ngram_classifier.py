@@ -0,0 +1,245 @@
+"""
+Hashed n-gram intent classifier, the cheap first stage of the cascade.
+
+Many queries ("pharmacy near me", "find a park") are decided by a keyword
+or two, and don't need a sentence-transformer pass. This classifier scores
+a query from hashed word unigrams, word bigrams and byte 3/4-grams with a
+linear softmax model, in tens of microseconds per query on NumPy, against
+milliseconds for the encoder.
+NLUModel answers with it when its confidence reaches the file's threshold
+and sends everything else on to the transformer.
+
+Queries go through the same normalize_query as the transformer path.
+Features are hashed with CRC-32 into ``n_buckets`` rows of the weight
+matrix, so no vocabulary is stored and unseen words cost nothing. The
+logits are divided by a temperature fitted on held-out data, so the
+confidence is calibrated enough to threshold.
+
+tools/train_cascade.py trains the model from the labelled sentences,
+picks the threshold for a target agreement rate with the transformer and
+writes a single .npz file; point NLU_CASCADE_PATH at it to enable it.
+"""
+
+import json
+import re
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .embedding_cache import normalize_query
+
+FORMAT_VERSION = 1
+DEFAULT_BUCKETS = 1 << 18
+
+_TOKEN = re.compile(r"[^\W_]+(?:'[^\W_]+)?")
+
+
+def _softmax(x: np.ndarray) -> np.ndarray:
+    shifted = x - x.max(axis=-1, keepdims=True)
+    np.exp(shifted, out=shifted)
+    return shifted / shifted.sum(axis=-1, keepdims=True)
+
+
+def ngram_features(text: str) -> List[bytes]:
+    """
+    Return the features of a query, before hashing.
+
+    Args:
+        text (str): Query text
+
+    Returns:
+        List[bytes]: Word unigrams and bigrams, and byte 3- and 4-grams of
+        each UTF-8 word padded with "<" and ">", each tagged by its kind
+    """
+    tokens = [token.encode("utf-8") for token in _TOKEN.findall(normalize_query(text))]
+    features = [b"w " + token for token in tokens]
+    features += [b"b " + first + b" " + second for first, second in zip(tokens, tokens[1:])]
+    for token in tokens:
+        padded = b"c <" + token + b">"
+        # The "c " tag stays in front of every slice
+        features += [padded[:2] + padded[i:i + n] for n in (3, 4) for i in range(2, len(padded) - n + 1)]
+    return features
+
+
+class HashedNgramClassifier:
+    """
+    Linear softmax classifier over hashed n-gram features.
+
+    Args:
+        weights (np.ndarray): (n_buckets, n_classes) float32 matrix
+        bias (np.ndarray): (n_classes,) float32 vector
+        classes (Sequence[str]): Intent name per output column
+        temperature (float): Divides the logits; fitted by calibrate()
+        threshold (float): Confidence at which the cascade answers without
+            the transformer; None leaves the choice to the caller
+    """
+
+    def __init__(self, weights: np.ndarray, bias: np.ndarray, classes: Sequence[str],
+                 temperature: float = 1.0, threshold: Optional[float] = None):
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bias = np.asarray(bias, dtype=np.float32)
+        self.classes_ = np.asarray(classes)
+        self.temperature = float(temperature)
+        self.threshold = threshold
+        self.metadata = {}
+
+    @property
+    def n_buckets(self) -> int:
+        return self.weights.shape[0]
+
+    def featurize(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Hash a batch of queries into a sparse row layout.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Bucket ids of every feature, row
+            after row, and the number of features in each row
+        """
+        hashes, counts = [], []
+        for text in texts:
+            features = ngram_features(text)
+            hashes += map(zlib.crc32, features)
+            counts.append(len(features))
+        return np.array(hashes, dtype=np.int64) % self.n_buckets, np.array(counts, dtype=np.int64)
+
+    def _logits(self, indices: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        logits = np.zeros((len(counts), len(self.classes_)), dtype=np.float32)
+        present = counts > 0
+        if present.any():
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[present]
+            # Each row is the sum of its features' weights, scaled to unit L2 norm
+            logits[present] = np.add.reduceat(self.weights[indices], starts, axis=0)
+            logits[present] /= np.sqrt(counts[present])[:, None]
+        return logits + self.bias
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Score a batch of queries.
+
+        Returns:
+            np.ndarray: float32 calibrated class probabilities, one row per query
+        """
+        return _softmax(self._logits(*self.featurize(texts)) / np.float32(self.temperature))
+
+    def predict(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Classify a batch of queries.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Intent names and their confidences
+        """
+        probs = self.predict_proba(texts)
+        indices = np.argmax(probs, axis=1)
+        return self.classes_[indices], probs[np.arange(len(indices)), indices]
+
+    @classmethod
+    def train(cls, texts: Sequence[str], labels: Sequence[str], n_buckets: int = DEFAULT_BUCKETS,
+              epochs: int = 10, batch_size: int = 256, learning_rate: float = 0.5, l2: float = 1e-6,
+              seed: int = 0) -> "HashedNgramClassifier":
+        """
+        Fit the weights by minibatch softmax regression with AdaGrad.
+
+        Args:
+            texts (Sequence[str]): Training sentences
+            labels (Sequence[str]): Intent of each sentence
+            n_buckets (int): Rows of the hashed weight matrix
+            epochs (int): Passes over the data
+            batch_size (int): Sentences per update
+            learning_rate (float): AdaGrad step size
+            l2 (float): Weight decay applied to the rows a batch touches
+            seed (int): Seed for the shuffling
+
+        Returns:
+            HashedNgramClassifier: The trained, uncalibrated classifier
+        """
+        classes, y = np.unique(np.asarray(labels, dtype=str), return_inverse=True)
+        model = cls(np.zeros((n_buckets, len(classes)), dtype=np.float32),
+                    np.zeros(len(classes), dtype=np.float32), classes)
+        indices, counts = model.featurize(texts)
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        weight_sq = np.zeros(n_buckets, dtype=np.float32)
+        bias_sq = np.zeros(len(classes), dtype=np.float32)
+        rng = np.random.default_rng(seed)
+
+        for _ in range(epochs):
+            order = rng.permutation(len(y))
+            for start in range(0, len(order), batch_size):
+                batch = order[start:start + batch_size]
+                batch_counts = counts[batch]
+                batch_indices = np.concatenate(
+                    [indices[offsets[i]:offsets[i + 1]] for i in batch]
+                ) if batch_counts.sum() else np.zeros(0, dtype=np.int64)
+
+                grad = _softmax(model._logits(batch_indices, batch_counts))
+                grad[np.arange(len(batch)), y[batch]] -= 1.0
+                grad /= len(batch)
+
+                rows = np.repeat(np.arange(len(batch)), batch_counts)
+                scale = 1.0 / np.sqrt(np.maximum(batch_counts, 1))
+                touched, inverse = np.unique(batch_indices, return_inverse=True)
+                weight_grad = np.zeros((len(touched), len(classes)), dtype=np.float32)
+                np.add.at(weight_grad, inverse, grad[rows] * scale[rows, None])
+                weight_grad += l2 * model.weights[touched]
+                # One AdaGrad accumulator per bucket keeps the state to a vector
+                weight_sq[touched] += np.mean(weight_grad ** 2, axis=1)
+                model.weights[touched] -= learning_rate * weight_grad / (np.sqrt(weight_sq[touched])[:, None] + 1e-8)
+
+                bias_grad = grad.sum(axis=0)
+                bias_sq += bias_grad ** 2
+                model.bias -= learning_rate * bias_grad / (np.sqrt(bias_sq) + 1e-8)
+        return model
+
+    def calibrate(self, texts: Sequence[str], labels: Sequence[str],
+                  temperatures: Sequence[float] = tuple(np.geomspace(0.05, 10.0, 47))) -> float:
+        """
+        Pick the temperature that minimizes held-out log loss.
+
+        Args:
+            texts (Sequence[str]): Held-out sentences, not used in training
+            labels (Sequence[str]): Their intents
+            temperatures (Sequence[float]): Candidates to try
+
+        Returns:
+            float: The chosen temperature (also stored on the classifier)
+        """
+        index = {name: i for i, name in enumerate(self.classes_.tolist())}
+        known = np.array([label in index for label in labels])
+        y = np.array([index[label] for label in labels if label in index], dtype=np.int64)
+        logits = self._logits(*self.featurize([text for text, ok in zip(texts, known) if ok]))
+
+        def loss(temperature):
+            scaled = logits / np.float32(temperature)
+            scaled -= scaled.max(axis=1, keepdims=True)
+            log_probs = scaled - np.log(np.exp(scaled).sum(axis=1, keepdims=True))
+            return -float(np.mean(log_probs[np.arange(len(y)), y]))
+
+        self.temperature = float(min(temperatures, key=loss))
+        return self.temperature
+
+    def save(self, path: str, metadata: Dict = None):
+        """Write the weights, class names, temperature and threshold to a single .npz file."""
+        header = {
+            "format_version": FORMAT_VERSION,
+            "temperature": self.temperature,
+            "threshold": self.threshold,
+            "metadata": metadata or self.metadata,
+        }
+        np.savez(
+            path,
+            header=np.frombuffer(json.dumps(header).encode("utf-8"), dtype=np.uint8),
+            classes=np.asarray([str(c) for c in self.classes_]),
+            weights=self.weights,
+            bias=self.bias,
+        )
+
+    @classmethod
+    def from_file(cls, path: str) -> "HashedNgramClassifier":
+        with np.load(path, allow_pickle=False) as data:
+            header = json.loads(data["header"].tobytes().decode("utf-8"))
+            if header.get("format_version") != FORMAT_VERSION:
+                raise ValueError(f"Unsupported cascade format: {header.get('format_version')}")
+            classifier = cls(data["weights"], data["bias"], data["classes"],
+                             temperature=header["temperature"], threshold=header.get("threshold"))
+        classifier.metadata = header.get("metadata", {})
+        return classifier
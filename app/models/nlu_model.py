@@ -1,37 +1,168 @@
-import tensorflow as tf
+import contextlib
+import gc
 import json
 import os
 import numpy as np
-from typing import Dict
+from typing import Dict, List, Optional, Sequence
 import pickle
-from sentence_transformers import SentenceTransformer
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 
 try:
-    from app.config import MODEL_PATH
+    from app.config import (
+        MODEL_PATH, LABEL_ENCODER_PATH, ENCODER_PATH, ENCODER_BACKEND, ONNX_ENCODER_PATH,
+        ENTITY_LEXICON_PATH, MODEL_OFFLINE, WARMUP_ENABLED,
+        INTENT_INDEX_PATH, INTENT_INDEX_THRESHOLD, INTENT_INDEX_NPROBE, INTENT_INDEX_AUDIT_RATE,
+        CASCADE_PATH, CASCADE_THRESHOLD,
+        BATCHING_ENABLED, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS,
+        BATCH_MAX_QUEUE, BATCH_ENQUEUE_TIMEOUT, INFERENCE_MODE, NUMPY_CLASSIFIER_PATH,
+        EMBEDDING_CACHE_MAX_BYTES, EMBEDDING_CACHE_TTL, EMBEDDING_CACHE_PATH,
+        MODEL_BUNDLES_DIR, MODEL_WATCH_INTERVAL, MODEL_DRAIN_TIMEOUT
+    )
+    from app.models.batching import MicroBatcher
+    from app.models.embedding_cache import EmbeddingCache, normalize_query
+    from app.models.encoders import load_encoder
+    from app.models.entity_extractor import EntitySpan, get_extractor
+    from app.models.intent_index import IntentIndex
+    from app.models.model_bundle import DEFAULT_VERSION, ModelBundle, current_version
+    from app.models.ngram_classifier import HashedNgramClassifier
+    from app.models.numpy_classifier import NumpyClassifier
+    from app.metrics import record_batch_size, timed
 except ImportError:
     # Fallback for direct script execution
     import sys
     sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-    from app.config import MODEL_PATH
+    from app.config import (
+        MODEL_PATH, LABEL_ENCODER_PATH, ENCODER_PATH, ENCODER_BACKEND, ONNX_ENCODER_PATH,
+        ENTITY_LEXICON_PATH, MODEL_OFFLINE, WARMUP_ENABLED,
+        INTENT_INDEX_PATH, INTENT_INDEX_THRESHOLD, INTENT_INDEX_NPROBE, INTENT_INDEX_AUDIT_RATE,
+        CASCADE_PATH, CASCADE_THRESHOLD,
+        BATCHING_ENABLED, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS,
+        BATCH_MAX_QUEUE, BATCH_ENQUEUE_TIMEOUT, INFERENCE_MODE, NUMPY_CLASSIFIER_PATH,
+        EMBEDDING_CACHE_MAX_BYTES, EMBEDDING_CACHE_TTL, EMBEDDING_CACHE_PATH,
+        MODEL_BUNDLES_DIR, MODEL_WATCH_INTERVAL, MODEL_DRAIN_TIMEOUT
+    )
+    from app.models.batching import MicroBatcher
+    from app.models.embedding_cache import EmbeddingCache, normalize_query
+    from app.models.encoders import load_encoder
+    from app.models.entity_extractor import EntitySpan, get_extractor
+    from app.models.intent_index import IntentIndex
+    from app.models.model_bundle import DEFAULT_VERSION, ModelBundle, current_version
+    from app.models.ngram_classifier import HashedNgramClassifier
+    from app.models.numpy_classifier import NumpyClassifier
+    from app.metrics import record_batch_size, timed
 
 INTENT_CONFIDENCE_THRESHOLD = 0.70
 
+# Representative queries run once after loading so the first real request
+# doesn't pay for graph tracing and lazy kernel initialization
+WARMUP_QUERIES = [
+    "I want mexican food near me",
+    "Where can I find a pharmacy?",
+    "Show me nearby parks",
+    "Find me the closest gas station that's open now",
+]
+
+class ModelNotReadyError(ValueError):
+    """Raised when a prediction is requested before the model has finished loading."""
+
 class NLUModel:
-    def __init__(self):
-        self.model = None
+    def __init__(self, lazy: bool = False):
+        """
+        Args:
+            lazy (bool): Skip loading in the constructor; call start_loading()
+                to load in the background instead
+        """
         self.encoder = None
-        self.label_encoder = None
-        self.load_model()
+        # Classifier, label encoder and forward pass, replaced as a unit by reload()
+        self.bundle = None
+        self._bundle_lock = threading.Condition()
+        self._reload_lock = threading.Lock()
+        self.swap_count = 0
+        self.reload_error = None
+        self._watcher = None
+        self._stop_watching = threading.Event()
+        self.batcher = None
+        self.embedding_cache = None
+        self.intent_index = None
+        self._index_counts = {"lookups": 0, "fast_path": 0, "audited": 0, "agreed": 0}
+        self.cascade = None
+        self._cascade_counts = {"answered": 0, "escalated": 0}
+        self._index_lock = threading.Lock()
+        self._audit_rng = np.random.default_rng()
+        self.loading_state = "not_loaded"
+        self.loading_error = None
+        self.load_seconds = None
+        self._loading_lock = threading.Lock()
+        self._ready = threading.Event()
+        if not lazy:
+            self.load_model()
+        if EMBEDDING_CACHE_MAX_BYTES > 0:
+            self.embedding_cache = EmbeddingCache(EMBEDDING_CACHE_MAX_BYTES, ttl=EMBEDDING_CACHE_TTL)
+            self.load_embedding_cache()
+        if BATCHING_ENABLED:
+            self.batcher = MicroBatcher(
+                # predict() already ran the cascade on queued queries
+                lambda items: self.predict_batch(
+                    [text for text, _ in items], [location for _, location in items], cascade=False
+                ),
+                max_batch_size=BATCH_MAX_SIZE,
+                max_wait_ms=BATCH_MAX_WAIT_MS,
+                max_queue_size=BATCH_MAX_QUEUE,
+                enqueue_timeout=BATCH_ENQUEUE_TIMEOUT
+            )
+
+    @property
+    def model(self):
+        return self.bundle.model if self.bundle is not None else None
+
+    @property
+    def label_encoder(self):
+        return self.bundle.label_encoder if self.bundle is not None else None
+
+    @property
+    def forward(self):
+        return self.bundle.forward if self.bundle is not None else None
+
+    @property
+    def model_version(self) -> Optional[str]:
+        return self.bundle.version if self.bundle is not None else None
+
+    @contextlib.contextmanager
+    def _using_bundle(self):
+        """
+        Pin the current bundle for one prediction.
+
+        A reload during the prediction swaps in the new bundle for later
+        requests; this one finishes on the bundle it started with, and
+        releases it if it is the last request on a bundle the reload
+        stopped waiting for.
+        """
+        with self._bundle_lock:
+            bundle = self.bundle
+            bundle.in_flight += 1
+        try:
+            yield bundle
+        finally:
+            with self._bundle_lock:
+                bundle.in_flight -= 1
+                retired = bundle.in_flight == 0 and bundle.retired
+                if retired:
+                    bundle.release()
+                if bundle.in_flight == 0:
+                    self._bundle_lock.notify_all()
+            if retired:
+                gc.collect()
 
     @staticmethod
     def extract_entities(text: str) -> Dict[str, str]:
-        # Simple example using regex. You can customize this logic.
-        entities = {}
-        if "near" in text or "nearby" in text:
-            entities["location_hint"] = "nearby"
-        if any(word in text for word in ["open", "now", "today"]):
-            entities["time_hint"] = "open_now"
-        return entities
+        # Whole-word gazetteer matching against the configured lexicon
+        return get_extractor(ENTITY_LEXICON_PATH).extract(text)
+
+    @staticmethod
+    def extract_entity_spans(text: str) -> List[EntitySpan]:
+        return get_extractor(ENTITY_LEXICON_PATH).extract_spans(text)
 
     @staticmethod
     def apply_confidence_fallback(intent, confidence):
@@ -44,55 +175,673 @@ class NLUModel:
                 return "store"
         return intent
 
+    @classmethod
+    def keyword_prediction(cls, text: str) -> Dict:
+        """
+        Predict from the entity gazetteer alone, without running the model.
+
+        Used when the server sheds load. The intent is the first "category"
+        entity (a cuisine implies "restaurant"), with zero confidence.
+        """
+        entities = cls.extract_entities(text)
+        intent = entities.get("category") or ("restaurant" if "cuisine" in entities else "unknown")
+        return {
+            "intent": cls.apply_confidence_fallback(intent, 0.0),
+            "entities": entities,
+            "confidence": 0.0,
+            "degraded": "keyword",
+        }
+
+    def predict_cached(self, text: str, location: Optional[str] = None) -> Optional[Dict]:
+        """
+        Predict only if the text's embedding is already cached.
+
+        Skips the encoder, the expensive part of a prediction, and runs just
+        the classifier on the cached embedding.
+
+        Returns:
+            dict: Prediction flagged ``"degraded": "cached"``, or None if the
+            model isn't ready or the embedding isn't cached
+        """
+        if not self.is_ready or self.embedding_cache is None:
+            return None
+        embedding = self.embedding_cache.get(normalize_query(text, location))
+        if embedding is None:
+            return None
+        with self._using_bundle() as bundle:
+            pred_probs = bundle.forward(embedding[None, :])[0]
+            index = int(np.argmax(pred_probs))
+            confidence = float(pred_probs[index])
+            intent = bundle.label_encoder.inverse_transform([index])[0]
+        return {
+            "intent": self.apply_confidence_fallback(intent, confidence),
+            "entities": self.extract_entities(text),
+            "confidence": confidence,
+            "degraded": "cached",
+            "model_version": bundle.version,
+        }
+
+    @staticmethod
+    def _load_encoder():
+        return load_encoder(ENCODER_BACKEND, ENCODER_PATH, ONNX_ENCODER_PATH, offline=MODEL_OFFLINE)
+
+    @staticmethod
+    def _load_classifier():
+        import tensorflow as tf
+        return tf.keras.models.load_model(MODEL_PATH)
+
+    @staticmethod
+    def _load_numpy_classifier():
+        return NumpyClassifier.from_file(NUMPY_CLASSIFIER_PATH)
+
+    @staticmethod
+    def _load_label_encoder():
+        with open(LABEL_ENCODER_PATH, "rb") as f:
+            return pickle.load(f)
+
+    @staticmethod
+    def _load_intent_index():
+        if not INTENT_INDEX_PATH:
+            return None
+        try:
+            return IntentIndex.load(INTENT_INDEX_PATH, mmap=True, nprobe=INTENT_INDEX_NPROBE)
+        except Exception as e:
+            # The index is only a fast path; the classifier still answers everything
+            print(f"Error loading intent index: {e}")
+            return None
+
+    @staticmethod
+    def _load_bundle(version: Optional[str] = None) -> ModelBundle:
+        version = version or current_version(MODEL_BUNDLES_DIR)
+        if version is None:
+            raise FileNotFoundError(f"No complete model bundle in {MODEL_BUNDLES_DIR}")
+        return ModelBundle.load(MODEL_BUNDLES_DIR, version, INFERENCE_MODE)
+
+    @staticmethod
+    def _load_cascade():
+        if not CASCADE_PATH:
+            return None
+        try:
+            return HashedNgramClassifier.from_file(CASCADE_PATH)
+        except Exception as e:
+            # Without the first stage every query goes to the transformer
+            print(f"Error loading cascade classifier: {e}")
+            return None
+
+    @staticmethod
+    def _cascade_for(cascade: Optional[HashedNgramClassifier], bundle: ModelBundle):
+        """Return the cascade if it predicts the same intents as the bundle, else None."""
+        if cascade is None:
+            return None
+        expected = {str(c) for c in bundle.label_encoder.classes_}
+        if {str(c) for c in cascade.classes_} != expected:
+            print(
+                f"Cascade intents do not match model bundle {bundle.version}; "
+                f"disabling the n-gram first stage"
+            )
+            return None
+        return cascade
+
     def load_model(self):
-        """Load the TensorFlow model and sentence transformer encoder."""
+        """
+        Load the sentence transformer encoder, TensorFlow classifier, label
+        encoder and, if configured, the nearest-neighbour intent index.
+
+        The artifacts are independent, so they are loaded in parallel. In
+        "numpy" inference mode the exported classifier file replaces both the
+        Keras model and the label encoder, and TensorFlow is never imported.
+        With NLU_MODEL_BUNDLES_DIR set, the classifier and label encoder come
+        from the current model bundle instead (see reload()).
+        """
+        self.loading_state = "loading"
+        started = time.perf_counter()
         try:
-            # Load the transformer encoder
-            self.encoder = SentenceTransformer('all-MiniLM-L6-v2')
-            
-            # Load the classifier model
-            self.model = tf.keras.models.load_model(MODEL_PATH)
-            print("Model loaded successfully")
-            
-            # Load the label encoder
-            with open("models/transformer_label_encoder.pkl", "rb") as f:
-                self.label_encoder = pickle.load(f)
-                
+            with ThreadPoolExecutor(max_workers=5, thread_name_prefix="nlu-load") as pool:
+                encoder = pool.submit(self._load_encoder)
+                if MODEL_BUNDLES_DIR:
+                    bundle = pool.submit(self._load_bundle)
+                elif INFERENCE_MODE == "numpy":
+                    model = label_encoder = pool.submit(self._load_numpy_classifier)
+                else:
+                    model = pool.submit(self._load_classifier)
+                    label_encoder = pool.submit(self._load_label_encoder)
+                intent_index = pool.submit(self._load_intent_index)
+                cascade = pool.submit(self._load_cascade)
+
+                self.encoder = encoder.result()
+                if MODEL_BUNDLES_DIR:
+                    bundle = bundle.result()
+                else:
+                    bundle = ModelBundle(DEFAULT_VERSION, model.result(), label_encoder.result())
+                self.intent_index = intent_index.result()
+                self.cascade = cascade.result()
+
+            embedding_dim = self.encoder.get_sentence_embedding_dimension()
+            if self.intent_index is not None and self.intent_index.dim != embedding_dim:
+                print(
+                    f"Intent index dimension {self.intent_index.dim} does not match the "
+                    f"encoder ({embedding_dim}); disabling the nearest-neighbour fast path"
+                )
+                self.intent_index = None
+            self.cascade = self._cascade_for(self.cascade, bundle)
+
+            bundle.forward = self.build_forward_fn(bundle.model, embedding_dim, INFERENCE_MODE)
+            self.bundle = bundle
+            print(f"Model loaded successfully (version {bundle.version})")
+
+            if WARMUP_ENABLED:
+                self.warm_up()
+
         except Exception as e:
+            self.loading_state = "failed"
+            self.loading_error = str(e)
             print(f"Error loading model: {e}")
             raise
 
-    def predict(self, text: str):
+        self.load_seconds = time.perf_counter() - started
+        self.loading_state = "ready"
+        self._ready.set()
+
+    def start_loading(self) -> threading.Thread:
+        """
+        Load the model in a background thread.
+
+        Safe to call more than once: only the first call starts loading.
+
+        Returns:
+            threading.Thread: The loader thread, or None if loading already started
+        """
+        with self._loading_lock:
+            if self.loading_state != "not_loaded":
+                return None
+            self.loading_state = "loading"
+
+        def load():
+            try:
+                self.load_model()
+            except Exception:
+                pass  # Recorded in loading_state / loading_error
+
+        thread = threading.Thread(target=load, name="nlu-model-loader", daemon=True)
+        thread.start()
+        return thread
+
+    @property
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def readiness(self) -> Dict:
+        """Report the loading state and the model version for readiness probes."""
+        status = {"status": self.loading_state}
+        if self.model_version is not None:
+            status["model_version"] = self.model_version
+        if self.load_seconds is not None:
+            status["load_seconds"] = round(self.load_seconds, 3)
+        if self.loading_error:
+            status["error"] = self.loading_error
+        if self.reload_error:
+            status["reload_error"] = self.reload_error
+        return status
+
+    def warm_up(self, texts: Sequence[str] = WARMUP_QUERIES, bundle: Optional[ModelBundle] = None):
+        """
+        Run one inference pass outside the cache to initialize the encoder and classifier.
+
+        Args:
+            texts (Sequence[str]): Sample queries
+            bundle (ModelBundle): Bundle to warm up; the current one if omitted.
+                Its output must have one column per label encoder class.
+        """
+        bundle = bundle or self.bundle
+        probs = bundle.forward(np.asarray(self.encoder.encode(list(texts)), dtype=np.float32))
+        classes = len(bundle.label_encoder.classes_)
+        if np.shape(probs) != (len(texts), classes):
+            raise ValueError(
+                f"Model {bundle.version} returned shape {np.shape(probs)} for {len(texts)} queries "
+                f"and {classes} classes"
+            )
+
+    def reload(self, version: Optional[str] = None, drain_timeout: float = MODEL_DRAIN_TIMEOUT) -> Dict:
+        """
+        Load a model bundle, warm it up and swap it in without a restart.
+
+        The new bundle is loaded and warmed on the calling thread while
+        requests keep running on the current one. Requests already in
+        flight finish on the old bundle; it is released as soon as the last
+        of them returns. If they take longer than drain_timeout seconds the
+        swap returns without waiting, and the last of them releases it.
+
+        Args:
+            version (str): Bundle to load; defaults to CURRENT or the latest bundle
+            drain_timeout (float): Seconds to wait for the old bundle to drain
+
+        Returns:
+            dict: "version", "previous", "swapped" (False if the version was
+            already active), and "load_seconds" and "drained" after a swap
+        """
+        if not MODEL_BUNDLES_DIR:
+            raise ValueError("NLU_MODEL_BUNDLES_DIR is not set")
+        if not self.is_ready:
+            raise ModelNotReadyError(f"Model not ready (state: {self.loading_state})")
+
+        with self._reload_lock:
+            version = version or current_version(MODEL_BUNDLES_DIR)
+            previous = self.model_version
+            if version is None or version == previous:
+                return {"version": previous, "previous": previous, "swapped": False}
+
+            started = time.perf_counter()
+            try:
+                bundle = self._load_bundle(version)
+                bundle.forward = self.build_forward_fn(
+                    bundle.model, self.encoder.get_sentence_embedding_dimension(), INFERENCE_MODE
+                )
+                self.warm_up(bundle=bundle)
+            except Exception as e:
+                self.reload_error = f"{version}: {e}"
+                print(f"Error reloading model: {e}")
+                raise
+            load_seconds = time.perf_counter() - started
+            self.reload_error = None
+            # A cascade disabled for an earlier bundle may match this one
+            cascade = self._cascade_for(self.cascade or self._load_cascade(), bundle)
+
+            with self._bundle_lock:
+                old, self.bundle = self.bundle, bundle
+                self.cascade = cascade
+                self.swap_count += 1
+                drained = self._bundle_lock.wait_for(lambda: old.in_flight == 0, timeout=drain_timeout)
+                if drained:
+                    old.release()
+                else:
+                    # Still in use: _using_bundle releases it when the last request returns
+                    old.retired = True
+            del old
+            # Keras models hold reference cycles, so collect now rather than whenever gc next runs
+            gc.collect()
+            print(f"Swapped model {previous} -> {version} in {load_seconds:.2f}s")
+            return {
+                "version": version,
+                "previous": previous,
+                "swapped": True,
+                "load_seconds": round(load_seconds, 3),
+                "drained": drained,
+            }
+
+    def start_watching(self, interval: float = MODEL_WATCH_INTERVAL) -> Optional[threading.Thread]:
+        """
+        Poll the bundles directory and reload when the current version changes.
+
+        A version that fails to load is not retried until CURRENT (or the
+        latest bundle) changes again.
+
+        Returns:
+            threading.Thread: The watcher thread, or None if there are no
+            bundles to watch, the interval is 0 or it is already running
+        """
+        if not MODEL_BUNDLES_DIR or interval <= 0 or self._watcher is not None:
+            return None
+        self._stop_watching.clear()
+
+        def watch():
+            failed = None
+            while not self._stop_watching.wait(interval):
+                if not self.is_ready:
+                    continue
+                version = None
+                try:
+                    version = current_version(MODEL_BUNDLES_DIR)
+                    if version in (None, self.model_version, failed):
+                        continue
+                    self.reload(version)
+                except Exception as e:
+                    failed = version
+                    print(f"Error watching model bundles: {e}")
+
+        self._watcher = threading.Thread(target=watch, name="nlu-model-watcher", daemon=True)
+        self._watcher.start()
+        return self._watcher
+
+    def stop_watching(self):
+        """Stop the bundle watcher, if it is running."""
+        if self._watcher is not None:
+            self._stop_watching.set()
+            self._watcher.join()
+            self._watcher = None
+
+    @staticmethod
+    def build_forward_fn(model, embedding_dim: int, mode: str = "compiled"):
+        """
+        Build the classifier forward pass used on the request path.
+
+        In "compiled" mode the Keras model is wrapped once in a traced
+        tf.function with a fixed input signature, so each call is a single
+        graph execution instead of going through Model.predict's data
+        adapter and step loop. "keras" mode keeps Model.predict.
+
+        Args:
+            model: Loaded Keras classifier
+            embedding_dim (int): Size of the sentence embeddings
+            mode (str): "compiled", "keras" or "numpy" (model is a NumpyClassifier)
+
+        Returns:
+            callable: Maps a float32 embedding matrix to class probabilities
+        """
+        if mode == "numpy":
+            if model.input_dim is not None and model.input_dim != embedding_dim:
+                raise ValueError(
+                    f"Exported classifier expects {model.input_dim}-dim embeddings, encoder produces {embedding_dim}"
+                )
+            return model.predict_proba
+        if mode == "keras":
+            return lambda embeddings: np.asarray(model.predict(embeddings))
+        if mode != "compiled":
+            raise ValueError(f"Unknown inference mode: {mode}")
+
+        import tensorflow as tf
+
+        compiled = tf.function(
+            lambda embeddings: model(embeddings, training=False),
+            input_signature=[tf.TensorSpec(shape=[None, embedding_dim], dtype=tf.float32)]
+        )
+        # Trace once at startup so the first request doesn't pay for it
+        compiled(tf.zeros([1, embedding_dim], dtype=tf.float32))
+
+        def forward(embeddings):
+            return compiled(tf.convert_to_tensor(embeddings, dtype=tf.float32)).numpy()
+        return forward
+
+    def load_embedding_cache(self, path: Optional[str] = EMBEDDING_CACHE_PATH) -> int:
+        """Warm the embedding cache from disk, if a cache file exists."""
+        if self.embedding_cache is None or not path or not os.path.exists(path):
+            return 0
+        try:
+            loaded = self.embedding_cache.load(path)
+            print(f"Loaded {loaded} cached embeddings from {path}")
+            return loaded
+        except Exception as e:
+            print(f"Error loading embedding cache: {e}")
+            return 0
+
+    def save_embedding_cache(self, path: Optional[str] = EMBEDDING_CACHE_PATH):
+        """Persist the embedding cache to disk, if persistence is configured."""
+        if self.embedding_cache is None or not path:
+            return
+        try:
+            self.embedding_cache.save(path)
+        except Exception as e:
+            print(f"Error saving embedding cache: {e}")
+
+    def embed(self, texts: Sequence[str], locations: Optional[Sequence[Optional[str]]] = None) -> np.ndarray:
+        """
+        Encode texts into an embedding matrix, serving repeats from the cache.
+
+        Texts are normalized first (see normalize_query); only distinct
+        cache misses are sent to the encoder, in a single encode call.
+
+        Args:
+            texts (Sequence[str]): Input texts
+            locations (Sequence[str]): Per-text location, if any (see normalize_query)
+
+        Returns:
+            np.ndarray: float32 matrix with one row per input text
+        """
+        if locations is None:
+            locations = [None] * len(texts)
+        keys = [normalize_query(text, location) for text, location in zip(texts, locations)]
+
+        if self.embedding_cache is None:
+            return np.asarray(self.encoder.encode(keys), dtype=np.float32)
+
+        cached = self.embedding_cache.get_many(keys)
+        missing = list(dict.fromkeys(key for key, vector in zip(keys, cached) if vector is None))
+        if missing:
+            encoded = np.asarray(self.encoder.encode(missing), dtype=np.float32)
+            self.embedding_cache.put_many(missing, encoded)
+            fresh = dict(zip(missing, encoded))
+            cached = [fresh[key] if vector is None else vector for key, vector in zip(keys, cached)]
+        return np.stack(cached)
+
+    def embedding_cache_stats(self):
+        """Return embedding cache hit/miss counters, or None if the cache is disabled."""
+        if self.embedding_cache is None:
+            return None
+        return self.embedding_cache.stats()
+
+    def intent_index_stats(self):
+        """
+        Return how often the nearest-neighbour fast path answered and how often
+        audited answers agreed with the classifier, or None if there is no index.
+        """
+        if self.intent_index is None:
+            return None
+        with self._index_lock:
+            counts = dict(self._index_counts)
+        counts.update(self.intent_index.stats())
+        counts["fast_path_rate"] = counts["fast_path"] / counts["lookups"] if counts["lookups"] else 0.0
+        counts["agreement_rate"] = counts["agreed"] / counts["audited"] if counts["audited"] else None
+        return counts
+
+    def add_to_intent_index(self, texts: Sequence[str], intents: Sequence[str]):
+        """
+        Add labelled sentences to the loaded intent index.
+
+        The additions are kept in memory; persist them with
+        ``self.intent_index.save(path)``.
+
+        Args:
+            texts (Sequence[str]): Sentences to add
+            intents (Sequence[str]): Intent of each sentence
+        """
+        if self.intent_index is None:
+            raise ValueError("No intent index is loaded (set NLU_INTENT_INDEX_PATH)")
+        self.intent_index.add(self.embed(texts), intents)
+
+    def predict(self, text: str, location: Optional[str] = None):
         """
         Make a prediction using the loaded model.
+
+        When micro-batching is enabled the text is queued and classified
+        together with other concurrent requests.
         
         Args:
             text (str): Input text to process
+            location (str): Location given with the text, if any (see normalize_query)
             
         Returns:
             dict: Prediction results including intent and entities
         """
-        if not self.model or not self.encoder:
-            raise ValueError("Model or encoder not loaded")
-        
-        # Encode the input text using the transformer
-        text_embedding = self.encoder.encode([text])
-        
-        # Predict intent
-        pred_probs = self.model.predict(text_embedding)
-        intent_index = np.argmax(pred_probs[0])
-        confidence = float(pred_probs[0][intent_index])
-        intent = self.label_encoder.inverse_transform([intent_index])[0]
-        intent = self.apply_confidence_fallback(intent, confidence)
-
-        # Extract entities
-        entities = self.extract_entities(text)
-            
-        return {
-            "intent": intent,
-            "entities": entities,
-            "confidence": confidence
-        }
+        if not self.is_ready:
+            raise ModelNotReadyError(f"Model not ready (state: {self.loading_state})")
+
+        if self.batcher is not None:
+            return self.submit(text, location).result()
+        return self.predict_batch([text], [location])[0]
+
+    def submit(self, text: str, location: Optional[str] = None) -> Future:
+        """
+        Queue a prediction on the micro-batcher without waiting for it.
+
+        Async callers await the future instead of holding a pool thread
+        while the batch fills, so batches aren't capped by the pool size.
+
+        Returns:
+            Future: Resolves to the prediction
+
+        Raises:
+            ModelNotReadyError: If the model hasn't finished loading
+            BatchQueueFullError: If the batch queue is full
+        """
+        if not self.is_ready:
+            raise ModelNotReadyError(f"Model not ready (state: {self.loading_state})")
+        if self.batcher is None:
+            raise ValueError("Micro-batching is disabled")
+        if self.cascade is not None:
+            # Confident first-stage answers don't wait for a batch to fill
+            with self._using_bundle() as bundle:
+                result = self._run_cascade(bundle, [text])[0]
+            if result is not None:
+                future = Future()
+                future.set_result(result)
+                return future
+        return self.batcher.submit((text, location))
+
+    @staticmethod
+    def _cascade_threshold(cascade: HashedNgramClassifier) -> float:
+        return CASCADE_THRESHOLD or cascade.threshold or INTENT_CONFIDENCE_THRESHOLD
+
+    def cascade_stats(self):
+        """Return how many queries the cascade answered and escalated, or None if it is disabled."""
+        cascade = self.cascade
+        if cascade is None:
+            return None
+        with self._index_lock:
+            stats = dict(self._cascade_counts)
+        stats["threshold"] = self._cascade_threshold(cascade)
+        return stats
+
+    def _run_cascade(self, bundle: ModelBundle, texts: List[str]) -> List[Optional[Dict]]:
+        """
+        Answer the texts the n-gram first stage is confident about.
+
+        Returns:
+            List[Optional[dict]]: A prediction per text, or None where the
+            text has to go on to the transformer
+        """
+        # A reload may disable the cascade while this request is running
+        cascade = self.cascade
+        if cascade is None:
+            return [None] * len(texts)
+        with timed("cascade"):
+            intents, confidences = cascade.predict(texts)
+        answered = np.flatnonzero(confidences >= self._cascade_threshold(cascade))
+        with self._index_lock:
+            self._cascade_counts["answered"] += len(answered)
+            self._cascade_counts["escalated"] += len(texts) - len(answered)
+
+        results = [None] * len(texts)
+        for i in answered.tolist():
+            confidence = float(confidences[i])
+            results[i] = {
+                "intent": self.apply_confidence_fallback(str(intents[i]), confidence),
+                "entities": self.extract_entities(texts[i]),
+                "confidence": confidence,
+                "model_version": bundle.version,
+                "stage": "cascade"
+            }
+        return results
+
+    def batching_stats(self):
+        """Return per-batch size and latency stats, or None if batching is disabled."""
+        if self.batcher is None:
+            return None
+        stats = self.batcher.stats.snapshot()
+        stats["queue_depth"] = self.batcher.queue_depth
+        return stats
+
+    def predict_batch(self, texts: List[str], locations: Optional[List[Optional[str]]] = None,
+                      cascade: bool = True) -> List[Dict]:
+        """
+        Make predictions for a list of texts in one vectorized pass.
+
+        If the n-gram cascade is loaded it answers the texts it is
+        confident about first. The rest are encoded into a single embedding
+        matrix and classified with one forward pass of the classifier.
+
+        Args:
+            texts (List[str]): Input texts to process
+            locations (List[str]): Per-text location, if any (see normalize_query)
+            cascade (bool): Run the cascade first; False when it already has
+
+        Returns:
+            List[dict]: One prediction per input text, in input order
+        """
+        if not self.is_ready:
+            raise ModelNotReadyError(f"Model not ready (state: {self.loading_state})")
+
+        texts = list(texts)
+        if not texts:
+            return []
+
+        record_batch_size(len(texts))
+
+        with self._using_bundle() as bundle:
+            if not cascade or self.cascade is None:
+                return self._predict_batch(bundle, texts, locations)
+
+            # Only what the first stage can't answer pays for the transformer
+            results = self._run_cascade(bundle, texts)
+            escalate = [i for i, result in enumerate(results) if result is None]
+            if escalate:
+                classified = self._predict_batch(
+                    bundle,
+                    [texts[i] for i in escalate],
+                    None if locations is None else [locations[i] for i in escalate]
+                )
+                for i, result in zip(escalate, classified):
+                    results[i] = result
+            return results
+
+    def _predict_batch(self, bundle: ModelBundle, texts: List[str], locations) -> List[Dict]:
+        # Encode the input texts using the transformer
+        with timed("encode"):
+            text_embeddings = self.embed(texts, locations)
+
+        # Near-duplicates of training sentences take the stored intent, with the
+        # cosine similarity as confidence; everything else goes to the classifier
+        intents = np.empty(len(texts), dtype=object)
+        confidences = np.zeros(len(texts), dtype=np.float32)
+        classify = np.ones(len(texts), dtype=bool)
+        audit = np.zeros(len(texts), dtype=bool)
+        if self.intent_index is not None:
+            with timed("intent_index"):
+                similarities, neighbour_intents = self.intent_index.search(text_embeddings)
+            fast = similarities >= INTENT_INDEX_THRESHOLD
+            intents[fast] = np.asarray(neighbour_intents, dtype=object)[fast]
+            confidences[fast] = similarities[fast]
+            # Re-check a sample of fast-path answers against the classifier
+            audit = fast & (self._audit_rng.random(len(texts)) < INTENT_INDEX_AUDIT_RATE)
+            classify = ~fast | audit
+
+        if classify.any():
+            with timed("classify"):
+                pred_probs = bundle.forward(text_embeddings[classify])
+            with timed("decode"):
+                intent_indices = np.argmax(pred_probs, axis=1)
+                classifier_confidences = pred_probs[np.arange(len(intent_indices)), intent_indices]
+                classifier_intents = bundle.label_encoder.inverse_transform(intent_indices)
+
+            classified = np.flatnonzero(classify)
+            answered = ~audit[classified]
+            intents[classified[answered]] = np.asarray(classifier_intents, dtype=object)[answered]
+            confidences[classified[answered]] = classifier_confidences[answered]
+            agreed = int(np.sum(intents[classified[~answered]] == classifier_intents[~answered]))
+        else:
+            agreed = 0
+
+        if self.intent_index is not None:
+            with self._index_lock:
+                self._index_counts["lookups"] += len(texts)
+                self._index_counts["fast_path"] += int(np.sum(~classify | audit))
+                self._index_counts["audited"] += int(audit.sum())
+                self._index_counts["agreed"] += agreed
+
+        with timed("entities"):
+            entities = [self.extract_entities(text) for text in texts]
+
+        results = []
+        for intent, confidence, text_entities in zip(intents, confidences, entities):
+            confidence = float(confidence)
+            results.append({
+                "intent": self.apply_confidence_fallback(intent, confidence),
+                "entities": text_entities,
+                "confidence": confidence,
+                "model_version": bundle.version
+            })
+        return results
 
 if __name__ == "__main__":
     model = NLUModel()
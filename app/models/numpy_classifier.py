@@ -0,0 +1,200 @@
+"""
+TensorFlow-free intent classifier.
+
+tools/export_classifier.py converts the Keras classifier head and the label
+encoder into a single .npz file; NumpyClassifier runs the same layer stack
+with vectorized NumPy so serving workers never import TensorFlow.
+
+Supported layers form a linear stack: Dense, Activation,
+BatchNormalization (folded into a per-feature scale and shift),
+LayerNormalization, and the inference no-ops Dropout, InputLayer and
+Flatten. Any other layer makes the export fail rather than produce a
+classifier that silently disagrees with Keras.
+"""
+
+import json
+import math
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+# Layers that do nothing at inference time on (batch, features) inputs
+PASSTHROUGH_LAYERS = {"InputLayer", "Dropout", "SpatialDropout1D", "GaussianNoise", "GaussianDropout", "Flatten"}
+
+
+def _softmax(x: np.ndarray) -> np.ndarray:
+    shifted = x - x.max(axis=-1, keepdims=True)
+    np.exp(shifted, out=shifted)
+    return shifted / shifted.sum(axis=-1, keepdims=True)
+
+
+def _gelu(x: np.ndarray) -> np.ndarray:
+    # Exact (erf) form, Keras' default
+    erf = np.vectorize(math.erf, otypes=[np.float32])
+    return 0.5 * x * (1.0 + erf(x / np.float32(math.sqrt(2.0))))
+
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0),
+    "sigmoid": lambda x: 1.0 / (1.0 + np.exp(-x)),
+    "tanh": np.tanh,
+    "softmax": _softmax,
+    "swish": lambda x: x / (1.0 + np.exp(-x)),
+    "silu": lambda x: x / (1.0 + np.exp(-x)),
+    "elu": lambda x: np.where(x > 0, x, np.expm1(np.minimum(x, 0))),
+    "selu": lambda x: 1.0507009873554805 * np.where(x > 0, x, 1.6732632423543772 * np.expm1(np.minimum(x, 0))),
+    "softplus": lambda x: np.logaddexp(0, x),
+    "gelu": _gelu,
+}
+
+
+def _activation_name(config: Dict) -> str:
+    activation = config.get("activation", "linear")
+    if isinstance(activation, dict):
+        # Serialized activation objects (newer Keras versions)
+        activation = activation.get("config", {}).get("name") or activation.get("class_name", "")
+    return str(activation).lower()
+
+
+class NumpyClassifier:
+    """
+    Runs an exported classifier head and decodes its predictions.
+
+    Also stands in for the sklearn LabelEncoder (``classes_`` and
+    ``inverse_transform``), since the class names are stored in the same file.
+
+    Args:
+        layers (List[Dict]): Layer specs, each with "type" and its arrays
+        classes (Sequence[str]): Intent name per output column
+    """
+
+    def __init__(self, layers: List[Dict], classes: Sequence[str]):
+        for layer in layers:
+            if layer["type"] in ("dense", "activation") and layer["activation"] not in ACTIVATIONS:
+                raise ValueError(f"Unsupported activation: {layer['activation']}")
+        self.layers = layers
+        self.classes_ = np.asarray(classes)
+        self.metadata = {}
+        self.input_dim = next(
+            (layer["kernel"].shape[0] for layer in layers if layer["type"] == "dense"), None
+        )
+
+    @classmethod
+    def from_keras(cls, model, classes: Sequence[str]) -> "NumpyClassifier":
+        """
+        Convert a loaded Keras model (a linear stack of supported layers).
+
+        Raises:
+            ValueError: If the model contains a layer that can't be reproduced
+        """
+        layers = []
+        for layer in model.layers:
+            kind = type(layer).__name__
+            config = layer.get_config()
+            weights = [np.asarray(w, dtype=np.float32) for w in layer.get_weights()]
+
+            if kind in PASSTHROUGH_LAYERS:
+                continue
+            if kind == "Dense":
+                kernel = weights[0]
+                bias = weights[1] if len(weights) > 1 else np.zeros(kernel.shape[1], dtype=np.float32)
+                layers.append({"type": "dense", "kernel": kernel, "bias": bias,
+                               "activation": _activation_name(config)})
+            elif kind == "Activation":
+                layers.append({"type": "activation", "activation": _activation_name(config)})
+            elif kind == "BatchNormalization":
+                # Inference-mode batch norm is a fixed affine transform
+                weights = list(weights)
+                gamma = weights.pop(0) if config.get("scale", True) else None
+                beta = weights.pop(0) if config.get("center", True) else None
+                mean, variance = weights
+                scale = 1.0 / np.sqrt(variance + config.get("epsilon", 1e-3))
+                if gamma is not None:
+                    scale = scale * gamma
+                shift = -mean * scale
+                if beta is not None:
+                    shift = shift + beta
+                layers.append({"type": "affine", "scale": scale.astype(np.float32),
+                               "shift": shift.astype(np.float32)})
+            elif kind == "LayerNormalization":
+                weights = list(weights)
+                gamma = weights.pop(0) if config.get("scale", True) else None
+                beta = weights.pop(0) if config.get("center", True) else None
+                layers.append({
+                    "type": "layer_norm",
+                    # Shape (1,) broadcasts like Keras' missing scale/center
+                    "gamma": gamma if gamma is not None else np.ones(1, dtype=np.float32),
+                    "beta": beta if beta is not None else np.zeros(1, dtype=np.float32),
+                    "epsilon": float(config.get("epsilon", 1e-3)),
+                })
+            else:
+                raise ValueError(f"Unsupported layer for NumPy export: {kind} ({layer.name})")
+        return cls(layers, classes)
+
+    def save(self, path: str, metadata: Dict = None):
+        """Write the layers and class names to a single .npz file."""
+        arrays = {}
+        spec = []
+        for i, layer in enumerate(self.layers):
+            entry = {}
+            for key, value in layer.items():
+                if isinstance(value, np.ndarray):
+                    arrays[f"layer{i}_{key}"] = value
+                    entry[key] = f"layer{i}_{key}"
+                else:
+                    entry[key] = value
+            spec.append(entry)
+        header = {"format_version": FORMAT_VERSION, "layers": spec, "metadata": metadata or {}}
+        np.savez(
+            path,
+            header=np.frombuffer(json.dumps(header).encode("utf-8"), dtype=np.uint8),
+            classes=np.asarray([str(c) for c in self.classes_]),
+            **arrays
+        )
+
+    @classmethod
+    def from_file(cls, path: str) -> "NumpyClassifier":
+        with np.load(path, allow_pickle=False) as data:
+            header = json.loads(data["header"].tobytes().decode("utf-8"))
+            if header.get("format_version") != FORMAT_VERSION:
+                raise ValueError(f"Unsupported classifier format: {header.get('format_version')}")
+            layers = []
+            for entry in header["layers"]:
+                layers.append({
+                    key: (data[value] if isinstance(value, str) and value in data.files else value)
+                    for key, value in entry.items()
+                })
+            classifier = cls(layers, data["classes"])
+        classifier.metadata = header.get("metadata", {})
+        return classifier
+
+    def predict_proba(self, embeddings: np.ndarray) -> np.ndarray:
+        """
+        Score a batch of embeddings.
+
+        Args:
+            embeddings (np.ndarray): (batch, embedding_dim) matrix
+
+        Returns:
+            np.ndarray: float32 class probabilities, one row per embedding
+        """
+        x = np.asarray(embeddings, dtype=np.float32)
+        for layer in self.layers:
+            kind = layer["type"]
+            if kind == "dense":
+                x = ACTIVATIONS[layer["activation"]](x @ layer["kernel"] + layer["bias"])
+            elif kind == "activation":
+                x = ACTIVATIONS[layer["activation"]](x)
+            elif kind == "affine":
+                x = x * layer["scale"] + layer["shift"]
+            elif kind == "layer_norm":
+                mean = x.mean(axis=-1, keepdims=True)
+                variance = x.var(axis=-1, keepdims=True)
+                x = (x - mean) / np.sqrt(variance + layer["epsilon"]) * layer["gamma"] + layer["beta"]
+        return x.astype(np.float32, copy=False)
+
+    def inverse_transform(self, indices: Sequence[int]) -> np.ndarray:
+        return self.classes_[np.asarray(indices, dtype=np.int64)]
@@ -0,0 +1,28 @@
+"""
+Rate limiting shared by the Maps client and the offline data tools.
+"""
+
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Async token-bucket rate limiter: ``rate`` tokens per second, up to ``capacity`` banked."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
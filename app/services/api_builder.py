@@ -1,60 +1,361 @@
-from typing import Dict, Optional
+import asyncio
+from typing import Dict, List, Optional, Tuple
+from ..config import (
+    MAPS_ROUTES_PATH, INFERENCE_WORKERS, INFERENCE_MAX_PENDING, MAPS_IO_WORKERS, MAPS_IO_MAX_PENDING,
+    MAPS_ASYNC_CLIENT, INFERENCE_SOCKET, OVERLOAD_CONTROL_ENABLED, OVERLOAD_MAX_IN_FLIGHT,
+    OVERLOAD_TARGET_LATENCY_MS, OVERLOAD_SKIP_MAPS_AT, OVERLOAD_MODEL_FREE_AT, OVERLOAD_REJECT_AT,
+    OVERLOAD_WINDOW_SECONDS, OVERLOAD_MIN_LATENCY_SAMPLES, MAPS_SPECULATIVE_GEOCODE
+)
+from ..metrics import REGISTRY, timed
 from ..models.nlu_model import NLUModel
+from .async_google_maps import AsyncGoogleMapsService
+from .executors import BoundedExecutor
 from .google_maps import GoogleMapsService
+from .overload import OverloadController
+from .router import RoutingTable, merge_places
 
 class APIBuilder:
-    def __init__(self):
-        self.nlu_model = NLUModel()
+    def __init__(self, lazy: bool = False):
+        """
+        Args:
+            lazy (bool): Defer model loading; see NLUModel.start_loading
+        """
+        if INFERENCE_SOCKET:
+            # Weights live in the shared sidecar process, not in this worker
+            from ..models.inference_server import RemoteNLUModel
+            self.nlu_model = RemoteNLUModel(INFERENCE_SOCKET)
+        else:
+            self.nlu_model = NLUModel(lazy=lazy)
+        # Compiled once; routing a request is then a dict lookup
+        self.routes = RoutingTable.from_file(MAPS_ROUTES_PATH)
+        label_encoder = getattr(self.nlu_model, "label_encoder", None)
+        if label_encoder is not None:
+            missing = self.routes.missing_intents(label_encoder.classes_)
+            if missing:
+                print(f"No Maps route for intents: {', '.join(missing)}")
         self.google_maps = GoogleMapsService()
+        self.async_google_maps = None
+        if MAPS_ASYNC_CLIENT:
+            self.async_google_maps = AsyncGoogleMapsService(
+                cache=self.google_maps.cache, place_index=self.google_maps.place_index
+            )
+        # Separate pools so slow Maps calls never hold up model inference
+        self.inference_executor = BoundedExecutor(
+            "nlu-inference", INFERENCE_WORKERS, INFERENCE_MAX_PENDING
+        )
+        self.io_executor = BoundedExecutor(
+            "maps-io", MAPS_IO_WORKERS, MAPS_IO_MAX_PENDING
+        )
+        self.speculative_geocode = MAPS_SPECULATIVE_GEOCODE
+        # Speculative geocodes whose coordinates were used by a search, that
+        # failed when a search needed them, or that were dropped
+        self.speculation_stats = {"used": 0, "failed": 0, "discarded": 0}
+        self.overload = None
+        if OVERLOAD_CONTROL_ENABLED:
+            self.overload = OverloadController(
+                OVERLOAD_MAX_IN_FLIGHT,
+                OVERLOAD_TARGET_LATENCY_MS / 1000.0,
+                skip_maps_at=OVERLOAD_SKIP_MAPS_AT,
+                model_free_at=OVERLOAD_MODEL_FREE_AT,
+                reject_at=OVERLOAD_REJECT_AT,
+                window=OVERLOAD_WINDOW_SECONDS,
+                min_latency_samples=OVERLOAD_MIN_LATENCY_SAMPLES
+            )
+        REGISTRY.register_collector("api_builder", self.collect_metrics)
 
-    def build_api_call(self, user_input: str) -> Dict:
+    def _plan_api_call(
+        self, prediction: Dict, user_input: str, location: Optional[str] = None
+    ) -> Tuple[Dict, Optional[Dict]]:
         """
-        Build an API call based on the NLU model's predictions.
-        
+        Build the response skeleton and the Maps searches, if any.
+
         Args:
-            user_input (str): User's natural language input
-            
+            prediction (Dict): Output of NLUModel.predict
+            user_input (str): The query, scanned for every category it mentions
+            location (str): Location to search around; the location_hint entity if omitted
+
         Returns:
-            Dict: API call parameters and results
+            Tuple[Dict, Optional[Dict]]: Response structure and the api_call
+            ({"location": ..., "searches": [...]}), or None if there is nothing to search
         """
-        # Get prediction from NLU model
-        prediction = self.nlu_model.predict(user_input)
-        
         # Initialize response structure
         response = {
             "intent": prediction["intent"],
             "entities": prediction["entities"],
             "confidence": prediction["confidence"],
             "api_call": None,
-            "results": None
+            "results": None,
+            "degraded": prediction.get("degraded"),
+            "model_version": prediction.get("model_version"),
+            "stage": prediction.get("stage")
         }
-        
-        # Build API call based on intent and entities
-        if prediction["intent"] == "restaurant":
-            # Default parameters
-            params = {
-                "location": None,
-                "radius": 5000,  # 5km default radius
-                "type": "restaurant"
-            }
-            
-            # Update parameters based on entities
-            if "location_hint" in prediction["entities"]:
-                params["location"] = prediction["entities"]["location_hint"]
-            
-            # Make the API call
-            if params["location"]:
-                response["api_call"] = params
-                response["results"] = self.google_maps.search_nearby(
-                    location=params["location"],
-                    radius=params["radius"],
-                    type=params["type"]
+
+        location = location or prediction["entities"].get("location_hint")
+        if not location:
+            return response, None
+
+        # A query may name several categories ("a pharmacy or a gym"); the dict
+        # extraction only keeps the first, so take them from the spans
+        categories = list(dict.fromkeys(
+            span.value for span in NLUModel.extract_entity_spans(user_input) if span.label == "category"
+        ))
+        searches = self.routes.route(prediction["intent"], prediction["entities"], categories)
+        if not searches:
+            return response, None
+
+        api_call = {"location": location, "searches": searches}
+        response["api_call"] = api_call
+        return response, api_call
+
+    def build_api_call(self, user_input: str, location: Optional[str] = None) -> Dict:
+        """
+        Build an API call based on the NLU model's predictions.
+
+        Args:
+            user_input (str): User's natural language input
+            location (str): Location to search around, if any; it is not part of the classified text
+
+        Returns:
+            Dict: API call parameters and results
+        """
+        # Get prediction from NLU model
+        with timed("nlu"):
+            prediction = self.nlu_model.predict(user_input, location)
+        response, api_call = self._plan_api_call(prediction, user_input, location)
+
+        # Make the API calls, sharing one geocode, and merge the results
+        if api_call:
+            with timed("maps"):
+                response["results"] = merge_places(
+                    self.google_maps.search_nearby_many(api_call["location"], api_call["searches"])
                 )
-        
-        return response 
-    
+
+        return response
+
+    def predict_without_model(self, user_input: str, location: Optional[str] = None) -> Dict:
+        """Answer from the embedding cache if possible, else from keywords, without encoding."""
+        predict_cached = getattr(self.nlu_model, "predict_cached", None)
+        prediction = predict_cached(user_input, location) if predict_cached else None
+        return prediction or NLUModel.keyword_prediction(user_input)
+
+    async def _geocode_ahead(self, location: str) -> Tuple[Optional[Dict[str, float]], bool]:
+        """
+        Geocode location for a search that may follow.
+
+        Returns:
+            Tuple[Optional[Dict[str, float]], bool]: The coordinates (None if
+            the location is unknown or on failure), and whether the geocode failed
+        """
+        try:
+            if self.async_google_maps is not None:
+                return await self.async_google_maps.geocode(location), False
+            return await self.io_executor.run(self.google_maps.geocode, location), False
+        except Exception as e:
+            print(f"Error geocoding location ahead of the search: {e}")
+            return None, True
+
+    async def build_api_call_async(
+        self,
+        user_input: str,
+        location: Optional[str] = None,
+        level: int = OverloadController.FULL
+    ) -> Dict:
+        """
+        Async variant of build_api_call for the request path.
+
+        Model inference runs on the bounded inference pool; the routed Maps
+        searches fan out concurrently on the async client, or on the sync
+        client via the I/O pool when the async client is disabled, so neither
+        blocks the event loop.
+
+        When a location is given, it is geocoded while the model runs, so a
+        query that needs a Places search only waits for the searches. If the
+        prediction needs no search the geocode is cancelled, or its result
+        dropped.
+
+        Args:
+            user_input (str): User's natural language input
+            location (str): Location to search around, if any; it is not part of the classified text
+            level (int): OverloadController service level; degraded responses
+                name what was skipped in "degraded"
+
+        Returns:
+            Dict: API call parameters and results
+
+        Raises:
+            ExecutorOverloadedError: If either pool is at capacity
+        """
+        geocode = None
+        if location and self.speculative_geocode and level < OverloadController.SKIP_MAPS:
+            geocode = asyncio.ensure_future(self._geocode_ahead(location))
+        try:
+            if level >= OverloadController.MODEL_FREE:
+                with timed("degraded"):
+                    prediction = self.predict_without_model(user_input, location)
+            else:
+                # "nlu" includes time queued for the pool, unlike the model's own stages
+                with timed("nlu"):
+                    if getattr(self.nlu_model, "batcher", None) is not None:
+                        # Await the batcher's future: a pool thread parked on it per
+                        # request would cap every batch at the pool size
+                        prediction = await asyncio.wrap_future(self.nlu_model.submit(user_input, location))
+                    else:
+                        prediction = await self.inference_executor.run(self.nlu_model.predict, user_input, location)
+            response, api_call = self._plan_api_call(prediction, user_input, location)
+
+            if level >= OverloadController.SKIP_MAPS:
+                # Return the planned api_call without running the searches
+                response["degraded"] = response["degraded"] or "maps_skipped"
+            elif api_call:
+                with timed("maps"):
+                    location_coords, geocoded = None, False
+                    if geocode is not None and api_call["location"] == location:
+                        (location_coords, failed), geocoded = await geocode, True
+                        geocode = None
+                        self.speculation_stats["failed" if failed else "used"] += 1
+                    if geocoded and location_coords is None:
+                        # Unknown location or failed geocode; don't geocode it again
+                        response["results"] = []
+                    elif self.async_google_maps is not None:
+                        response["results"] = merge_places(await self.async_google_maps.search_nearby_many(
+                            api_call["location"], api_call["searches"], location_coords
+                        ))
+                    else:
+                        response["results"] = merge_places(await self.io_executor.run(
+                            self.google_maps.search_nearby_many, api_call["location"], api_call["searches"],
+                            location_coords
+                        ))
+        finally:
+            if geocode is not None:
+                # Not needed (or the request failed): stop waiting for it
+                geocode.cancel()
+                self.speculation_stats["discarded"] += 1
+
+        return response
+
+    def collect_metrics(self) -> List:
+        """
+        Read point-in-time stats for /metrics: model readiness, cache hit
+        rates, executor and batch queue depth, and async Maps client counters.
+
+        Returns:
+            List: (name, type, help, samples) metric families
+        """
+        families = [
+            ("nearbynlu_model_ready", "gauge", "1 once the NLU model has loaded",
+             [({}, 1.0 if self.nlu_model.is_ready else 0.0)]),
+        ]
+
+        caches = {}
+        embedding_stats = getattr(self.nlu_model, "embedding_cache_stats", lambda: None)()
+        if embedding_stats:
+            caches["embedding"] = (embedding_stats["hits"], embedding_stats["misses"], embedding_stats["hit_rate"])
+        for namespace, counts in (self.google_maps.cache_stats() or {}).items():
+            # Coalesced lookups were served without an upstream call of their own
+            caches[f"maps_{namespace}"] = (
+                counts["hits"] + counts["coalesced"], counts["misses"], counts["hit_rate"]
+            )
+        families += [
+            ("nearbynlu_cache_hits_total", "counter", "Cache lookups served from the cache",
+             [({"cache": name}, hits) for name, (hits, _, _) in caches.items()]),
+            ("nearbynlu_cache_misses_total", "counter", "Cache lookups that had to be computed or fetched",
+             [({"cache": name}, misses) for name, (_, misses, _) in caches.items()]),
+            ("nearbynlu_cache_hit_ratio", "gauge", "Lifetime cache hit ratio",
+             [({"cache": name}, hit_rate) for name, (_, _, hit_rate) in caches.items()]),
+        ]
+
+        model_version = getattr(self.nlu_model, "model_version", None)
+        if model_version is not None:
+            families += [
+                ("nearbynlu_model_info", "gauge", "Version of the classifier bundle being served",
+                 [({"version": model_version}, 1)]),
+                ("nearbynlu_model_swaps_total", "counter", "Classifier bundles swapped in without a restart",
+                 [({}, getattr(self.nlu_model, "swap_count", 0))]),
+            ]
+
+        families.append(
+            ("nearbynlu_speculative_geocodes_total", "counter",
+             "Locations geocoded during inference, by whether a search used them, they failed or were discarded",
+             [({"outcome": outcome}, count) for outcome, count in self.speculation_stats.items()])
+        )
+
+        place_index = self.google_maps.place_index
+        if place_index is not None:
+            families.append(
+                ("nearbynlu_place_index_lookups_total", "counter",
+                 "Nearby searches tried on the local place index, by outcome (served, or why the live API was used)",
+                 [({"outcome": outcome}, count) for outcome, count in place_index.stats.items()])
+            )
+
+        executors = [self.inference_executor.stats(), self.io_executor.stats()]
+        names = [self.inference_executor.name, self.io_executor.name]
+        families += [
+            ("nearbynlu_executor_pending", "gauge", "Tasks running or queued on each thread pool",
+             [({"executor": name}, stats["pending"]) for name, stats in zip(names, executors)]),
+            ("nearbynlu_executor_max_pending", "gauge", "Pending-task limit of each thread pool",
+             [({"executor": name}, stats["max_pending"]) for name, stats in zip(names, executors)]),
+            ("nearbynlu_executor_rejected_total", "counter", "Tasks rejected because the pool was full",
+             [({"executor": name}, stats["rejected"]) for name, stats in zip(names, executors)]),
+        ]
+
+        batching = getattr(self.nlu_model, "batching_stats", lambda: None)()
+        if batching:
+            families += [
+                ("nearbynlu_batch_queue_depth", "gauge", "Queries waiting for the micro-batcher",
+                 [({}, batching["queue_depth"])]),
+                ("nearbynlu_batch_rejected_total", "counter", "Queries rejected by the full micro-batch queue",
+                 [({}, batching["rejected"])]),
+            ]
+
+        index = getattr(self.nlu_model, "intent_index_stats", lambda: None)()
+        if index:
+            families += [
+                ("nearbynlu_intent_index_lookups_total", "counter", "Queries checked against the intent index",
+                 [({}, index["lookups"])]),
+                ("nearbynlu_intent_index_fast_path_total", "counter",
+                 "Queries answered by the nearest-neighbour fast path", [({}, index["fast_path"])]),
+                ("nearbynlu_intent_index_audited_total", "counter",
+                 "Fast-path answers re-checked by the classifier", [({}, index["audited"])]),
+                ("nearbynlu_intent_index_agreed_total", "counter",
+                 "Audited fast-path answers that matched the classifier", [({}, index["agreed"])]),
+                ("nearbynlu_intent_index_rows", "gauge", "Sentences in the intent index", [({}, index["rows"])]),
+            ]
+
+        cascade = getattr(self.nlu_model, "cascade_stats", lambda: None)()
+        if cascade:
+            families += [
+                ("nearbynlu_cascade_queries_total", "counter",
+                 "Queries seen by the n-gram first stage, by whether it answered or escalated them",
+                 [({"outcome": outcome}, cascade[outcome]) for outcome in ("answered", "escalated")]),
+                ("nearbynlu_cascade_threshold", "gauge", "Confidence the n-gram first stage answers at",
+                 [({}, cascade["threshold"])]),
+            ]
+
+        if self.overload is not None:
+            overload = self.overload.stats()
+            families += [
+                ("nearbynlu_overload_pressure", "gauge",
+                 "Load pressure; 1.0 is the in-flight or latency limit", [({}, overload["pressure"])]),
+                ("nearbynlu_overload_in_flight", "gauge", "Queries admitted and not yet finished",
+                 [({}, overload["in_flight"])]),
+                ("nearbynlu_overload_requests_total", "counter", "Queries by the service level they were given",
+                 [({"level": name}, count) for name, count in overload["requests"].items()]),
+            ]
+
+        if self.async_google_maps is not None:
+            maps = self.async_google_maps.stats
+            families += [
+                ("nearbynlu_maps_upstream_requests_total", "counter", "HTTP requests sent to the Maps API",
+                 [({}, maps["requests"])]),
+                ("nearbynlu_maps_upstream_retries_total", "counter", "Maps API requests retried",
+                 [({}, maps["retries"])]),
+                ("nearbynlu_maps_upstream_errors_total", "counter", "Maps API calls that failed after retries",
+                 [({}, maps["errors"])]),
+            ]
+        return families
+
 
 if __name__ == "__main__":
     api_builder = APIBuilder()
     print(api_builder.build_api_call("I want to find a restaurant near me"))
-    
\ No newline at end of file
+
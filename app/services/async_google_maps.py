@@ -0,0 +1,370 @@
+import asyncio
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from ..config import (
+    GOOGLE_MAPS_API_KEY, MAPS_API_BASE_URL, MAPS_MAX_CONNECTIONS, MAPS_MAX_KEEPALIVE,
+    MAPS_PER_HOST_LIMIT, MAPS_RATE_LIMIT_QPS, MAPS_RATE_LIMIT_BURST, MAPS_MAX_RETRIES,
+    MAPS_RETRY_BACKOFF, MAPS_REQUEST_TIMEOUT, GEOCODE_CACHE_TTL, PLACES_CACHE_TTL
+)
+from ..metrics import timed
+from ..rate_limit import TokenBucket
+from .maps_cache import MapsCache
+from .place_index import PlaceIndex
+
+GEOCODE_PATH = "/maps/api/geocode/json"
+NEARBY_SEARCH_PATH = "/maps/api/place/nearbysearch/json"
+PLACE_DETAILS_PATH = "/maps/api/place/details/json"
+
+# HTTP statuses and Maps API statuses worth retrying
+RETRYABLE_HTTP_STATUSES = {429, 500, 502, 503, 504}
+RETRYABLE_API_STATUSES = {"OVER_QUERY_LIMIT", "UNKNOWN_ERROR"}
+OK_API_STATUSES = {"OK", "ZERO_RESULTS"}
+
+
+def parse_retry_after(value: str) -> Optional[float]:
+    """
+    Read a Retry-After header in either of its forms.
+
+    Args:
+        value (str): Delay in seconds, or an HTTP-date to retry after
+
+    Returns:
+        float: Seconds to wait (negative for a date in the past), or None if unparseable
+    """
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return (when - datetime.now(timezone.utc)).total_seconds()
+
+
+class MapsAPIError(RuntimeError):
+    """Raised when the Maps API returns an error status."""
+
+    def __init__(self, message: str, status: Optional[str] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class AsyncGoogleMapsService:
+    """
+    asyncio-native Google Maps client.
+
+    Requests share one pooled httpx.AsyncClient, are throttled by a token
+    bucket sized to the API quota and a per-host concurrency limit, retried
+    with jittered exponential backoff on 429/5xx and OVER_QUERY_LIMIT, and
+    identical requests already in flight are deduplicated. Geocode and
+    nearby-search responses go through the same MapsCache as
+    GoogleMapsService when one is given, and nearby searches a PlaceIndex
+    can answer never reach the network.
+
+    The HTTP client and asyncio primitives are bound to the event loop that
+    first uses them and rebuilt if the service is used from a new loop.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = GOOGLE_MAPS_API_KEY,
+        base_url: str = MAPS_API_BASE_URL,
+        cache: Optional[MapsCache] = None,
+        place_index: Optional[PlaceIndex] = None,
+        max_connections: int = MAPS_MAX_CONNECTIONS,
+        max_keepalive: int = MAPS_MAX_KEEPALIVE,
+        per_host_limit: int = MAPS_PER_HOST_LIMIT,
+        rate_limit_qps: float = MAPS_RATE_LIMIT_QPS,
+        rate_limit_burst: float = MAPS_RATE_LIMIT_BURST,
+        max_retries: int = MAPS_MAX_RETRIES,
+        retry_backoff: float = MAPS_RETRY_BACKOFF,
+        timeout: float = MAPS_REQUEST_TIMEOUT,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        if not api_key:
+            raise ValueError("Google Maps API key not found in environment variables")
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.cache = cache
+        self.place_index = place_index
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.per_host_limit = per_host_limit
+        self.rate_limit_qps = rate_limit_qps
+        self.rate_limit_burst = rate_limit_burst
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.timeout = timeout
+        self.transport = transport
+        self.stats = {"requests": 0, "retries": 0, "deduplicated": 0, "errors": 0}
+        self._loop = None
+        self._closing = set()
+
+    def _ensure_loop(self):
+        loop = asyncio.get_running_loop()
+        if loop is self._loop:
+            return
+        if self._loop is not None:
+            # The old client's pool belongs to the previous loop; close it rather than leak its connections
+            self._close_client(self._client, self._loop)
+        self._loop = loop
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive
+            ),
+            transport=self.transport,
+        )
+        self._bucket = TokenBucket(self.rate_limit_qps, self.rate_limit_burst)
+        self._host_limits = {}
+        self._inflight = {}
+
+    def _close_client(self, client: httpx.AsyncClient, loop: asyncio.AbstractEventLoop):
+        if loop.is_running():
+            # Still serving in another thread: close it there
+            asyncio.run_coroutine_threadsafe(self._aclose_quietly(client), loop)
+            return
+        task = asyncio.ensure_future(self._aclose_quietly(client))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _aclose_quietly(client: httpx.AsyncClient):
+        try:
+            await client.aclose()
+        except Exception:
+            pass  # Connections bound to a closed loop can't be shut down cleanly
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc or urlsplit(self.base_url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_limits[host]
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after:
+            delay = parse_retry_after(retry_after)
+            if delay is not None:
+                # Never wait longer than our own backoff schedule would
+                return min(max(delay, 0.0), self.retry_backoff * (2 ** self.max_retries))
+        # Full jitter keeps retrying clients from synchronizing
+        return random.uniform(0, self.retry_backoff * (2 ** attempt))
+
+    async def _request(self, path: str, params: Dict) -> Dict:
+        url = f"{self.base_url}{path}"
+        for attempt in range(self.max_retries + 1):
+            await self._bucket.acquire()
+            async with self._host_limit(url):
+                self.stats["requests"] += 1
+                try:
+                    response = await self._client.get(path, params={**params, "key": self.api_key})
+                except httpx.TransportError:
+                    if attempt == self.max_retries:
+                        raise
+                    self.stats["retries"] += 1
+                    await asyncio.sleep(self._backoff(attempt))
+                    continue
+
+            if response.status_code in RETRYABLE_HTTP_STATUSES:
+                if attempt == self.max_retries:
+                    response.raise_for_status()
+                self.stats["retries"] += 1
+                await asyncio.sleep(self._backoff(attempt, response.headers.get("Retry-After")))
+                continue
+            response.raise_for_status()
+
+            data = response.json()
+            status = data.get("status", "OK")
+            if status in RETRYABLE_API_STATUSES and attempt < self.max_retries:
+                self.stats["retries"] += 1
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+            if status not in OK_API_STATUSES:
+                raise MapsAPIError(data.get("error_message", f"Maps API error: {status}"), status)
+            return data
+
+    async def _get_json(self, path: str, params: Dict) -> Dict:
+        """GET a Maps endpoint, sharing the result with identical requests in flight."""
+        self._ensure_loop()
+        key: Tuple = (path, tuple(sorted(params.items())))
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["deduplicated"] += 1
+            return await asyncio.shield(task)
+
+        task = asyncio.ensure_future(self._request(path, params))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        try:
+            return await asyncio.shield(task)
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+
+    async def geocode(self, location: str) -> Optional[Dict[str, float]]:
+        """
+        Resolve a location string to coordinates.
+
+        Args:
+            location (str): Address or place name
+
+        Returns:
+            dict: {"lat": ..., "lng": ...}, or None if the location is unknown
+        """
+        async def fetch():
+            data = await self._get_json(GEOCODE_PATH, {"address": location})
+            return data.get("results", [])
+
+        with timed("geocode"):
+            if self.cache is None:
+                geocode_result = await fetch()
+            else:
+                geocode_result = await self.cache.get_or_fetch_async(
+                    "geocode", MapsCache.geocode_key(location), GEOCODE_CACHE_TTL, fetch
+                )
+        if not geocode_result:
+            return None
+        return geocode_result[0]['geometry']['location']
+
+    async def places_nearby(
+        self, location_coords: Dict[str, float], radius: int = 5000, type: str = None, keyword: str = None
+    ) -> List[Dict]:
+        """
+        Search for places around coordinates.
+
+        Args:
+            location_coords (dict): {"lat": ..., "lng": ...}
+            radius (int): Search radius in meters
+            type (str): Type of place to search for
+            keyword (str): Term matched against place names and content
+
+        Returns:
+            list: List of places found
+        """
+        if self.place_index is not None:
+            with timed("place_index"):
+                places = self.place_index.places_nearby(location_coords, radius, type, keyword)
+            if places is not None:
+                return places
+
+        if self.cache is not None:
+            location_coords = self.cache.round_coordinates(location_coords)
+
+        async def fetch():
+            params = {"location": f"{location_coords['lat']},{location_coords['lng']}", "radius": radius}
+            if type:
+                params["type"] = type
+            if keyword:
+                params["keyword"] = keyword
+            return await self._get_json(NEARBY_SEARCH_PATH, params)
+
+        with timed("places_nearby"):
+            if self.cache is None:
+                places_result = await fetch()
+            else:
+                places_result = await self.cache.get_or_fetch_async(
+                    "nearby", self.cache.nearby_key(location_coords, radius, type, keyword), PLACES_CACHE_TTL, fetch
+                )
+        return places_result.get('results', [])
+
+    async def search_nearby(self, location: str, radius: int = 5000, type: str = None) -> List[Dict]:
+        """
+        Search for places near a given location.
+
+        Args:
+            location (str): Location to search around
+            radius (int): Search radius in meters
+            type (str): Type of place to search for
+
+        Returns:
+            list: List of places found
+        """
+        try:
+            location_coords = await self.geocode(location)
+            if not location_coords:
+                return []
+            return await self.places_nearby(location_coords, radius=radius, type=type)
+        except Exception as e:
+            print(f"Error searching nearby places: {e}")
+            return []
+
+    async def search_nearby_many(
+        self, location: str, searches: List[Dict], location_coords: Optional[Dict[str, float]] = None
+    ) -> List[List[Dict]]:
+        """
+        Run several searches around one location concurrently, geocoding it once.
+
+        Args:
+            location (str): Location to search around
+            searches (List[Dict]): places_nearby parameters (radius, type, keyword) per search
+            location_coords (dict): Coordinates of location if already geocoded
+
+        Returns:
+            List[List[Dict]]: Places found by each search, in order; a failed search yields []
+        """
+        if location_coords is None:
+            try:
+                location_coords = await self.geocode(location)
+            except Exception as e:
+                print(f"Error searching nearby places: {e}")
+        if not location_coords:
+            return [[] for _ in searches]
+
+        results = await asyncio.gather(
+            *(self.places_nearby(location_coords, **search) for search in searches), return_exceptions=True
+        )
+        places = []
+        for result in results:
+            if isinstance(result, Exception):
+                print(f"Error searching nearby places: {result}")
+                places.append([])
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                places.append(result)
+        return places
+
+    async def get_place_details(self, place_id: str) -> Optional[Dict]:
+        """
+        Get detailed information about a specific place.
+
+        Args:
+            place_id (str): Google Places ID
+
+        Returns:
+            dict: Place details
+        """
+        try:
+            with timed("place_details"):
+                return await self._get_json(PLACE_DETAILS_PATH, {"place_id": place_id})
+        except Exception as e:
+            print(f"Error getting place details: {e}")
+            return None
+
+    async def get_place_details_batch(self, place_ids: List[str]) -> List[Optional[Dict]]:
+        """
+        Get details for several places concurrently.
+
+        Args:
+            place_ids (List[str]): Google Places IDs
+
+        Returns:
+            List[dict]: Details in input order, None for places that failed
+        """
+        return list(await asyncio.gather(*(self.get_place_details(place_id) for place_id in place_ids)))
+
+    async def aclose(self):
+        if self._loop is not None:
+            await self._client.aclose()
+            self._loop = None
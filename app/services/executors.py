@@ -0,0 +1,85 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class ExecutorOverloadedError(RuntimeError):
+    """Raised when a bounded executor already has its maximum number of pending tasks."""
+
+
+class BoundedExecutor:
+    """
+    Thread pool that async handlers can await without blocking the event loop.
+
+    At most ``max_workers`` tasks run at once and at most ``max_pending``
+    tasks may be running or queued; further submissions fail fast with
+    ``ExecutorOverloadedError`` instead of growing an unbounded queue.
+    A task only releases its slot when its thread actually finishes, so
+    callers that time out cannot hide work that is still occupying the pool.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_pending: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_pending = max(max_pending, max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.rejected = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of tasks currently running or queued."""
+        return self._pending
+
+    def _acquire(self):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise ExecutorOverloadedError(
+                    f"{self.name} is at capacity ({self.max_pending} pending tasks)"
+                )
+            self._pending += 1
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, fn: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs) on the pool and await its result.
+
+        Raises:
+            ExecutorOverloadedError: If the pool already has max_pending tasks
+            asyncio.TimeoutError: If the task does not finish within timeout
+        """
+        self._acquire()
+        try:
+            # Run in a copy of the caller's context so per-request state
+            # (e.g. Server-Timing stage timings) follows the task to the thread
+            context = contextvars.copy_context()
+            future = self._executor.submit(context.run, fn, *args, **kwargs)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            # Drop the task if it has not started yet; a running task keeps its slot
+            future.cancel()
+            raise
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
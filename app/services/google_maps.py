@@ -1,57 +1,186 @@
 import googlemaps
-from ..config import GOOGLE_MAPS_API_KEY
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from ..config import (
+    GOOGLE_MAPS_API_KEY, MAPS_CACHE_BACKEND, MAPS_CACHE_PATH, MAPS_CACHE_MAX_ENTRIES,
+    GEOCODE_CACHE_TTL, PLACES_CACHE_TTL, PLACES_COORDINATE_PRECISION, PLACE_INDEX_PATH, PLACE_INDEX_MAX_AGE
+)
+from ..metrics import timed
+from .maps_cache import MapsCache, build_maps_cache
+from .place_index import PlaceIndex
+
+# Threads used to run the searches of one search_nearby_many call concurrently
+FANOUT_WORKERS = 8
 
 class GoogleMapsService:
-    def __init__(self):
-        if not GOOGLE_MAPS_API_KEY:
-            raise ValueError("Google Maps API key not found in environment variables")
-        self.client = googlemaps.Client(key=GOOGLE_MAPS_API_KEY)
+    def __init__(self, client=None, cache: Optional[MapsCache] = None, place_index: Optional[PlaceIndex] = None):
+        """
+        Args:
+            client: googlemaps.Client-compatible object; built from the API key if omitted
+            cache (MapsCache): Response cache; built from config if omitted
+            place_index (PlaceIndex): Local index tried before the live API;
+                loaded from PLACE_INDEX_PATH if omitted and configured
+        """
+        if client is None:
+            if not GOOGLE_MAPS_API_KEY:
+                raise ValueError("Google Maps API key not found in environment variables")
+            client = googlemaps.Client(key=GOOGLE_MAPS_API_KEY)
+        self.client = client
+
+        if cache is None:
+            cache = build_maps_cache(
+                MAPS_CACHE_BACKEND, MAPS_CACHE_PATH, MAPS_CACHE_MAX_ENTRIES, PLACES_COORDINATE_PRECISION
+            )
+        self.cache = cache
+
+        if place_index is None and PLACE_INDEX_PATH:
+            try:
+                place_index = PlaceIndex.load(PLACE_INDEX_PATH, max_age=PLACE_INDEX_MAX_AGE)
+            except Exception as e:
+                # The index is only a fast path; the live API still answers every search
+                print(f"Error loading place index: {e}")
+        self.place_index = place_index
+        # Created up front (threads start on first use) so concurrent calls share one pool
+        self._fanout_executor = ThreadPoolExecutor(FANOUT_WORKERS, thread_name_prefix="maps-fanout")
+
+    def geocode(self, location: str) -> Optional[Dict[str, float]]:
+        """
+        Resolve a location string to coordinates.
+
+        Args:
+            location (str): Address or place name
+
+        Returns:
+            dict: {"lat": ..., "lng": ...}, or None if the location is unknown
+        """
+        with timed("geocode"):
+            if self.cache is None:
+                geocode_result = self.client.geocode(location)
+            else:
+                geocode_result = self.cache.get_or_fetch(
+                    "geocode", MapsCache.geocode_key(location), GEOCODE_CACHE_TTL,
+                    lambda: self.client.geocode(location)
+                )
+        if not geocode_result:
+            return None
+        return geocode_result[0]['geometry']['location']
+
+    def places_nearby(
+        self, location_coords: Dict[str, float], radius: int = 5000, type: str = None, keyword: str = None
+    ) -> List[Dict]:
+        """
+        Search for places around coordinates.
+
+        Args:
+            location_coords (dict): {"lat": ..., "lng": ...}
+            radius (int): Search radius in meters
+            type (str): Type of place to search for
+            keyword (str): Term matched against place names and content
+
+        Returns:
+            list: List of places found
+        """
+        if self.place_index is not None:
+            with timed("place_index"):
+                places = self.place_index.places_nearby(location_coords, radius, type, keyword)
+            if places is not None:
+                return places
+
+        # Only send keyword when set, so clients without keyword support keep working
+        extra = {"keyword": keyword} if keyword else {}
+        with timed("places_nearby"):
+            if self.cache is None:
+                places_result = self.client.places_nearby(location=location_coords, radius=radius, type=type, **extra)
+            else:
+                # Snap to the cache grid so nearby callers share one entry
+                rounded = self.cache.round_coordinates(location_coords)
+                places_result = self.cache.get_or_fetch(
+                    "nearby", self.cache.nearby_key(rounded, radius, type, keyword), PLACES_CACHE_TTL,
+                    lambda: self.client.places_nearby(location=rounded, radius=radius, type=type, **extra)
+                )
+        return places_result.get('results', [])
 
     def search_nearby(self, location: str, radius: int = 5000, type: str = None):
         """
         Search for places near a given location.
-        
+
         Args:
             location (str): Location to search around
             radius (int): Search radius in meters
             type (str): Type of place to search for
-            
+
         Returns:
             list: List of places found
         """
         try:
             # First, geocode the location to get coordinates
-            geocode_result = self.client.geocode(location)
-            if not geocode_result:
+            location_coords = self.geocode(location)
+            if not location_coords:
                 return []
-                
-            location_coords = geocode_result[0]['geometry']['location']
-            
+
             # Search for nearby places
-            places_result = self.client.places_nearby(
-                location=location_coords,
-                radius=radius,
-                type=type
-            )
-            
-            return places_result.get('results', [])
-            
+            return self.places_nearby(location_coords, radius=radius, type=type)
+
         except Exception as e:
             print(f"Error searching nearby places: {e}")
             return []
 
+    def _places_or_empty(self, location_coords: Dict[str, float], search: Dict) -> List[Dict]:
+        try:
+            return self.places_nearby(location_coords, **search)
+        except Exception as e:
+            print(f"Error searching nearby places: {e}")
+            return []
+
+    def search_nearby_many(
+        self, location: str, searches: List[Dict], location_coords: Optional[Dict[str, float]] = None
+    ) -> List[List[Dict]]:
+        """
+        Run several searches around one location, geocoding it once.
+
+        The searches run concurrently; one failing search doesn't affect the others.
+
+        Args:
+            location (str): Location to search around
+            searches (List[Dict]): places_nearby parameters (radius, type, keyword) per search
+            location_coords (dict): Coordinates of location if already geocoded
+
+        Returns:
+            List[List[Dict]]: Places found by each search, in order
+        """
+        if location_coords is None:
+            try:
+                location_coords = self.geocode(location)
+            except Exception as e:
+                print(f"Error searching nearby places: {e}")
+        if not location_coords:
+            return [[] for _ in searches]
+        if len(searches) == 1:
+            return [self._places_or_empty(location_coords, searches[0])]
+
+        return list(self._fanout_executor.map(
+            lambda search: self._places_or_empty(location_coords, search), searches
+        ))
+
+    def cache_stats(self):
+        """Return Maps cache hit-rate stats, or None if caching is disabled."""
+        if self.cache is None:
+            return None
+        return self.cache.stats()
+
     def get_place_details(self, place_id: str):
         """
         Get detailed information about a specific place.
-        
+
         Args:
             place_id (str): Google Places ID
-            
+
         Returns:
             dict: Place details
         """
         try:
-            return self.client.place(place_id)
+            with timed("place_details"):
+                return self.client.place(place_id)
         except Exception as e:
             print(f"Error getting place details: {e}")
-            return None 
\ No newline at end of file
+            return None
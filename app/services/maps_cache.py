@@ -0,0 +1,244 @@
+import asyncio
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class MemoryCacheBackend:
+    """
+    In-process LRU cache with per-entry expiry.
+
+    Cached values are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """On-disk cache backed by a single SQLite table of JSON values."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS maps_cache "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM maps_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO maps_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time() + ttl)
+            )
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """Delete expired rows and return how many were removed."""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM maps_cache WHERE expires_at < ?", (time.time(),))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class MapsCache:
+    """
+    Read-through cache for Maps API responses with request coalescing.
+
+    Concurrent misses for the same key share a single upstream call: the
+    first caller fetches, the rest wait for its result. Failed fetches are
+    not cached.
+    """
+
+    def __init__(self, backend, coordinate_precision: int = 3):
+        self.backend = backend
+        self.coordinate_precision = coordinate_precision
+        self._inflight = {}
+        self._async_inflight = {}
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: {"hits": 0, "misses": 0, "coalesced": 0, "errors": 0})
+
+    @staticmethod
+    def geocode_key(location: str) -> str:
+        return _WHITESPACE.sub(" ", location.casefold()).strip()
+
+    def round_coordinates(self, coords: Dict[str, float]) -> Dict[str, float]:
+        """Snap coordinates to the cache grid (3 decimals is roughly 100 m)."""
+        return {
+            "lat": round(float(coords["lat"]), self.coordinate_precision),
+            "lng": round(float(coords["lng"]), self.coordinate_precision),
+        }
+
+    def nearby_key(self, coords: Dict[str, float], radius: int, type: Optional[str], keyword: Optional[str] = None) -> str:
+        rounded = self.round_coordinates(coords)
+        return f"{rounded['lat']},{rounded['lng']}|{radius}|{type or ''}|{keyword or ''}"
+
+    def _count(self, namespace: str, field: str):
+        with self._lock:
+            self._stats[namespace][field] += 1
+
+    def get_or_fetch(self, namespace: str, key: str, ttl: float, fetch: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for key, calling fetch once on a miss.
+
+        Args:
+            namespace (str): Logical cache ("geocode", "nearby", ...), used for stats
+            key (str): Cache key within the namespace
+            ttl (float): Seconds to keep a fetched value
+            fetch (Callable): Performs the upstream call
+
+        Returns:
+            The cached or freshly fetched value
+        """
+        full_key = f"{namespace}:{key}"
+
+        value = self.backend.get(full_key)
+        if value is not None:
+            self._count(namespace, "hits")
+            return value
+
+        with self._lock:
+            flight = self._inflight.get(full_key)
+            leader = flight is None
+            if leader:
+                flight = Future()
+                self._inflight[full_key] = flight
+
+        if not leader:
+            self._count(namespace, "coalesced")
+            return flight.result()
+
+        self._count(namespace, "misses")
+        try:
+            value = fetch()
+            if value is not None:
+                self.backend.set(full_key, value, ttl)
+            flight.set_result(value)
+            return value
+        except Exception as e:
+            self._count(namespace, "errors")
+            flight.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[full_key]
+
+    async def get_or_fetch_async(self, namespace: str, key: str, ttl: float, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Async variant of get_or_fetch for coroutine-based clients.
+
+        Concurrent misses on the same event loop await a single fetch task.
+        """
+        full_key = f"{namespace}:{key}"
+
+        value = self.backend.get(full_key)
+        if value is not None:
+            self._count(namespace, "hits")
+            return value
+
+        loop = asyncio.get_running_loop()
+        flight = self._async_inflight.get((loop, full_key))
+        if flight is not None:
+            self._count(namespace, "coalesced")
+            return await asyncio.shield(flight)
+
+        async def leader():
+            try:
+                value = await fetch()
+                if value is not None:
+                    self.backend.set(full_key, value, ttl)
+                return value
+            except Exception:
+                self._count(namespace, "errors")
+                raise
+            finally:
+                self._async_inflight.pop((loop, full_key), None)
+
+        self._count(namespace, "misses")
+        flight = asyncio.ensure_future(leader())
+        self._async_inflight[(loop, full_key)] = flight
+        return await asyncio.shield(flight)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Return per-namespace hit, miss, coalesced and error counts plus hit rate."""
+        summary = {}
+        with self._lock:
+            snapshot = {namespace: dict(counts) for namespace, counts in self._stats.items()}
+        for namespace, counts in snapshot.items():
+            lookups = counts["hits"] + counts["misses"] + counts["coalesced"]
+            summary[namespace] = counts
+            # Coalesced callers were served without an upstream call of their own
+            summary[namespace]["hit_rate"] = (
+                (counts["hits"] + counts["coalesced"]) / lookups if lookups else 0.0
+            )
+        return summary
+
+
+def build_maps_cache(backend: str, path: str, max_entries: int, coordinate_precision: int) -> Optional[MapsCache]:
+    """
+    Create the configured Maps cache.
+
+    Args:
+        backend (str): "memory", "sqlite" or "none"
+        path (str): SQLite database path for the "sqlite" backend
+        max_entries (int): LRU capacity for the "memory" backend
+        coordinate_precision (int): Decimal places kept in nearby-search keys
+
+    Returns:
+        Optional[MapsCache]: The cache, or None when caching is disabled
+    """
+    if backend == "none":
+        return None
+    if backend == "memory":
+        return MapsCache(MemoryCacheBackend(max_entries), coordinate_precision)
+    if backend == "sqlite":
+        return MapsCache(SQLiteCacheBackend(path), coordinate_precision)
+    raise ValueError(f"Unknown Maps cache backend: {backend}")
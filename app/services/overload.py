@@ -0,0 +1,152 @@
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+
+class ServerOverloadedError(RuntimeError):
+    """Raised when the overload controller sheds a request."""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class OverloadController:
+    """
+    Tracks request pressure and picks how much work each request may do.
+
+    Pressure is the larger of in-flight requests over ``max_in_flight`` and
+    the recent p90 latency of model-backed requests over ``target_latency``.
+    Latency only counts once the window holds ``min_latency_samples``
+    requests, so one slow request on a quiet server degrades nothing.
+    As it rises past each threshold, new requests are degraded in steps:
+
+    - FULL: model prediction and Maps enrichment
+    - SKIP_MAPS: model prediction only; the response carries ``api_call``
+      but no Maps ``results``
+    - MODEL_FREE: no model run; the embedding cache or the keyword
+      fallback answers
+    - REJECT: ``ServerOverloadedError`` (503 with Retry-After)
+
+    Latencies older than ``window`` seconds are forgotten, so once the
+    backlog drains the controller steps back up to full service.
+    """
+
+    FULL, SKIP_MAPS, MODEL_FREE, REJECT = range(4)
+    LEVEL_NAMES = ("full", "skip_maps", "model_free", "reject")
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        target_latency: float,
+        skip_maps_at: float = 0.6,
+        model_free_at: float = 0.8,
+        reject_at: float = 1.0,
+        window: float = 2.0,
+        retry_after: int = 1,
+        min_latency_samples: int = 20,
+    ):
+        """
+        Args:
+            max_in_flight (int): In-flight requests that count as full pressure
+            target_latency (float): p90 latency, in seconds, that counts as full pressure
+            skip_maps_at (float): Pressure at which Maps enrichment is skipped
+            model_free_at (float): Pressure at which the model is no longer run
+            reject_at (float): Pressure at which requests are rejected
+            window (float): Seconds of latency history to consider
+            retry_after (int): Retry-After seconds sent with rejections
+            min_latency_samples (int): Requests the window must hold before
+                their latency adds to pressure
+        """
+        self.max_in_flight = max(1, max_in_flight)
+        self.target_latency = target_latency
+        self.thresholds = (skip_maps_at, model_free_at, reject_at)
+        self.window = window
+        self.retry_after = retry_after
+        self.min_latency_samples = max(1, min_latency_samples)
+        self.in_flight = 0
+        self.counts = {name: 0 for name in self.LEVEL_NAMES}
+        # (finished_at, seconds) of recent model-backed requests
+        self._latencies = deque(maxlen=512)
+        self._latency_p90 = 0.0
+        self._latency_samples = 0
+        self._latency_checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _recent_p90(self, now: float) -> float:
+        # Recomputed at most every 50ms; the sort is over at most 512 samples
+        if now - self._latency_checked_at >= 0.05:
+            while self._latencies and now - self._latencies[0][0] > self.window:
+                self._latencies.popleft()
+            ordered = sorted(seconds for _, seconds in self._latencies)
+            self._latency_p90 = ordered[int(0.9 * (len(ordered) - 1))] if ordered else 0.0
+            self._latency_samples = len(ordered)
+            self._latency_checked_at = now
+        return self._latency_p90
+
+    def pressure(self) -> float:
+        with self._lock:
+            return self._pressure(time.monotonic())
+
+    def _pressure(self, now: float) -> float:
+        p90 = self._recent_p90(now)
+        latency = 0.0
+        # Too few samples say more about one slow upstream call than about load
+        if self.target_latency > 0 and self._latency_samples >= self.min_latency_samples:
+            latency = p90 / self.target_latency
+        return max(self.in_flight / self.max_in_flight, latency)
+
+    def _level(self, pressure: float) -> int:
+        level = self.FULL
+        for threshold in self.thresholds:
+            if pressure >= threshold:
+                level += 1
+        return level
+
+    def acquire(self) -> int:
+        """
+        Admit a request and decide its service level.
+
+        Every admitted request must be paired with release().
+
+        Returns:
+            int: FULL, SKIP_MAPS or MODEL_FREE
+
+        Raises:
+            ServerOverloadedError: If pressure is at the rejection threshold
+        """
+        with self._lock:
+            pressure = self._pressure(time.monotonic())
+            level = self._level(pressure)
+            self.counts[self.LEVEL_NAMES[level]] += 1
+            if level == self.REJECT:
+                raise ServerOverloadedError(
+                    f"Shedding load (pressure {pressure:.2f})", retry_after=self.retry_after
+                )
+            self.in_flight += 1
+        return level
+
+    def release(self, level: int, seconds: Optional[float] = None):
+        """
+        Finish a request admitted by acquire().
+
+        Args:
+            level (int): Level returned by acquire()
+            seconds (float): Request latency; only model-backed requests feed the latency signal
+        """
+        with self._lock:
+            self.in_flight -= 1
+            if seconds is not None and level < self.MODEL_FREE:
+                self._latencies.append((time.monotonic(), seconds))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            pressure = self._pressure(time.monotonic())
+            return {
+                "in_flight": self.in_flight,
+                "pressure": pressure,
+                "level": self.LEVEL_NAMES[self._level(pressure)],
+                "latency_p90": self._latency_p90,
+                "requests": dict(self.counts),
+            }
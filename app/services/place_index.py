@@ -0,0 +1,357 @@
+"""
+Local geospatial index of place records for serving nearby searches.
+
+Places from licensed bulk exports, or Nearby Search results accumulated
+from the live API, are bucketed into a fixed lat/lng grid and stored sorted
+by cell key (row-major: ``row * columns + column``). The cells of one grid
+row inside a search's bounding box are contiguous in key order, so finding
+the candidates of a radius query is one binary search pair per row; type
+and distance filters are then vectorized over the candidates.
+
+On disk an index is a directory written by PlaceIndexWriter (see
+tools/build_place_index.py):
+
+- index.json: grid cell size, type names and place count
+- keys.npy, lat.npy, lng.npy, types.npy: per-place cell key, float32
+  coordinates and uint64 type bitmask (bit i is type_names[i])
+- record_starts.npy, record_lengths.npy: byte range of each place's JSON
+  record in records.bin
+- coverage_keys.npy, coverage_times.npy: cells the data is known to be
+  complete for, and when each was fetched
+
+Everything is memory-mapped on load. A search is only answered locally
+when every cell it touches is covered and fresher than ``max_age``, and it
+asks for no keyword and a type the index knows; otherwise
+PlaceIndex.places_nearby returns None and the caller goes to the live API.
+"""
+
+import json
+import math
+import mmap
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+INDEX_FILE = "index.json"
+INDEX_FORMAT_VERSION = 1
+# ~1.1km of latitude; a 5km search touches about 10 rows of 10 cells
+DEFAULT_CELL_SIZE = 0.01
+# Nearby Search returns at most 20 results per page
+PAGE_SIZE = 20
+MAX_TYPES = 64
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180.0
+
+_ARRAYS = ("keys", "lat", "lng", "types", "record_starts", "record_lengths", "coverage_keys", "coverage_times")
+
+
+def _grid(cell_size: float) -> Tuple[int, int]:
+    """Number of grid rows and columns."""
+    return int(math.ceil(180.0 / cell_size)), int(math.ceil(360.0 / cell_size))
+
+
+def cell_keys(lat: np.ndarray, lng: np.ndarray, cell_size: float) -> np.ndarray:
+    """Row-major grid cell key of each coordinate."""
+    rows, columns = _grid(cell_size)
+    row = np.clip(np.floor((np.asarray(lat, dtype=np.float64) + 90.0) / cell_size), 0, rows - 1)
+    column = np.clip(np.floor((np.asarray(lng, dtype=np.float64) + 180.0) / cell_size), 0, columns - 1)
+    return row.astype(np.int64) * columns + column.astype(np.int64)
+
+
+def _ranges(starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+    """Concatenation of arange(start, stop) for each pair, without a Python loop."""
+    counts = stops - starts
+    total = int(counts.sum())
+    if not total:
+        return np.zeros(0, dtype=np.int64)
+    return np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(total)
+
+
+class PlaceIndex:
+    """
+    Radius and type queries over a memory-mapped place index.
+
+    Args:
+        arrays (Dict[str, np.ndarray]): The index arrays (see module docstring)
+        records: Buffer holding the JSON records
+        type_names (List[str]): Type name of each bitmask bit
+        cell_size (float): Grid cell size in degrees
+        max_age (float): Seconds a covered cell stays fresh; None never expires
+    """
+
+    def __init__(
+        self,
+        arrays: Dict[str, np.ndarray],
+        records,
+        type_names: Sequence[str],
+        cell_size: float = DEFAULT_CELL_SIZE,
+        max_age: Optional[float] = None,
+    ):
+        for name in _ARRAYS:
+            setattr(self, name, arrays[name])
+        self.records = records
+        self.type_bits = {name: np.uint64(1 << i) for i, name in enumerate(type_names)}
+        self.cell_size = cell_size
+        self.columns = _grid(cell_size)[1]
+        self.max_age = max_age
+        self.stats = {"served": 0, "uncovered": 0, "stale": 0, "unsupported": 0}
+
+    @classmethod
+    def load(cls, path: str, max_age: Optional[float] = None, mmap_arrays: bool = True) -> "PlaceIndex":
+        """
+        Open an index directory written by PlaceIndexWriter.
+
+        Args:
+            path (str): Index directory
+            max_age (float): Seconds a covered cell stays fresh; None never expires
+            mmap_arrays (bool): Memory-map the arrays instead of reading them into memory
+
+        Returns:
+            PlaceIndex: The loaded index
+        """
+        with open(os.path.join(path, INDEX_FILE)) as f:
+            meta = json.load(f)
+        if meta.get("format_version") != INDEX_FORMAT_VERSION:
+            raise ValueError(f"Unsupported place index format: {meta.get('format_version')}")
+
+        mode = "r" if mmap_arrays else None
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode) for name in _ARRAYS}
+        records = b""
+        if os.path.getsize(os.path.join(path, "records.bin")):
+            with open(os.path.join(path, "records.bin"), "rb") as f:
+                records = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(arrays, records, meta["type_names"], meta["cell_size"], max_age)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _row_ranges(self, location_coords: Dict[str, float], radius: float) -> Optional[Tuple[np.ndarray, np.ndarray, int]]:
+        """First and last cell key of each grid row in the search's bounding box."""
+        lat, lng = float(location_coords["lat"]), float(location_coords["lng"])
+        lat_delta = radius / METERS_PER_DEGREE
+        lng_delta = radius / (METERS_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+        if abs(lat) + lat_delta > 90.0 or abs(lng) + lng_delta > 180.0:
+            # Boxes over a pole or the antimeridian are left to the live API
+            return None
+        first_row = int((lat - lat_delta + 90.0) // self.cell_size)
+        last_row = int((lat + lat_delta + 90.0) // self.cell_size)
+        first_column = int((lng - lng_delta + 180.0) // self.cell_size)
+        last_column = int((lng + lng_delta + 180.0) // self.cell_size)
+        rows = np.arange(first_row, last_row + 1, dtype=np.int64) * self.columns
+        return rows + first_column, rows + last_column, last_column - first_column + 1
+
+    def coverage(self, location_coords: Dict[str, float], radius: float) -> Optional[float]:
+        """
+        Oldest fetch time over the cells a search touches.
+
+        Returns:
+            float: Unix time, or None if any cell is not covered
+        """
+        ranges = self._row_ranges(location_coords, radius)
+        if ranges is None:
+            return None
+        first, last, width = ranges
+        starts = np.searchsorted(self.coverage_keys, first)
+        stops = np.searchsorted(self.coverage_keys, last, side="right")
+        if np.any(stops - starts != width):
+            return None
+        return float(self.coverage_times[_ranges(starts, stops)].min())
+
+    def query(
+        self, location_coords: Dict[str, float], radius: float, type: Optional[str] = None, limit: int = PAGE_SIZE
+    ) -> List[Dict]:
+        """
+        Places within radius meters of a point, nearest first, ignoring coverage.
+
+        Args:
+            location_coords (dict): {"lat": ..., "lng": ...}
+            radius (float): Search radius in meters
+            type (str): Only places with this type; must be in the index's type names
+            limit (int): Maximum number of places
+
+        Returns:
+            List[Dict]: Place records as stored
+        """
+        ranges = self._row_ranges(location_coords, radius)
+        if ranges is None:
+            raise ValueError("Search area crosses a pole or the antimeridian")
+        first, last, _ = ranges
+        candidates = _ranges(
+            np.searchsorted(self.keys, first), np.searchsorted(self.keys, last, side="right")
+        )
+        if type is not None and len(candidates):
+            candidates = candidates[(self.types[candidates] & self.type_bits[type]) != 0]
+        if not len(candidates):
+            return []
+
+        # Haversine distance from the search center
+        lat0, lng0 = math.radians(location_coords["lat"]), math.radians(location_coords["lng"])
+        lat = np.radians(self.lat[candidates].astype(np.float64))
+        lng = np.radians(self.lng[candidates].astype(np.float64))
+        h = np.sin((lat - lat0) / 2) ** 2 + math.cos(lat0) * np.cos(lat) * np.sin((lng - lng0) / 2) ** 2
+        distance = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(h, 1.0)))
+
+        within = np.nonzero(distance <= radius)[0]
+        if len(within) > limit:
+            within = within[np.argpartition(distance[within], limit - 1)[:limit]]
+        within = within[np.argsort(distance[within], kind="stable")]
+        rows = candidates[within]
+        starts, lengths = self.record_starts[rows], self.record_lengths[rows]
+        return [json.loads(self.records[start:start + length]) for start, length in zip(starts, lengths)]
+
+    def places_nearby(
+        self, location_coords: Dict[str, float], radius: int = 5000, type: str = None, keyword: str = None
+    ) -> Optional[List[Dict]]:
+        """
+        Answer a Nearby Search locally when the index can.
+
+        Takes the same arguments as GoogleMapsService.places_nearby. Results
+        are ordered by distance rather than prominence.
+
+        Returns:
+            list: Places found, or None if the search must go to the live API
+            (keyword searches, unknown types, and uncovered or stale cells)
+        """
+        if keyword or (type is not None and type not in self.type_bits):
+            self.stats["unsupported"] += 1
+            return None
+        fetched_at = self.coverage(location_coords, radius)
+        if fetched_at is None:
+            self.stats["uncovered"] += 1
+            return None
+        if self.max_age is not None and time.time() - fetched_at > self.max_age:
+            self.stats["stale"] += 1
+            return None
+        self.stats["served"] += 1
+        return self.query(location_coords, radius, type)
+
+
+class PlaceIndexWriter:
+    """
+    Streams place records into a new index directory.
+
+    Records are appended to records.bin as they arrive; only the per-place
+    arrays are held in memory until close() sorts them by cell and writes
+    the index. The first MAX_TYPES distinct place types get a bitmask bit;
+    searches for any other type are left to the live API.
+
+    Args:
+        path (str): Output directory
+        cell_size (float): Grid cell size in degrees
+        fetched_at (float): Unix time the records were fetched (default: now)
+    """
+
+    def __init__(self, path: str, cell_size: float = DEFAULT_CELL_SIZE, fetched_at: Optional[float] = None):
+        self.path = path
+        self.cell_size = cell_size
+        self.fetched_at = time.time() if fetched_at is None else fetched_at
+        self.type_names = []
+        self._type_bits = {}
+        self._chunks = []
+        self._covered = []
+        self._count = 0
+        self._offset = 0
+        os.makedirs(path, exist_ok=True)
+        self._records = open(os.path.join(path, "records.bin.tmp"), "wb")
+
+    def _type_mask(self, types: Iterable[str]) -> int:
+        mask = 0
+        for name in types:
+            bit = self._type_bits.get(name)
+            if bit is None and len(self.type_names) < MAX_TYPES:
+                bit = self._type_bits[name] = 1 << len(self.type_names)
+                self.type_names.append(name)
+            mask |= bit or 0
+        return mask
+
+    def add(self, place: Dict):
+        """Add one Places API result (needs geometry.location; types is optional)."""
+        location = place["geometry"]["location"]
+        self.add_many([location["lat"]], [location["lng"]], [place.get("types", ())],
+                      [json.dumps(place, separators=(",", ":")).encode("utf-8")])
+
+    def add_many(self, lat: Sequence[float], lng: Sequence[float], types: Sequence[Sequence[str]],
+                 records: Sequence[bytes]):
+        """
+        Add places from parallel sequences.
+
+        Args:
+            lat (Sequence[float]): Latitudes
+            lng (Sequence[float]): Longitudes
+            types (Sequence[Sequence[str]]): Place types of each place
+            records (Sequence[bytes]): Encoded JSON record of each place
+        """
+        lengths = np.fromiter((len(record) for record in records), dtype=np.int64, count=len(records))
+        starts = self._offset + np.cumsum(lengths) - lengths
+        self._records.write(b"".join(records))
+        self._offset += int(lengths.sum())
+        self._chunks.append((
+            np.asarray(lat, dtype=np.float32),
+            np.asarray(lng, dtype=np.float32),
+            np.fromiter((self._type_mask(place_types) for place_types in types), dtype=np.uint64, count=len(types)),
+            starts,
+            lengths.astype(np.uint32),
+        ))
+        self._count += len(records)
+
+    def cover(self, south: float, west: float, north: float, east: float, fetched_at: Optional[float] = None):
+        """Mark every cell of a bounding box as complete, e.g. the region of a bulk export."""
+        columns = _grid(self.cell_size)[1]
+        first, last = cell_keys([south, north], [west, east], self.cell_size)
+        row_range = np.arange(first // columns, last // columns + 1, dtype=np.int64)
+        column_range = np.arange(first % columns, last % columns + 1, dtype=np.int64)
+        keys = (row_range[:, None] * columns + column_range[None, :]).ravel()
+        self._covered.append((keys, np.full(len(keys), self.fetched_at if fetched_at is None else fetched_at)))
+
+    def close(self, cover_places: bool = False) -> int:
+        """
+        Sort, write the index files and return the number of places.
+
+        Args:
+            cover_places (bool): Also mark every cell containing a place as
+                complete, for every type. Only for exports known to hold every
+                place in those cells; search responses never are
+        """
+        self._records.close()
+        if self._chunks:
+            lat, lng, types, starts, lengths = (np.concatenate(parts) for parts in zip(*self._chunks))
+        else:
+            lat = lng = np.zeros(0, dtype=np.float32)
+            types, starts, lengths = np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.int64), np.zeros(0, np.uint32)
+        keys = cell_keys(lat, lng, self.cell_size)
+        order = np.argsort(keys, kind="stable")
+
+        covered = list(self._covered)
+        if cover_places:
+            place_cells = np.unique(keys)
+            covered.append((place_cells, np.full(len(place_cells), self.fetched_at)))
+        coverage_keys = np.concatenate([keys for keys, _ in covered]) if covered else np.zeros(0, np.int64)
+        coverage_times = np.concatenate([times for _, times in covered]) if covered else np.zeros(0)
+        # A cell covered more than once keeps its latest fetch time
+        by_time = np.lexsort((-coverage_times, coverage_keys))
+        coverage_keys, first = np.unique(coverage_keys[by_time], return_index=True)
+        coverage_times = coverage_times[by_time][first]
+
+        arrays = {
+            "keys": keys[order], "lat": lat[order], "lng": lng[order], "types": types[order],
+            "record_starts": starts[order], "record_lengths": lengths[order],
+            "coverage_keys": coverage_keys.astype(np.int64), "coverage_times": coverage_times.astype(np.float64),
+        }
+        # Write everything under temporary names first so readers never see a mix
+        for name, array in arrays.items():
+            with open(os.path.join(self.path, f"{name}.npy.tmp"), "wb") as f:
+                np.save(f, array)
+        meta = {
+            "format_version": INDEX_FORMAT_VERSION,
+            "count": self._count,
+            "cell_size": self.cell_size,
+            "type_names": self.type_names,
+            "fetched_at": self.fetched_at,
+        }
+        with open(os.path.join(self.path, INDEX_FILE + ".tmp"), "w") as f:
+            json.dump(meta, f, indent=2)
+        for name in [f"{name}.npy" for name in arrays] + ["records.bin", INDEX_FILE]:
+            os.replace(os.path.join(self.path, name + ".tmp"), os.path.join(self.path, name))
+        return self._count
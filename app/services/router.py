@@ -0,0 +1,119 @@
+"""
+Declarative routing from NLU predictions to Places searches.
+
+The routing table (routes.json, see MAPS_ROUTES_PATH) maps each classifier
+intent, and each "category" entity value from the gazetteer, to one or more
+Nearby Search specs::
+
+    {"type": "restaurant", "radius": 5000, "keyword_entity": "cuisine"}
+
+``radius`` defaults to the table's ``default_radius``. ``keyword`` is a
+fixed search keyword; ``keyword_entity`` takes the keyword from an entity
+of the query (e.g. "thai" for a cuisine) when present.
+
+Category entities are more specific than the coarse intent, so a query
+naming categories ("a pharmacy or a gym") is routed by those, one search
+per spec, and only queries without one fall back to the intent's route.
+The table is compiled once into dicts of immutable specs, so routing a
+request is a dictionary lookup per intent or category.
+"""
+
+import json
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+ROUTES_FORMAT_VERSION = 1
+
+
+class SearchSpec(NamedTuple):
+    type: Optional[str]
+    radius: int
+    keyword: Optional[str] = None
+    keyword_entity: Optional[str] = None
+
+
+class RoutingTable:
+    """
+    Compiled intent/category -> Places search mapping.
+
+    Args:
+        intents (Dict[str, Sequence[SearchSpec]]): Searches per classifier intent
+        categories (Dict[str, Sequence[SearchSpec]]): Searches per "category" entity value
+    """
+
+    def __init__(self, intents: Dict[str, Sequence[SearchSpec]], categories: Dict[str, Sequence[SearchSpec]]):
+        self.intents = {name: tuple(specs) for name, specs in intents.items()}
+        self.categories = {name: tuple(specs) for name, specs in categories.items()}
+
+    @classmethod
+    def from_dict(cls, config: Dict) -> "RoutingTable":
+        if config.get("version") != ROUTES_FORMAT_VERSION:
+            raise ValueError(f"Unsupported routing table version: {config.get('version')}")
+        default_radius = int(config.get("default_radius", 5000))
+
+        def compile_specs(section: str) -> Dict[str, Tuple[SearchSpec, ...]]:
+            compiled = {}
+            for name, specs in config.get(section, {}).items():
+                compiled[name] = tuple(
+                    SearchSpec(
+                        type=spec.get("type"),
+                        radius=int(spec.get("radius", default_radius)),
+                        keyword=spec.get("keyword"),
+                        keyword_entity=spec.get("keyword_entity"),
+                    )
+                    for spec in specs
+                )
+            return compiled
+
+        return cls(compile_specs("intents"), compile_specs("categories"))
+
+    @classmethod
+    def from_file(cls, path: str) -> "RoutingTable":
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    def missing_intents(self, labels: Iterable[str]) -> List[str]:
+        """Return classifier labels that have no route (their queries get no Maps results)."""
+        return [str(label) for label in labels if str(label) not in self.intents]
+
+    def route(self, intent: str, entities: Dict[str, str], categories: Sequence[str] = ()) -> List[Dict]:
+        """
+        Resolve the searches for one prediction.
+
+        Args:
+            intent (str): Predicted intent
+            entities (Dict[str, str]): Extracted entities (label -> value)
+            categories (Sequence[str]): Every "category" value mentioned in the query, in order
+
+        Returns:
+            List[Dict]: Distinct search parameters (type, radius, keyword), possibly empty
+        """
+        specs = []
+        for category in categories:
+            specs.extend(self.categories.get(category, ()))
+        if not specs:
+            specs = self.intents.get(intent, ())
+
+        searches, seen = [], set()
+        for spec in specs:
+            keyword = spec.keyword
+            if spec.keyword_entity and entities.get(spec.keyword_entity):
+                keyword = entities[spec.keyword_entity]
+            key = (spec.type, spec.radius, keyword)
+            if key not in seen:
+                seen.add(key)
+                searches.append({"type": spec.type, "radius": spec.radius, "keyword": keyword})
+        return searches
+
+
+def merge_places(result_lists: Iterable[List[Dict]]) -> List[Dict]:
+    """Concatenate search results, keeping the first occurrence of each place_id."""
+    merged, seen = [], set()
+    for results in result_lists:
+        for place in results:
+            place_id = place.get("place_id")
+            if place_id is not None:
+                if place_id in seen:
+                    continue
+                seen.add(place_id)
+            merged.append(place)
+    return merged
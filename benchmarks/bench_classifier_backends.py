@@ -0,0 +1,89 @@
+"""
+Compare the TensorFlow classifier with the exported NumPy classifier.
+
+Each backend runs in a fresh process so import time and memory are not
+shared: the child imports what the backend needs, loads the classifier,
+and times batch-1 and batch-32 forward passes. RSS is read after loading.
+Export the NumPy classifier first with tools/export_classifier.py.
+
+Usage:
+    python benchmarks/bench_classifier_backends.py [--iterations 500]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from common import ROOT, measure, summarize
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024.0
+    return 0.0
+
+
+def child(backend: str, iterations: int):
+    import numpy as np
+
+    baseline_rss = rss_mb()
+    started = time.perf_counter()
+    if backend == "numpy":
+        from app.config import NUMPY_CLASSIFIER_PATH
+        from app.models.numpy_classifier import NumpyClassifier
+        import_seconds = time.perf_counter() - started
+        model = NumpyClassifier.from_file(NUMPY_CLASSIFIER_PATH)
+        dim = model.input_dim
+    else:
+        import tensorflow as tf
+        from app.config import MODEL_PATH
+        import_seconds = time.perf_counter() - started
+        model = tf.keras.models.load_model(MODEL_PATH)
+        dim = model.input_shape[-1]
+    load_seconds = time.perf_counter() - started - import_seconds
+
+    from app.models.nlu_model import NLUModel
+    forward = NLUModel.build_forward_fn(model, dim, mode=backend)
+    loaded_rss = rss_mb()
+
+    rng = np.random.default_rng(0)
+    report = {
+        "import_s": import_seconds,
+        "load_s": load_seconds,
+        "rss_mb": loaded_rss,
+        "rss_delta_mb": loaded_rss - baseline_rss,
+    }
+    for batch in (1, 32):
+        x = rng.normal(size=(batch, dim)).astype(np.float32)
+        report[f"batch{batch}_p50_ms"] = summarize(measure(lambda: forward(x), iterations=iterations))["p50_ms"]
+    print(json.dumps(report))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.iterations)
+        return
+
+    columns = ["import_s", "load_s", "rss_mb", "rss_delta_mb", "batch1_p50_ms", "batch32_p50_ms"]
+    print(f"{'backend':<9}" + "".join(f"  {name:>14}" for name in columns))
+    for backend in ("compiled", "numpy"):
+        output = subprocess.run(
+            [sys.executable, __file__, "--child", backend, "--iterations", str(args.iterations)],
+            cwd=ROOT, capture_output=True, text=True, check=True, env=dict(os.environ)
+        ).stdout
+        report = json.loads(output.strip().splitlines()[-1])
+        print(f"{backend:<9}" + "".join(f"  {report[name]:>14.3f}" for name in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Entity extraction cost as the lexicon grows.
+
+Pads the shipped lexicon with synthetic phrases up to each target size and
+times extraction over a fixed query set. With the compiled trie the
+per-query cost should stay flat regardless of lexicon size.
+
+Usage:
+    python benchmarks/bench_entities.py [--sizes 100,1000,10000,50000] [--iterations 2000]
+"""
+
+import argparse
+import json
+import random
+import string
+
+from common import measure, print_table, summarize
+
+from app.models.entity_extractor import DEFAULT_LEXICON_PATH, GazetteerExtractor
+
+QUERIES = [
+    "I want mexican food near me",
+    "Show me nearby italian restaurants that are open now",
+    "Find me the closest gas station that's open now",
+    "Cheap sushi within 2 km open until 10",
+    "Looking a vegan-friendly place to eat in my neighborhood",
+    "Just a regular sentence",
+]
+
+
+def synthetic_lexicon(size: int, seed: int = 0):
+    with open(DEFAULT_LEXICON_PATH) as f:
+        lexicon = json.load(f)
+    rng = random.Random(seed)
+    phrases = lexicon["entities"].setdefault("synthetic", {}).setdefault("filler", [])
+    base = sum(len(p) for values in lexicon["entities"].values() for p in values.values())
+    for _ in range(max(0, size - base)):
+        words = rng.randint(1, 3)
+        phrases.append(" ".join(
+            "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9))) for _ in range(words)
+        ))
+    return lexicon
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="100,1000,10000,50000")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    results = {}
+    for size in (int(s) for s in args.sizes.split(",")):
+        extractor = GazetteerExtractor(synthetic_lexicon(size))
+        queries = iter(QUERIES * (args.iterations + 10))
+        results[f"{extractor.size} phrases"] = summarize(
+            measure(lambda: extractor.extract(next(queries)), iterations=args.iterations)
+        )
+
+    print(f"Per-query entity extraction, {args.iterations} iterations")
+    print_table(results)
+
+
+if __name__ == "__main__":
+    main()
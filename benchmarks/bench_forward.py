@@ -0,0 +1,39 @@
+"""
+Compare classifier forward-pass latency: Keras Model.predict vs the compiled
+tf.function path used by NLUModel.
+
+Usage:
+    python benchmarks/bench_forward.py [--iterations 500] [--batch-size 1]
+"""
+
+import argparse
+
+from common import measure, print_table, summarize
+
+from app.models.nlu_model import NLUModel
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=1)
+    args = parser.parse_args()
+
+    model = NLUModel()
+    texts = ["Show me nearby italian restaurants that are open now"] * args.batch_size
+    embeddings = model.encoder.encode(texts)
+    dim = embeddings.shape[1]
+
+    results = {}
+    for mode in ("keras", "compiled"):
+        forward = NLUModel.build_forward_fn(model.model, dim, mode=mode)
+        results[mode] = summarize(measure(lambda: forward(embeddings), iterations=args.iterations))
+
+    print(f"Classifier forward pass, batch size {args.batch_size}, {args.iterations} iterations")
+    print_table(results)
+    speedup = results["keras"]["p50_ms"] / max(results["compiled"]["p50_ms"], 1e-9)
+    print(f"p50 speedup: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
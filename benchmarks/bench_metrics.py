@@ -0,0 +1,79 @@
+"""
+Measure the overhead of the built-in metrics instrumentation.
+
+Times a bare block against the same block wrapped in timed(), with metrics
+on, off, and with a Server-Timing scope active, then renders /metrics once.
+With --model the full NLUModel.predict path is also compared with metrics
+enabled and disabled.
+
+Usage:
+    python benchmarks/bench_metrics.py [--iterations 100000] [--model]
+"""
+
+import argparse
+import time
+
+from common import measure, print_table, summarize
+
+import app.metrics as metrics
+from app.metrics import REGISTRY, end_request_timing, start_request_timing, timed
+
+# Stages recorded on one /query request (nlu, encode, classify, decode,
+# entities, maps, geocode, places_nearby)
+STAGES_PER_REQUEST = 8
+
+
+def bare():
+    pass
+
+
+def instrumented():
+    with timed("bench"):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=100000)
+    parser.add_argument("--model", action="store_true", help="Also benchmark NLUModel.predict end to end")
+    args = parser.parse_args()
+
+    results = {"bare block": summarize(measure(bare, iterations=args.iterations))}
+    results["timed()"] = summarize(measure(instrumented, iterations=args.iterations))
+
+    _, token = start_request_timing()
+    results["timed() + Server-Timing"] = summarize(measure(instrumented, iterations=args.iterations))
+    end_request_timing(token)
+
+    metrics.METRICS_ENABLED = False
+    results["timed(), metrics off"] = summarize(measure(instrumented, iterations=args.iterations))
+    metrics.METRICS_ENABLED = True
+
+    started = time.perf_counter()
+    REGISTRY.render()
+    render_ms = (time.perf_counter() - started) * 1000
+
+    print(f"Per-stage instrumentation cost, {args.iterations} iterations")
+    print_table(results)
+    per_stage_us = (results["timed()"]["mean_ms"] - results["bare block"]["mean_ms"]) * 1000
+    print(f"overhead per stage: {per_stage_us:.2f} us, per /query request (~{STAGES_PER_REQUEST} stages):"
+          f" {per_stage_us * STAGES_PER_REQUEST:.2f} us")
+    print(f"/metrics render: {render_ms:.2f} ms")
+
+    if args.model:
+        from app.models.nlu_model import NLUModel
+
+        model = NLUModel()
+        text = "Show me nearby italian restaurants that are open now"
+        end_to_end = {}
+        for enabled in (False, True):
+            metrics.METRICS_ENABLED = enabled
+            end_to_end[f"predict, metrics {'on' if enabled else 'off'}"] = summarize(
+                measure(lambda: model.predict(text), iterations=2000)
+            )
+        print()
+        print_table(end_to_end)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark: build time, size on disk and query latency of the local place index.
+
+Synthetic places are spread over --metros metro areas (Gaussian around each
+center, sigma --spread degrees) with one of 24 place types each, and each
+metro's box out to four sigma is marked covered, as for a bulk export of
+those metros. Queries are centered on random places,
+so they land where the data is dense. Each index size is built in a
+temporary directory, reopened memory-mapped and queried for radius-only
+and radius + type searches via PlaceIndex.places_nearby.
+
+Usage:
+    python benchmarks/bench_place_index.py [--sizes 1000000,10000000] [--metros 50]
+        [--spread 0.3] [--radius 1000,5000] [--iterations 2000]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from common import measure, print_table, summarize
+
+from app.services.place_index import PlaceIndex, PlaceIndexWriter
+
+TYPES = [
+    "restaurant", "cafe", "bar", "bakery", "store", "supermarket", "pharmacy", "gym", "park", "bank",
+    "atm", "gas_station", "hospital", "school", "library", "museum", "movie_theater", "hotel",
+    "parking", "train_station", "subway_station", "bus_station", "clothing_store", "book_store",
+]
+
+
+def build(path, count, metros, spread, chunk_size=200000, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = np.column_stack([rng.uniform(-45, 60, metros), rng.uniform(-120, 140, metros)])
+    writer = PlaceIndexWriter(path)
+    for start in range(0, count, chunk_size):
+        size = min(chunk_size, count - start)
+        metro = rng.integers(0, metros, size)
+        lat = centers[metro, 0] + rng.normal(0, spread, size)
+        lng = centers[metro, 1] + rng.normal(0, spread, size)
+        kinds = rng.integers(0, len(TYPES), size)
+        records = [
+            b'{"place_id":"p%d","name":"Place %d","types":["%s"],"geometry":{"location":{"lat":%.6f,"lng":%.6f}}}'
+            % (start + i, start + i, TYPES[kind].encode(), la, ln)
+            for i, (kind, la, ln) in enumerate(zip(kinds.tolist(), lat.tolist(), lng.tolist()))
+        ]
+        writer.add_many(lat, lng, [(TYPES[kind],) for kind in kinds.tolist()], records)
+    for lat, lng in centers:
+        writer.cover(lat - 4 * spread, lng - 4 * spread, lat + 4 * spread, lng + 4 * spread)
+    writer.close()
+
+
+def disk_size_mb(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)) / 1e6
+
+
+def run(args):
+    sizes = [int(size) for size in args.sizes.split(",")]
+    radii = [int(radius) for radius in args.radius.split(",")]
+    results = {}
+    for count in sizes:
+        path = tempfile.mkdtemp(prefix="place_index_")
+        try:
+            started = time.perf_counter()
+            build(path, count, args.metros, args.spread)
+            build_seconds = time.perf_counter() - started
+            started = time.perf_counter()
+            index = PlaceIndex.load(path)
+            load_ms = (time.perf_counter() - started) * 1000
+            print(f"{count:,} places: built in {build_seconds:.1f}s, {disk_size_mb(path):.0f} MB on disk, "
+                  f"opened in {load_ms:.2f}ms")
+
+            rng = np.random.default_rng(1)
+            rows = rng.integers(0, len(index), args.iterations)
+            centers = [{"lat": float(index.lat[row]), "lng": float(index.lng[row])} for row in rows]
+            for radius in radii:
+                for type in (None, "cafe"):
+                    queue = iter(centers * 2)
+                    found = []
+                    index.stats = dict.fromkeys(index.stats, 0)
+
+                    def query():
+                        found.append(len(index.places_nearby(next(queue), radius, type) or ()))
+
+                    samples = summarize(measure(query, args.iterations))
+                    name = f"{count // 1000000}M r={radius}m {type or 'any'}"
+                    results[name] = samples
+                    print(f"{name}: {np.mean(found):.1f} results on average, {index.stats}")
+            del index
+        finally:
+            shutil.rmtree(path)
+    print_table(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="1000000,10000000", help="Comma-separated place counts")
+    parser.add_argument("--metros", type=int, default=50)
+    parser.add_argument("--spread", type=float, default=0.3, help="Metro radius (standard deviation) in degrees")
+    parser.add_argument("--radius", default="1000,5000", help="Comma-separated search radii in meters")
+    parser.add_argument("--iterations", type=int, default=2000)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+End-to-end /query latency with and without speculative geocoding.
+
+Maps requests go over HTTP to a local fake Maps server that delays every
+response by --maps-latency-ms, through the async Maps client with caching
+disabled, and every inference call is padded by --service-ms. Each corpus
+query is sent with its location (or --location) once with the geocode
+started after inference and once with it running alongside inference.
+Queries whose prediction needs no Places search are reported separately,
+since for them the speculative geocode is discarded.
+
+Usage:
+    python benchmarks/bench_speculative_geocode.py [--requests 200]
+        [--service-ms 30] [--maps-latency-ms 40] [--location "San Francisco"]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import httpx
+
+# suite sets up an offline environment (no Maps cache, no warm embedding cache) on import
+from suite import DEFAULT_CORPUS, load_corpus
+from common import print_table, summarize
+
+from app.main import app, api_builder
+from app.services.async_google_maps import AsyncGoogleMapsService
+
+
+class FakeMapsServer:
+    """Local HTTP server answering geocode and nearby-search requests after a fixed delay."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                time.sleep(fake.delay)
+                path = urlsplit(self.path).path
+                if path.endswith("/geocode/json"):
+                    body = {"status": "OK", "results": [{"geometry": {"location": {"lat": 37.77, "lng": -122.42}}}]}
+                else:
+                    body = {"status": "OK", "results": [{"place_id": f"place-{i}", "name": f"place {i}"}
+                                                        for i in range(5)]}
+                data = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+async def run(args):
+    corpus = [(query, location or args.location) for query, location in load_corpus(args.corpus)]
+    server = FakeMapsServer(args.maps_latency_ms / 1000.0)
+    api_builder.async_google_maps = AsyncGoogleMapsService(
+        api_key="bench-key", base_url=server.url, cache=None, rate_limit_qps=1e6, rate_limit_burst=1e6
+    )
+    api_builder.overload = None
+    # Disable the embedding cache so every request pays for the model
+    api_builder.nlu_model.embedding_cache = None
+
+    predict = api_builder.nlu_model.predict
+
+    def padded_predict(*a, **kw):
+        time.sleep(args.service_ms / 1000.0)
+        return predict(*a, **kw)
+    api_builder.nlu_model.predict = padded_predict
+
+    rng = random.Random(0)
+    requests = [rng.choice(corpus) for _ in range(args.requests)]
+    results = {}
+    async with httpx.AsyncClient(app=app, base_url="http://bench", timeout=60) as client:
+        for name, speculative in (("sequential", False), ("speculative", True)):
+            api_builder.speculative_geocode = speculative
+            timings = {"search": [], "no search": []}
+            for query, location in requests[:10]:
+                await client.post("/query", json={"query": query, "location": location})
+            for query, location in requests:
+                started = time.perf_counter()
+                response = await client.post("/query", json={"query": query, "location": location})
+                elapsed = time.perf_counter() - started
+                response.raise_for_status()
+                timings["search" if response.json()["api_call"] else "no search"].append(elapsed)
+            for kind, samples in timings.items():
+                if samples:
+                    results[f"/query {name} ({kind})"] = summarize(samples)
+
+    print(f"inference padded by {args.service_ms:g}ms, Maps latency {args.maps_latency_ms:g}ms")
+    print_table(results)
+    print(f"speculative geocodes: {api_builder.speculation_stats}")
+    server.server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--service-ms", type=float, default=30.0, help="Padding added to every inference call")
+    parser.add_argument("--maps-latency-ms", type=float, default=40.0, help="Delay of every fake Maps response")
+    parser.add_argument("--location", default="San Francisco", help="Location for corpus queries without one")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
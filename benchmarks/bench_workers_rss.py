@@ -0,0 +1,123 @@
+"""
+Compare per-worker memory and throughput: every worker loading its own
+NLUModel vs workers sharing one inference sidecar over a Unix socket.
+
+Each worker process runs the same query loop; RSS is read from
+/proc/<pid>/status after the loop. The workers start the loop together once
+every one of them has loaded, and throughput is the total query count over
+the parent's wall time from that start to the last worker finishing.
+
+Usage:
+    python benchmarks/bench_workers_rss.py [--workers 4] [--queries 200]
+"""
+
+import argparse
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import ROOT
+
+QUERIES = [
+    "I want mexican food near me",
+    "Where can I find a pharmacy?",
+    "Show me nearby parks",
+    "Find me the closest gas station that's open now",
+    "What's the best coffee shop around here?",
+]
+# Seconds a worker may take to load its model (or reach the sidecar)
+LOAD_TIMEOUT = 600
+
+
+def rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024.0
+    return 0.0
+
+
+def worker(layout: str, socket_path: str, queries: int, ready, start, results):
+    sys.path.insert(0, ROOT)
+    if layout == "in-process":
+        from app.models.nlu_model import NLUModel
+        model = NLUModel()
+    else:
+        from app.models.inference_server import RemoteNLUModel
+        model = RemoteNLUModel(socket_path)
+        while not model.is_ready:
+            time.sleep(0.1)
+
+    ready.put(os.getpid())
+    start.wait()
+    for i in range(queries):
+        # Vary the text so the embedding cache doesn't hide the model cost
+        model.predict(f"{QUERIES[i % len(QUERIES)]} #{os.getpid()}-{i}")
+    results.put((rss_mb(os.getpid()), queries))
+
+
+def run_layout(layout: str, workers: int, queries: int):
+    socket_path = os.path.join(tempfile.mkdtemp(prefix="nlu"), "s")
+    sidecar = None
+    if layout == "sidecar":
+        sidecar = subprocess.Popen(
+            [sys.executable, "-m", "app.models.inference_server", "--socket", socket_path],
+            cwd=ROOT, stdout=subprocess.DEVNULL
+        )
+
+    ctx = multiprocessing.get_context("spawn")
+    ready, start, results = ctx.Queue(), ctx.Event(), ctx.Queue()
+    processes = [
+        ctx.Process(target=worker, args=(layout, socket_path, queries, ready, start, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    # Wait until every worker has finished loading, then release them together
+    for _ in processes:
+        ready.get(timeout=LOAD_TIMEOUT)
+    start.set()
+    started = time.perf_counter()
+    reports = [results.get() for _ in processes]
+    wall = time.perf_counter() - started
+    for process in processes:
+        process.join()
+
+    sidecar_rss = 0.0
+    if sidecar is not None:
+        sidecar_rss = rss_mb(sidecar.pid)
+        sidecar.terminate()
+        sidecar.wait()
+
+    worker_rss = [rss for rss, _ in reports]
+    total_queries = sum(count for _, count in reports)
+    return {
+        "worker_rss_mb": sum(worker_rss) / len(worker_rss),
+        "sidecar_rss_mb": sidecar_rss,
+        "total_rss_mb": sum(worker_rss) + sidecar_rss,
+        "throughput_qps": total_queries / wall,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=200, help="Queries per worker")
+    args = parser.parse_args()
+
+    print(f"{args.workers} workers x {args.queries} queries")
+    print(f"{'layout':<12}  {'worker_rss_mb':>13}  {'sidecar_rss_mb':>14}  {'total_rss_mb':>12}  {'qps':>8}")
+    for layout in ("in-process", "sidecar"):
+        r = run_layout(layout, args.workers, args.queries)
+        print(
+            f"{layout:<12}  {r['worker_rss_mb']:>13.1f}  {r['sidecar_rss_mb']:>14.1f}"
+            f"  {r['total_rss_mb']:>12.1f}  {r['throughput_qps']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
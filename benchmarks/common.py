@@ -0,0 +1,56 @@
+"""
+Shared helpers for the benchmark scripts.
+"""
+
+import os
+import sys
+import time
+from typing import Callable, Dict, List
+
+# Make the app package importable when running `python benchmarks/<script>.py`
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(fn: Callable[[], object], iterations: int = 200, warmup: int = 10) -> List[float]:
+    """Call fn repeatedly and return the per-call wall time in seconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Summarize per-call timings in milliseconds."""
+    return {
+        "count": len(samples),
+        "mean_ms": (sum(samples) / len(samples) * 1000) if samples else 0.0,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+    }
+
+
+def print_table(results: Dict[str, Dict[str, float]]):
+    """Print a name -> summary mapping as an aligned table."""
+    width = max(len(name) for name in results)
+    print(f"{'case':<{width}}  {'mean_ms':>9}  {'p50_ms':>9}  {'p95_ms':>9}  {'p99_ms':>9}")
+    for name, summary in results.items():
+        print(
+            f"{name:<{width}}  {summary['mean_ms']:>9.3f}  {summary['p50_ms']:>9.3f}"
+            f"  {summary['p95_ms']:>9.3f}  {summary['p99_ms']:>9.3f}"
+        )
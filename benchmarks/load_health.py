@@ -0,0 +1,90 @@
+"""
+Load test: keep /health fast while the /query inference path is saturated.
+
+Floods /query with more concurrent requests than the inference pool can run
+and probes /health at a fixed interval, all through the in-process ASGI app.
+Maps calls go to a local fake with --maps-latency-ms of delay and the
+overload controller is disabled, so the numbers are the inference pool's.
+Reports /health latency percentiles and the /query status-code mix
+(200 served, 503 shed by the bounded pool, 504 timed out).
+
+Usage:
+    python benchmarks/load_health.py [--concurrency 64] [--duration 10]
+        [--extra-latency-ms 0] [--maps-latency-ms 50]
+"""
+
+import argparse
+import asyncio
+import time
+from collections import Counter
+
+import httpx
+
+from common import print_table, summarize
+from suite import FakeMapsClient
+
+from app.main import app, api_builder
+from app.services.google_maps import GoogleMapsService
+
+
+async def flood(client, stop_at, statuses):
+    while time.monotonic() < stop_at:
+        response = await client.post("/query", json={"query": "Show me nearby italian restaurants"})
+        statuses[response.status_code] += 1
+        if response.status_code == 503:
+            await asyncio.sleep(0.01)
+
+
+async def probe(client, stop_at, interval, samples):
+    while time.monotonic() < stop_at:
+        started = time.perf_counter()
+        response = await client.get("/health")
+        samples.append(time.perf_counter() - started)
+        assert response.status_code == 200
+        await asyncio.sleep(interval)
+
+
+async def run(args):
+    api_builder.google_maps = GoogleMapsService(client=FakeMapsClient(args.maps_latency_ms / 1000.0), cache=None)
+    api_builder.async_google_maps = None
+    # Shedding must come from the bounded pool, not the overload controller
+    api_builder.overload = None
+    if args.extra_latency_ms:
+        # Emulate a slower CPU by padding every inference call
+        predict = api_builder.nlu_model.predict
+
+        def slow_predict(*a, **kw):
+            time.sleep(args.extra_latency_ms / 1000.0)
+            return predict(*a, **kw)
+        api_builder.nlu_model.predict = slow_predict
+
+    async with httpx.AsyncClient(app=app, base_url="http://bench", timeout=60) as client:
+        idle = []
+        await probe(client, time.monotonic() + 1.0, args.probe_interval, idle)
+
+        loaded, statuses = [], Counter()
+        stop_at = time.monotonic() + args.duration
+        await asyncio.gather(
+            probe(client, stop_at, args.probe_interval, loaded),
+            *(flood(client, stop_at, statuses) for _ in range(args.concurrency))
+        )
+
+    print(f"/query concurrency {args.concurrency} for {args.duration:g}s, "
+          f"inference pool {api_builder.inference_executor.max_workers} workers / "
+          f"{api_builder.inference_executor.max_pending} pending")
+    print_table({"/health idle": summarize(idle), "/health under load": summarize(loaded)})
+    print("/query status codes:", dict(sorted(statuses.items())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--probe-interval", type=float, default=0.05)
+    parser.add_argument("--extra-latency-ms", type=float, default=0.0)
+    parser.add_argument("--maps-latency-ms", type=float, default=50.0, help="Delay of the fake Maps client")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Load test: tail latency of /query at twice its capacity, with and without
+the overload controller.
+
+Every inference call is padded by --service-ms so the inference pool has a
+known, CPU-independent capacity, and Maps searches go to a fake client
+with --maps-latency-ms of delay. The script first measures capacity with a
+closed loop, then sends an open-loop Poisson stream of /query requests at
+--load-factor times that rate, once with overload control disabled and
+once enabled. It reports latency percentiles of answered requests and the
+mix of full, degraded and rejected responses.
+
+Usage:
+    python benchmarks/load_overload.py [--load-factor 2] [--duration 10]
+        [--service-ms 20] [--maps-latency-ms 50] [--max-in-flight 64] [--target-latency-ms 250]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+
+import httpx
+
+# suite sets up an offline environment (sync Maps client, no Maps cache) on import
+from suite import DEFAULT_CORPUS, FakeMapsClient, load_corpus
+from common import print_table, summarize
+
+from app.main import app, api_builder
+from app.services.google_maps import GoogleMapsService
+from app.services.overload import OverloadController
+
+
+async def post(client, query, location, latencies, outcomes):
+    started = time.perf_counter()
+    response = await client.post("/query", json={"query": query, "location": location})
+    elapsed = time.perf_counter() - started
+    if response.status_code == 200:
+        latencies.append(elapsed)
+        outcomes[response.json().get("degraded") or "full"] += 1
+    else:
+        outcomes[str(response.status_code)] += 1
+
+
+async def measure_capacity(client, corpus, concurrency, duration):
+    """Closed-loop throughput of /query in requests per second."""
+    stop_at = time.monotonic() + duration
+    completed = 0
+
+    async def worker():
+        nonlocal completed
+        while time.monotonic() < stop_at:
+            query, location = random.choice(corpus)
+            response = await client.post("/query", json={"query": query, "location": location})
+            if response.status_code == 200:
+                completed += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return completed / (time.perf_counter() - started)
+
+
+async def open_loop(client, corpus, rate, duration):
+    """Send requests at Poisson arrivals of `rate` per second, regardless of completions."""
+    latencies, outcomes, tasks = [], Counter(), []
+    stop_at = time.monotonic() + duration
+    while time.monotonic() < stop_at:
+        query, location = random.choice(corpus)
+        tasks.append(asyncio.ensure_future(post(client, query, location, latencies, outcomes)))
+        await asyncio.sleep(random.expovariate(rate))
+    await asyncio.gather(*tasks)
+    return latencies, outcomes
+
+
+async def run(args):
+    corpus = load_corpus(args.corpus)
+    api_builder.google_maps = GoogleMapsService(client=FakeMapsClient(args.maps_latency_ms / 1000.0), cache=None)
+    # The async client would bypass the fake and call the live API
+    api_builder.async_google_maps = None
+    # Disable the embedding cache so every full request pays for the model
+    api_builder.nlu_model.embedding_cache = None
+
+    predict = api_builder.nlu_model.predict
+
+    def padded_predict(*a, **kw):
+        time.sleep(args.service_ms / 1000.0)
+        return predict(*a, **kw)
+    api_builder.nlu_model.predict = padded_predict
+
+    controller = OverloadController(args.max_in_flight, args.target_latency_ms / 1000.0)
+    workers = api_builder.inference_executor.max_workers
+
+    async with httpx.AsyncClient(app=app, base_url="http://bench", timeout=60) as client:
+        api_builder.overload = None
+        capacity = await measure_capacity(client, corpus, workers * 2, args.calibrate)
+        rate = capacity * args.load_factor
+        print(f"capacity {capacity:.1f} req/s with {workers} inference workers; "
+              f"offering {rate:.1f} req/s for {args.duration:g}s")
+
+        results, mixes = {}, {}
+        for name, overload in (("without control", None), ("with control", controller)):
+            api_builder.overload = overload
+            latencies, outcomes = await open_loop(client, corpus, rate, args.duration)
+            results[f"/query {name}"] = summarize(latencies)
+            mixes[name] = dict(sorted(outcomes.items()))
+            # Let the backlog drain before the next run
+            await asyncio.sleep(1.0)
+
+    print_table(results)
+    for name, mix in mixes.items():
+        print(f"{name}: {mix}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--load-factor", type=float, default=2.0, help="Offered load as a multiple of capacity")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--calibrate", type=float, default=3.0, help="Seconds spent measuring capacity")
+    parser.add_argument("--service-ms", type=float, default=20.0, help="Padding added to every inference call")
+    parser.add_argument("--maps-latency-ms", type=float, default=50.0)
+    parser.add_argument("--max-in-flight", type=int, default=64, help="Controller in-flight limit")
+    parser.add_argument("--target-latency-ms", type=float, default=250.0, help="Controller p90 latency target")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
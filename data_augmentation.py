@@ -1,128 +1,269 @@
 import pandas as pd
-import numpy as np
-from transformers import pipeline
-from googletrans import Translator
-import random
 from tqdm import tqdm
-import os
+import argparse
 import asyncio
-import time
-from tenacity import retry, stop_after_attempt, wait_exponential
+import contextlib
+import csv
+import inspect
+import json
+import os
+import random
+
+from app.rate_limit import TokenBucket
+from data_dedup import deduplicate_file, normalize_text
+
+PARAPHRASE_MODEL = "humarin/chatgpt_paraphraser_on_T5_base"
+LANGUAGES = ['fr', 'de', 'es', 'it', 'nl']  # Intermediate languages
+
+# Created on first use so importing this module (e.g. in tests) loads no models
+_paraphraser = None
+_translator = None
+
+def get_paraphraser():
+    """Load the T5 paraphraser."""
+    global _paraphraser
+    if _paraphraser is None:
+        from transformers import pipeline
+        _paraphraser = pipeline("text2text-generation", model=PARAPHRASE_MODEL)
+    return _paraphraser
+
+def get_translator():
+    """Create the Google translator."""
+    global _translator
+    if _translator is None:
+        from googletrans import Translator
+        _translator = Translator()
+    return _translator
 
-# Initialize the paraphraser and translator
-paraphraser = pipeline("text2text-generation", model="humarin/chatgpt_paraphraser_on_T5_base")
-translator = Translator()
+def paraphrase_batch(texts, num_paraphrases=2, paraphraser=None, batch_size=16):
+    """
+    Generate paraphrases for many texts in one pipeline call.
 
-def paraphrase_text(text, num_paraphrases=2):
+    Args:
+        texts (list): Input sentences
+        num_paraphrases (int): Paraphrases per sentence (num_return_sequences)
+        paraphraser: text2text-generation pipeline; the T5 paraphraser if omitted
+        batch_size (int): Sentences per forward pass inside the pipeline
+
+    Returns:
+        list: One list of paraphrases per input sentence
+    """
+    texts = list(texts)
+    if not texts or num_paraphrases <= 0:
+        return [[] for _ in texts]
+    paraphraser = paraphraser or get_paraphraser()
+    outputs = paraphraser(
+        texts,
+        max_length=max(len(text) for text in texts) + 20,
+        do_sample=True,
+        num_return_sequences=num_paraphrases,
+        batch_size=batch_size,
+    )
+    # With several return sequences each input maps to a list of candidates
+    return [
+        [candidate['generated_text'] for candidate in (output if isinstance(output, list) else [output])]
+        for output in outputs
+    ]
+
+def paraphrase_text(text, num_paraphrases=2, paraphraser=None):
     """Generate paraphrases of the input text using T5 model."""
-    paraphrases = []
-    for _ in range(num_paraphrases):
-        result = paraphraser(text, max_length=len(text) + 20, do_sample=True)[0]['generated_text']
-        paraphrases.append(result)
-    return paraphrases
-
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-async def translate_with_retry(text, dest_lang):
-    """Translate text with retry logic and delay."""
-    await asyncio.sleep(1)  # Add delay between requests
-    return await translator.translate(text, dest=dest_lang)
-
-async def back_translate(text, num_translations=2):
-    """Generate variations through back-translation."""
-    variations = []
-    languages = ['fr', 'de', 'es', 'it', 'nl']  # Intermediate languages
-    
-    for _ in range(num_translations):
+    return paraphrase_batch([text], num_paraphrases, paraphraser)[0]
+
+async def translate_with_retry(text, dest_lang, translator=None, limiter=None, attempts=3, backoff=4.0):
+    """
+    Translate text behind the rate limiter, retrying with exponential backoff.
+
+    Works with both the synchronous googletrans 3.x API (run in a worker
+    thread) and async translators.
+    """
+    translator = translator or get_translator()
+    for attempt in range(attempts):
+        if limiter is not None:
+            await limiter.acquire()
         try:
-            # Randomly select an intermediate language
-            intermediate_lang = random.choice(languages)
-            
-            # Translate to intermediate language
-            intermediate = await translate_with_retry(text, intermediate_lang)
-            
-            # Add delay between translations
-            # await asyncio.sleep(0.1)
-            
-            # Translate back to English
-            back_translated = await translate_with_retry(intermediate.text, 'en')
-            
-            variations.append(back_translated.text)
-        except Exception as e:
-            print(f"Error during back-translation: {str(e)}")
-            continue
-    
+            if inspect.iscoroutinefunction(translator.translate):
+                return await translator.translate(text, dest=dest_lang)
+            return await asyncio.to_thread(translator.translate, text, dest=dest_lang)
+        except Exception:
+            if attempt == attempts - 1:
+                raise
+            await asyncio.sleep(min(backoff * 2 ** attempt, 10.0) * random.uniform(0.5, 1.0))
+
+async def back_translate(text, num_translations=2, translator=None, limiter=None, semaphore=None):
+    """Generate variations through back-translation, all variants concurrently."""
+    async def variant():
+        # Randomly select an intermediate language
+        intermediate_lang = random.choice(LANGUAGES)
+        async with semaphore or contextlib.nullcontext():
+            intermediate = await translate_with_retry(text, intermediate_lang, translator, limiter)
+            back_translated = await translate_with_retry(intermediate.text, 'en', translator, limiter)
+        return back_translated.text
+
+    variations = []
+    for result in await asyncio.gather(*(variant() for _ in range(num_translations)), return_exceptions=True):
+        if isinstance(result, Exception):
+            print(f"Error during back-translation: {str(result)}")
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            variations.append(result)
     return variations
 
-def save_progress(queries, intents, output_file):
-    """Save current progress to CSV file."""
-    df = pd.DataFrame({
-        'sentence': queries,
-        'label': intents
-    })
-    df.to_csv(output_file, index=False)
-    print(f"\nProgress saved: {len(queries)} items processed")
-
-async def augment_dataset(input_file, output_file, num_paraphrases=2, num_translations=2, save_interval=100):
-    """Augment the dataset using paraphrasing and back-translation."""
-    # Read the original dataset
-    df = pd.read_csv(input_file)
-    
-    # Create lists to store augmented data
-    augmented_queries = []
-    augmented_intents = []
-    
-    # Progress bar
-    pbar = tqdm(total=len(df), desc="Augmenting dataset")
-    
-    # Process each row
-    for idx, row in df.iterrows():
-        try:
-            query = row['sentence']
-            intent = row['label']
-            
-            # Generate paraphrases
-            paraphrases = paraphrase_text(query, num_paraphrases)
-            
-            # Generate back-translations
-            translations = await back_translate(query, num_translations)
-            
-            # Add original data
-            augmented_queries.append(query)
-            augmented_intents.append(intent)
-            
-            # Add paraphrases
-            for paraphrase in paraphrases:
-                augmented_queries.append(paraphrase)
-                augmented_intents.append(intent)
-            
-            # Add back-translations
-            for translation in translations:
-                augmented_queries.append(translation)
-                augmented_intents.append(intent)
-            
-            # Save progress periodically
-            if (idx + 1) % save_interval == 0:
-                save_progress(augmented_queries, augmented_intents, output_file)
-            
-            pbar.update(1)
-            
-        except Exception as e:
-            print(f"\nError processing row {idx}: {str(e)}")
-            # Save progress even if there's an error
-            save_progress(augmented_queries, augmented_intents, output_file)
-            continue
-    
+def checkpoint_path(output_file):
+    return output_file + ".progress"
+
+def load_checkpoint(output_file):
+    """Return (input rows done, output bytes written) from the last checkpoint."""
+    path = checkpoint_path(output_file)
+    if not (os.path.exists(path) and os.path.exists(output_file)):
+        return 0, 0
+    with open(path) as f:
+        state = json.load(f)
+    return state["input_rows"], state["output_bytes"]
+
+def save_checkpoint(output_file, input_rows, output_bytes):
+    """Atomically record how far the run has got."""
+    path = checkpoint_path(output_file)
+    with open(path + ".tmp", "w") as f:
+        json.dump({"input_rows": input_rows, "output_bytes": output_bytes}, f)
+    os.replace(path + ".tmp", path)
+
+def _paraphrase_or_skip(texts, num_paraphrases, paraphraser, batch_size):
+    try:
+        return paraphrase_batch(texts, num_paraphrases, paraphraser, batch_size)
+    except Exception as e:
+        print(f"\nError paraphrasing batch: {str(e)}")
+        return [[] for _ in texts]
+
+async def augment_dataset(
+    input_file,
+    output_file,
+    num_paraphrases=2,
+    num_translations=2,
+    batch_size=16,
+    max_concurrency=8,
+    rate_limit=5.0,
+    resume=True,
+    paraphraser=None,
+    translator=None,
+):
+    """
+    Augment the dataset using paraphrasing and back-translation.
+
+    The input CSV is streamed in batches. Each batch is paraphrased in one
+    pipeline call (in a worker thread) while its back-translations run as
+    concurrent tasks, at most max_concurrency at a time and rate_limit
+    translation requests per second. Rows are appended to output_file and a
+    checkpoint (output_file + ".progress") records how far the run got, so
+    an interrupted run picks up after the last completed batch.
+
+    Args:
+        input_file (str): CSV with 'sentence' and 'label' columns
+        output_file (str): Augmented CSV to append to
+        num_paraphrases (int): Paraphrases per sentence
+        num_translations (int): Back-translations per sentence
+        batch_size (int): Sentences per batch
+        max_concurrency (int): Back-translation variants in flight
+        rate_limit (float): Translation requests per second (0 for no limit)
+        resume (bool): Continue from the checkpoint instead of starting over
+        paraphraser: Paraphrasing pipeline; the T5 paraphraser if omitted
+        translator: Object with translate(text, dest=...); googletrans if omitted
+    """
+    done, output_bytes = load_checkpoint(output_file) if resume else (0, 0)
+    if done:
+        # Drop anything written after the last checkpoint by an interrupted batch
+        with open(output_file, "r+b") as f:
+            f.truncate(output_bytes)
+        print(f"Resuming after {done} input rows")
+    else:
+        with open(output_file, "w", newline="") as f:
+            csv.writer(f).writerow(["sentence", "label"])
+
+    limiter = TokenBucket(rate_limit, max(1.0, rate_limit)) if rate_limit > 0 else None
+    semaphore = asyncio.Semaphore(max_concurrency)
+    written = 0
+
+    pbar = tqdm(initial=done, desc="Augmenting dataset", unit="rows")
+    # The checkpoint counts parsed records, not lines (a quoted sentence can span
+    # several), so skip the rows already augmented after parsing
+    skip = done
+    with open(output_file, "a", newline="") as out:
+        writer = csv.writer(out)
+        for chunk in pd.read_csv(input_file, chunksize=batch_size):
+            if skip:
+                skipped = min(skip, len(chunk))
+                chunk = chunk.iloc[skipped:]
+                skip -= skipped
+                if chunk.empty:
+                    continue
+            queries = chunk['sentence'].astype(str).tolist()
+            intents = chunk['label'].tolist()
+
+            paraphrases, translations = await asyncio.gather(
+                asyncio.to_thread(_paraphrase_or_skip, queries, num_paraphrases, paraphraser, batch_size),
+                asyncio.gather(*(
+                    back_translate(query, num_translations, translator, limiter, semaphore)
+                    for query in queries
+                )),
+            )
+
+            rows = []
+            for query, intent, query_paraphrases, query_translations in zip(
+                queries, intents, paraphrases, translations
+            ):
+                # Original first, then its paraphrases and back-translations, skipping
+                # variants that only repeat the original or each other
+                seen = set()
+                for text in [query] + query_paraphrases + query_translations:
+                    key = normalize_text(text)
+                    if key not in seen:
+                        seen.add(key)
+                        rows.append((text, intent))
+            writer.writerows(rows)
+            out.flush()
+            os.fsync(out.fileno())
+
+            done += len(chunk)
+            written += len(rows)
+            save_checkpoint(output_file, done, out.tell())
+            pbar.update(len(chunk))
     pbar.close()
-    
-    # Final save
-    save_progress(augmented_queries, augmented_intents, output_file)
-    print(f"\nOriginal dataset size: {len(df)}")
-    print(f"Augmented dataset size: {len(augmented_queries)}")
+
+    print(f"\nOriginal dataset size: {done}")
+    print(f"Augmented rows written this run: {written}")
     print(f"Augmented dataset saved to: {output_file}")
 
-if __name__ == "__main__":
-    input_file = "data/full_natural_lifestyle_sentence_dataset.csv"
-    output_file = "data/full_natural_lifestyle_sentence_dataset_augmented.csv"
-    
+def main():
+    parser = argparse.ArgumentParser(description="Augment the intent dataset with paraphrases and back-translations")
+    parser.add_argument("--input", default="data/full_natural_lifestyle_sentence_dataset.csv")
+    parser.add_argument("--output", default="data/full_natural_lifestyle_sentence_dataset_augmented.csv")
+    parser.add_argument("--paraphrases", type=int, default=2)
+    parser.add_argument("--translations", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, default=8, help="Back-translation variants in flight")
+    parser.add_argument("--rate-limit", type=float, default=5.0, help="Translation requests per second")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start over")
+    parser.add_argument("--dedup-output", default="data/full_natural_lifestyle_sentence_dataset_augmented_dedup.csv",
+                        help="Where to write the deduplicated dataset")
+    parser.add_argument("--dedup-threshold", type=float, default=0.8, help="Near-duplicate Jaccard threshold")
+    parser.add_argument("--no-dedup", action="store_true", help="Skip the deduplication stage")
+    args = parser.parse_args()
+
     # Run the async function
-    asyncio.run(augment_dataset(input_file, output_file)) 
\ No newline at end of file
+    asyncio.run(augment_dataset(
+        args.input,
+        args.output,
+        num_paraphrases=args.paraphrases,
+        num_translations=args.translations,
+        batch_size=args.batch_size,
+        max_concurrency=args.concurrency,
+        rate_limit=args.rate_limit,
+        resume=not args.restart,
+    ))
+
+    # Dataset-wide exact and near-duplicate removal (see data_dedup.py)
+    if not args.no_dedup:
+        deduplicate_file(args.output, args.dedup_output, threshold=args.dedup_threshold)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Deduplication stage for the (augmented) intent dataset.
+
+Paraphrases and back-translations often repeat the original sentence or
+each other. This stage removes, within each label:
+
+1. exact duplicates after normalization (Unicode NFKC, case folding,
+   punctuation stripped, whitespace collapsed), and
+2. near duplicates: sentences whose character n-gram Jaccard similarity,
+   estimated with MinHash, is at least ``threshold``. Candidates are found
+   with locality-sensitive hashing (banded signatures), so the cost grows
+   linearly with the number of rows instead of with the number of pairs.
+
+Shingling and MinHash are vectorized over chunks of rows. The first
+occurrence of a sentence is kept, so originals (written before their
+variants by data_augmentation.py) win over paraphrases.
+
+Usage:
+    python data_dedup.py --input data/augmented.csv --output data/augmented_dedup.csv
+"""
+
+import argparse
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+SHINGLE_SIZE = 4
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_text(text):
+    """Normalize a sentence for duplicate detection."""
+    text = unicodedata.normalize("NFKC", str(text)).casefold()
+    text = _PUNCTUATION.sub(" ", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+def choose_bands(num_perm, threshold):
+    """
+    Pick the LSH band count for a similarity threshold.
+
+    Two rows become candidates when all rows of at least one band match,
+    which happens with probability 1 - (1 - s^r)^b at similarity s. The
+    curve's midpoint is roughly (1/b)^(1/r); this returns the b (with
+    b * r == num_perm) whose midpoint is closest to, and not above, the
+    threshold, trading a few extra candidates for recall.
+    """
+    best = 1
+    for bands in range(1, num_perm + 1):
+        if num_perm % bands:
+            continue
+        midpoint = (1.0 / bands) ** (bands / num_perm)
+        if midpoint <= threshold:
+            best_midpoint = (1.0 / best) ** (best / num_perm)
+            if best_midpoint > threshold or threshold - midpoint < threshold - best_midpoint:
+                best = bands
+    return best
+
+def _mix64(z):
+    """splitmix64 finalizer: a well-mixed 64-bit hash of each element."""
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+def _shingle_hashes(texts, size=SHINGLE_SIZE):
+    """
+    Hash the character n-grams of each text.
+
+    Returns:
+        tuple: (hashes, offsets) where hashes is a uint64 array holding every
+        text's shingle hashes back to back and offsets[i] is the first
+        position of text i
+    """
+    # Pad short texts so every text has at least one shingle
+    encoded = [text.ljust(size).encode("utf-8") for text in texts]
+    lengths = np.fromiter((len(e) for e in encoded), dtype=np.int64, count=len(encoded))
+    buffer = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+
+    # Polynomial hash of every window of `size` bytes in the joined buffer
+    windows = len(buffer) - size + 1
+    hashes = np.zeros(windows, dtype=np.uint64)
+    for i in range(size):
+        hashes = hashes * np.uint64(257) + buffer[i:i + windows]
+
+    # Keep only the windows that don't straddle two texts
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    counts = lengths - size + 1
+    position = np.arange(windows) - np.repeat(starts, lengths)[:windows]
+    valid = position < np.repeat(counts, lengths)[:windows]
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    return _mix64(hashes[valid]), offsets
+
+def minhash_signatures(texts, num_perm=64, seed=0, chunk_size=2048):
+    """
+    Compute MinHash signatures of the texts' character n-gram sets.
+
+    Args:
+        texts (list): Normalized sentences
+        num_perm (int): Hash functions per signature
+        seed (int): Seed for the hash family
+        chunk_size (int): Texts hashed per vectorized step (bounds memory)
+
+    Returns:
+        np.ndarray: (len(texts), num_perm) uint32 signature matrix
+    """
+    # Multiply-shift family: hash k is the top 32 bits of a_k * h + b_k (mod 2^64), a_k odd
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint32)
+    for start in range(0, len(texts), chunk_size):
+        hashes, offsets = _shingle_hashes(texts[start:start + chunk_size])
+        permuted = hashes[:, None] * a
+        permuted += b
+        permuted >>= np.uint64(32)
+        signatures[start:start + len(offsets)] = np.minimum.reduceat(permuted, offsets, axis=0)
+    return signatures
+
+def near_duplicates(signatures, groups, threshold=0.8, bands=None, seed=0):
+    """
+    Flag rows that are near duplicates of an earlier row in the same group.
+
+    Each band of each signature is hashed to a bucket key (together with
+    the row's group); every row is compared with the first row of each of
+    its buckets and flagged when their estimated Jaccard similarity reaches
+    the threshold.
+
+    Args:
+        signatures (np.ndarray): Output of minhash_signatures
+        groups (np.ndarray): Integer group (label) id per row
+        threshold (float): Minimum estimated Jaccard similarity
+        bands (int): LSH bands; chosen from the threshold if omitted
+
+    Returns:
+        np.ndarray: Boolean mask, True for rows to drop
+    """
+    count, num_perm = signatures.shape
+    bands = bands or choose_bands(num_perm, threshold)
+    rows = num_perm // bands
+    duplicate = np.zeros(count, dtype=bool)
+    if count < 2:
+        return duplicate
+
+    rng = np.random.default_rng(seed + 1)
+    multipliers = rng.integers(1, 1 << 63, size=rows + 1, dtype=np.uint64) | np.uint64(1)
+    groups = np.asarray(groups, dtype=np.uint64)
+    for band in range(bands):
+        chunk = signatures[:, band * rows:(band + 1) * rows]
+        # Wrapping multiply-add; key collisions only add candidates, which are verified below
+        keys = (chunk.astype(np.uint64) * multipliers[:rows]).sum(axis=1) + groups * multipliers[rows]
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        representative = first[inverse]
+        candidates = np.nonzero(representative != np.arange(count))[0]
+        if not len(candidates):
+            continue
+        similarity = (signatures[candidates] == signatures[representative[candidates]]).mean(axis=1)
+        duplicate[candidates[similarity >= threshold]] = True
+    return duplicate
+
+def deduplicate(df, threshold=0.8, num_perm=64, text_column="sentence", label_column="label", seed=0):
+    """
+    Remove exact and near-duplicate sentences within each label.
+
+    Args:
+        df (pd.DataFrame): Dataset with text and label columns
+        threshold (float): Near-duplicate Jaccard threshold (>= 1 disables near dedup)
+        num_perm (int): MinHash signature size
+        text_column (str): Sentence column
+        label_column (str): Label column
+
+    Returns:
+        tuple: (deduplicated DataFrame, per-label report DataFrame)
+    """
+    normalized = df[text_column].map(normalize_text)
+    exact = df[~pd.DataFrame({"label": df[label_column], "text": normalized}).duplicated()]
+    normalized = normalized.loc[exact.index]
+
+    result = exact
+    if threshold < 1 and len(exact):
+        signatures = minhash_signatures(normalized.tolist(), num_perm, seed)
+        groups = pd.factorize(exact[label_column])[0]
+        result = exact[~near_duplicates(signatures, groups, threshold, seed=seed)]
+
+    report = pd.DataFrame({
+        "before": df[label_column].value_counts(),
+        "after_exact": exact[label_column].value_counts(),
+        "after_near": result[label_column].value_counts(),
+    }).fillna(0).astype(int)
+    report.loc["TOTAL"] = report.sum()
+    report["kept_pct"] = (100.0 * report["after_near"] / report["before"].clip(lower=1)).round(1)
+    return result.reset_index(drop=True), report
+
+def deduplicate_file(input_file, output_file, threshold=0.8, num_perm=64):
+    """Deduplicate a CSV with 'sentence' and 'label' columns and print the per-label report."""
+    df = pd.read_csv(input_file)
+    result, report = deduplicate(df, threshold, num_perm)
+    result.to_csv(output_file, index=False)
+
+    print(report.to_string())
+    # The same normalized sentence under several labels is worth a look
+    normalized = result["sentence"].map(normalize_text)
+    conflicts = normalized[result.groupby(normalized)["label"].transform("nunique") > 1].nunique()
+    if conflicts:
+        print(f"\nWarning: {conflicts} sentences appear under more than one label")
+    print(f"\nDeduplicated dataset saved to: {output_file}")
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Remove exact and near-duplicate sentences per label")
+    parser.add_argument("--input", default="data/full_natural_lifestyle_sentence_dataset_augmented.csv")
+    parser.add_argument("--output", default="data/full_natural_lifestyle_sentence_dataset_augmented_dedup.csv")
+    parser.add_argument("--threshold", type=float, default=0.8, help="Near-duplicate Jaccard threshold")
+    parser.add_argument("--num-perm", type=int, default=64, help="MinHash signature size")
+    args = parser.parse_args()
+    deduplicate_file(args.input, args.output, args.threshold, args.num_perm)
+
+if __name__ == "__main__":
+    main()
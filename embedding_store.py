@@ -0,0 +1,296 @@
+"""
+Persistent store of sentence embeddings for training and evaluating the
+intent classifier.
+
+Re-encoding the whole (augmented, deduplicated) dataset is the slowest step
+of a retrain, although most sentences don't change between runs. The store
+keeps one vector per distinct sentence, keyed by a 64-bit hash of the
+encoder version and the sentence normalized the way queries are at serving
+time, so an update only encodes new or changed sentences, in large batches.
+Changing the encoder (model, backend or pinned weights) changes every key,
+so stale vectors are never reused.
+
+On disk a store is a directory:
+
+- store.json: dimension, dtype (float32 or float16) and row count
+- keys.npy: uint64 key of each row
+- vectors.bin: raw row-major vectors, memory-mapped for reading
+
+Rows are only appended, and store.json is rewritten after each appended
+chunk, so an interrupted update keeps everything encoded so far.
+
+Usage:
+    python embedding_store.py --data data/full_natural_lifestyle_sentence_dataset_augmented_dedup.csv \\
+        --store data/embedding_store [--dtype float16] [--export data/train_embeddings] [--compact]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.models.embedding_cache import normalize_query
+
+STORE_FILE = "store.json"
+STORE_FORMAT_VERSION = 1
+DTYPES = ("float32", "float16")
+
+def encoder_version(backend, path, onnx_path=None):
+    """
+    Identify an encoder configuration.
+
+    Local model directories are fingerprinted by their file names and
+    sizes, so re-pinning or re-exporting an encoder changes the version.
+    """
+    source = onnx_path if backend != "torch" and onnx_path else path
+    version = f"{backend}:{os.path.basename(os.path.normpath(source))}"
+    if os.path.isdir(source):
+        digest = hashlib.blake2b(digest_size=8)
+        for root, _, files in sorted(os.walk(source)):
+            for name in sorted(files):
+                full = os.path.join(root, name)
+                digest.update(f"{os.path.relpath(full, source)}:{os.path.getsize(full)}\n".encode("utf-8"))
+        version += f"@{digest.hexdigest()}"
+    return version
+
+def sentence_keys(sentences, version):
+    """64-bit store key of each sentence under an encoder version."""
+    prefix = version.encode("utf-8") + b"\x00"
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(prefix + normalize_query(str(s)).encode("utf-8"), digest_size=8).digest(),
+                        "little") for s in sentences),
+        dtype=np.uint64, count=len(sentences),
+    )
+
+class EmbeddingStore:
+    """
+    Append-only, memory-mapped embedding store.
+
+    Args:
+        path (str): Store directory; created if missing
+        version (str): Encoder version the keys are computed under (see encoder_version)
+        dtype (str): Vector dtype of a new store, "float32" or "float16"
+    """
+
+    def __init__(self, path, version, dtype="float32"):
+        self.path = path
+        self.version = version
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, STORE_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if meta.get("format_version") != STORE_FORMAT_VERSION:
+                raise ValueError(f"Unsupported embedding store format: {meta.get('format_version')}")
+            self.dim, self.dtype, count = meta["dim"], meta["dtype"], meta["count"]
+            self.keys = np.load(os.path.join(path, "keys.npy"))[:count]
+        else:
+            if dtype not in DTYPES:
+                raise ValueError(f"Unsupported dtype: {dtype}")
+            self.dim, self.dtype = None, dtype
+            self.keys = np.zeros(0, dtype=np.uint64)
+        self._order = None
+        self._vectors = None
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def vectors(self):
+        """(rows, dim) memory map of the stored vectors."""
+        if self._vectors is None:
+            if not len(self):
+                return np.zeros((0, self.dim or 0), dtype=self.dtype)
+            self._vectors = np.memmap(
+                os.path.join(self.path, "vectors.bin"), dtype=self.dtype, mode="r", shape=(len(self), self.dim)
+            )
+        return self._vectors
+
+    def keys_for(self, sentences):
+        return sentence_keys(sentences, self.version)
+
+    def lookup(self, keys):
+        """Row of each key, or -1 where the key is not stored."""
+        keys = np.asarray(keys, dtype=np.uint64)
+        if not len(self):
+            return np.full(len(keys), -1, dtype=np.int64)
+        if self._order is None:
+            self._order = np.argsort(self.keys, kind="stable")
+        positions = np.searchsorted(self.keys, keys, sorter=self._order)
+        positions = np.minimum(positions, len(self) - 1)
+        rows = self._order[positions].astype(np.int64)
+        rows[self.keys[rows] != keys] = -1
+        return rows
+
+    def add(self, keys, vectors):
+        """Append vectors for keys that are not stored yet."""
+        vectors = np.asarray(vectors)
+        if self.dim is None:
+            self.dim = int(vectors.shape[1])
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Store holds {self.dim}-d vectors, got {vectors.shape[1]}-d; use a new store path")
+
+        vectors_path = os.path.join(self.path, "vectors.bin")
+        with open(vectors_path, "ab") as f:
+            # Drop anything an interrupted update wrote past the recorded rows
+            f.truncate(len(self) * self.dim * np.dtype(self.dtype).itemsize)
+            f.write(np.ascontiguousarray(vectors, dtype=self.dtype).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        self.keys = np.concatenate([self.keys, np.asarray(keys, dtype=np.uint64)])
+        self._order = None
+        self._vectors = None
+        self._save_meta()
+
+    def _save_meta(self):
+        # Write under temporary names first so readers never see a mix
+        with open(os.path.join(self.path, "keys.npy.tmp"), "wb") as f:
+            np.save(f, self.keys)
+        meta = {"format_version": STORE_FORMAT_VERSION, "dim": self.dim, "dtype": self.dtype, "count": len(self)}
+        with open(os.path.join(self.path, STORE_FILE + ".tmp"), "w") as f:
+            json.dump(meta, f, indent=2)
+        for name in ("keys.npy", STORE_FILE):
+            os.replace(os.path.join(self.path, name + ".tmp"), os.path.join(self.path, name))
+
+    def update(self, sentences, encoder, batch_size=256, chunk_size=8192):
+        """
+        Encode and store the sentences that are not stored yet.
+
+        Args:
+            sentences (list): Training sentences
+            encoder: Object with encode(texts, batch_size=...) -> matrix
+            batch_size (int): Encoder batch size
+            chunk_size (int): Sentences encoded between checkpoints
+
+        Returns:
+            int: Number of sentences encoded
+        """
+        keys = self.keys_for(sentences)
+        missing = np.nonzero(self.lookup(keys) < 0)[0]
+        # One row per distinct normalized sentence
+        _, first = np.unique(keys[missing], return_index=True)
+        missing = missing[np.sort(first)]
+
+        started = time.perf_counter()
+        for start in range(0, len(missing), chunk_size):
+            chunk = missing[start:start + chunk_size]
+            texts = [normalize_query(str(sentences[i])) for i in chunk]
+            self.add(keys[chunk], np.asarray(encoder.encode(texts, batch_size=batch_size), dtype=np.float32))
+            done = start + len(chunk)
+            print(f"Encoded {done}/{len(missing)} new sentences ({done / (time.perf_counter() - started):.0f}/s)")
+        return len(missing)
+
+    def get(self, sentences):
+        """float32 matrix of the stored vectors of sentences (all must be stored)."""
+        rows = self.lookup(self.keys_for(sentences))
+        if np.any(rows < 0):
+            raise KeyError(f"{int((rows < 0).sum())} sentences are not in the store; run an update first")
+        return np.asarray(self.vectors[rows], dtype=np.float32)
+
+    def compact(self, sentences):
+        """Rewrite the store keeping only the rows of sentences (e.g. the current dataset)."""
+        rows = self.lookup(self.keys_for(sentences))
+        rows = np.unique(rows[rows >= 0])
+        with open(os.path.join(self.path, "vectors.bin.tmp"), "wb") as f:
+            for start in range(0, len(rows), 65536):
+                f.write(np.ascontiguousarray(self.vectors[rows[start:start + 65536]]).tobytes())
+        keys = self.keys[rows]
+        self._vectors = None
+        os.replace(os.path.join(self.path, "vectors.bin.tmp"), os.path.join(self.path, "vectors.bin"))
+        self.keys = keys
+        self._order = None
+        self._save_meta()
+        return len(keys)
+
+def label_classes(labels, label_encoder_path=None):
+    """Class names in the classifier's order: the fitted label encoder's, else sorted unique labels."""
+    if label_encoder_path and os.path.exists(label_encoder_path):
+        import pickle
+        with open(label_encoder_path, "rb") as f:
+            return np.asarray(pickle.load(f).classes_)
+    return np.unique(np.asarray(labels))
+
+def encode_labels(labels, classes):
+    """Class index of each label (LabelEncoder.transform without scikit-learn)."""
+    ids = pd.Series(labels).map({name: i for i, name in enumerate(classes)})
+    if ids.isna().any():
+        raise ValueError(f"Labels not known to the classifier: {sorted(set(pd.Series(labels)[ids.isna()]))}")
+    return ids.to_numpy(dtype=np.int32)
+
+def iter_batches(store, data_path, classes, batch_size=8192, text_column="sentence", label_column="label"):
+    """
+    Stream label-aligned training batches without loading the dataset or store into RAM.
+
+    Yields:
+        tuple: (float32 embedding matrix, int32 class index vector) per CSV chunk
+    """
+    for chunk in pd.read_csv(data_path, chunksize=batch_size):
+        yield store.get(chunk[text_column].tolist()), encode_labels(chunk[label_column].to_numpy(), classes)
+
+def export_matrices(store, data_path, output_dir, classes, batch_size=8192,
+                    text_column="sentence", label_column="label"):
+    """
+    Write X.npy (float32 embeddings), y.npy (int32 class indices) and
+    classes.json, row-aligned with the CSV, for fitting the classifier.
+
+    X.npy is filled chunk by chunk through a memory map and can be loaded
+    with np.load(..., mmap_mode="r").
+
+    Returns:
+        int: Number of rows written
+    """
+    rows = sum(len(chunk) for chunk in pd.read_csv(data_path, chunksize=batch_size, usecols=[label_column]))
+    os.makedirs(output_dir, exist_ok=True)
+    X = np.lib.format.open_memmap(os.path.join(output_dir, "X.npy"), mode="w+", dtype=np.float32,
+                                  shape=(rows, store.dim or 0))
+    y = np.lib.format.open_memmap(os.path.join(output_dir, "y.npy"), mode="w+", dtype=np.int32, shape=(rows,))
+    start = 0
+    for vectors, ids in iter_batches(store, data_path, classes, batch_size, text_column, label_column):
+        X[start:start + len(ids)] = vectors
+        y[start:start + len(ids)] = ids
+        start += len(ids)
+    X.flush()
+    y.flush()
+    with open(os.path.join(output_dir, "classes.json"), "w") as f:
+        json.dump([str(name) for name in classes], f)
+    return rows
+
+def main():
+    from app.config import ENCODER_BACKEND, ENCODER_PATH, LABEL_ENCODER_PATH, ONNX_ENCODER_PATH
+    from app.models.nlu_model import NLUModel
+
+    parser = argparse.ArgumentParser(description="Encode new training sentences into the embedding store")
+    parser.add_argument("--data", default="data/full_natural_lifestyle_sentence_dataset_augmented_dedup.csv",
+                        help="CSV with 'sentence' and 'label' columns")
+    parser.add_argument("--store", default="data/embedding_store")
+    parser.add_argument("--dtype", choices=DTYPES, default="float32", help="Vector dtype of a new store")
+    parser.add_argument("--batch-size", type=int, default=256, help="Encoder batch size")
+    parser.add_argument("--chunk-size", type=int, default=8192, help="Sentences encoded between checkpoints")
+    parser.add_argument("--export", help="Write label-aligned X.npy/y.npy/classes.json to this directory")
+    parser.add_argument("--compact", action="store_true", help="Drop stored rows not in --data")
+    args = parser.parse_args()
+
+    version = encoder_version(ENCODER_BACKEND, ENCODER_PATH, ONNX_ENCODER_PATH)
+    store = EmbeddingStore(args.store, version, args.dtype)
+    sentences = pd.read_csv(args.data, usecols=["sentence"])["sentence"].tolist()
+
+    # Only load the encoder when there is something to encode
+    encoded = 0
+    if np.any(store.lookup(store.keys_for(sentences)) < 0):
+        encoded = store.update(sentences, NLUModel._load_encoder(), args.batch_size, args.chunk_size)
+    print(f"{len(sentences)} sentences, {encoded} encoded, {len(store)} rows in {args.store} ({version})")
+
+    if args.compact:
+        print(f"Compacted to {store.compact(sentences)} rows")
+    if args.export:
+        labels = pd.read_csv(args.data, usecols=["label"])["label"]
+        classes = label_classes(labels, LABEL_ENCODER_PATH)
+        rows = export_matrices(store, args.data, args.export, classes)
+        print(f"Exported {rows} rows x {store.dim} to {args.export} (classes: {', '.join(map(str, classes))})")
+
+if __name__ == "__main__":
+    main()
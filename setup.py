@@ -9,10 +9,26 @@ setup(
         "uvicorn>=0.24.0",
         "python-dotenv>=1.0.0",
         "googlemaps>=4.10.0",
-        "tensorflow>=2.12.0",
         "numpy>=1.24.0",
         "sentence-transformers>=4.1.0",
         "httpx>=0.24.0",
         "starlette>=0.27.0",
     ],
+    entry_points={
+        "console_scripts": [
+            # Bulk classification of NDJSON/CSV query logs (see app/cli.py)
+            "nearbynlu-classify=app.cli:main",
+        ],
+    },
+    extras_require={
+        # Keras classifier (NLU_INFERENCE_MODE=compiled / keras); numpy mode runs without it
+        "tensorflow": [
+            "tensorflow>=2.12.0",
+        ],
+        # ONNX Runtime encoder backends (NLU_ENCODER_BACKEND=onnx / onnx-int8)
+        "onnx": [
+            "onnxruntime>=1.16.0",
+            "transformers>=4.36.0",
+        ],
+    },
 ) 
\ No newline at end of file
@@ -1,5 +1,6 @@
 import os
 import sys
+import time
 import pytest
 from fastapi.testclient import TestClient
 from fastapi import FastAPI
@@ -13,4 +14,40 @@ from app.main import app
 def client() -> TestClient:
     """Create a test client for the FastAPI application."""
     with TestClient(app) as test_client:
-        yield test_client 
\ No newline at end of file
+        yield test_client
+
+class FakeMapsClient:
+    """Local stand-in for googlemaps.Client that records every upstream call."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = []
+
+    def geocode(self, location):
+        self.calls.append(("geocode", location))
+        time.sleep(self.delay)
+        if location == "Nowhere":
+            return []
+        return [{"geometry": {"location": {"lat": 37.7749295, "lng": -122.4194155}}}]
+
+    def places_nearby(self, location=None, radius=None, type=None, keyword=None):
+        self.calls.append(("places_nearby", location, radius, type))
+        time.sleep(self.delay)
+        return {"results": [
+            {
+                "name": f"{type or 'place'} {i}",
+                "place_id": f"{type or 'place'}-{i}",
+                "geometry": {"location": location},
+            }
+            for i in range(3)
+        ]}
+
+    def place(self, place_id):
+        self.calls.append(("place", place_id))
+        time.sleep(self.delay)
+        return {"result": {"place_id": place_id, "name": place_id}}
+
+
+@pytest.fixture
+def fake_maps_client() -> FakeMapsClient:
+    return FakeMapsClient()
@@ -1,5 +1,7 @@
+import json
 import pytest
-from app.main import app
+from app.main import app, api_builder
+from app.services.google_maps import GoogleMapsService
 
 def test_root_endpoint(client):
     response = client.get("/")
@@ -11,7 +13,9 @@ def test_health_check(client):
     assert response.status_code == 200
     assert response.json() == {"status": "healthy"}
 
-def test_query_endpoint(client):
+def test_query_endpoint(client, fake_maps_client, monkeypatch):
+    monkeypatch.setattr(api_builder, "google_maps", GoogleMapsService(client=fake_maps_client, cache=None))
+    monkeypatch.setattr(api_builder, "async_google_maps", None)
     # Test with just a query
     response = client.post(
         "/query",
@@ -40,6 +44,7 @@ def test_query_endpoint(client):
     assert "confidence" in data
     assert "api_call" in data
     assert "results" in data
+    assert ("geocode", "San Francisco") in fake_maps_client.calls
 
 def test_query_endpoint_invalid_input(client):
     # Test with missing query
@@ -48,3 +53,61 @@ def test_query_endpoint_invalid_input(client):
         json={"location": "San Francisco"}
     )
     assert response.status_code == 422  # Validation error
+
+def test_query_batch_endpoint(client):
+    queries = ["Find me a good restaurant", "Show me nearby parks", "Where can I find a pharmacy?"]
+    response = client.post(
+        "/query/batch",
+        json={"queries": queries, "location": "San Francisco"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = [json.loads(line) for line in response.text.splitlines() if line]
+    assert [line["index"] for line in lines] == [0, 1, 2]
+    assert [line["query"] for line in lines] == queries
+    for line in lines:
+        assert "intent" in line
+        assert "entities" in line
+        assert "confidence" in line
+
+def test_query_batch_endpoint_empty(client):
+    response = client.post("/query/batch", json={"queries": []})
+    assert response.status_code == 200
+    assert response.text == ""
+
+def test_ready_endpoint(client):
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ready"
+    assert response.json()["model_version"] == "default"
+
+def test_metrics_endpoint(client):
+    client.post("/query", json={"query": "Find me a pharmacy"})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'nearbynlu_stage_seconds_count{stage="encode"}' in body
+    assert 'nearbynlu_stage_seconds_count{stage="nlu"}' in body
+    assert 'nearbynlu_http_request_seconds_count{method="POST",path="/query",status="200"}' in body
+    assert 'nearbynlu_executor_pending{executor="nlu-inference"}' in body
+    assert "nearbynlu_model_ready 1" in body
+    assert 'nearbynlu_model_info{version="default"} 1' in body
+
+def test_server_timing_header(client, monkeypatch):
+    monkeypatch.setattr("app.main.SERVER_TIMING_ENABLED", True)
+    response = client.post("/query", json={"query": "Find me a pharmacy"})
+    assert response.status_code == 200
+    stages = [entry.split(";")[0] for entry in response.headers["Server-Timing"].split(", ")]
+    # Model stages run on the inference pool but still land in the request's header
+    assert {"nlu", "encode", "classify", "total"} <= set(stages)
+
+def test_admin_reload_requires_token(client, monkeypatch):
+    assert client.post("/admin/model/reload").status_code == 404
+    monkeypatch.setattr("app.main.ADMIN_TOKEN", "secret")
+    assert client.post("/admin/model/reload", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    # Without NLU_MODEL_BUNDLES_DIR there is nothing to reload from
+    response = client.post("/admin/model/reload", headers={"X-Admin-Token": "secret"}, json={"version": "v2"})
+    assert response.status_code == 400
+    assert "NLU_MODEL_BUNDLES_DIR" in response.json()["detail"]
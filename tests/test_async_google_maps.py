@@ -0,0 +1,202 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import pytest
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from app.rate_limit import TokenBucket
+from app.services.async_google_maps import AsyncGoogleMapsService, MapsAPIError, parse_retry_after
+from app.services.maps_cache import MapsCache, MemoryCacheBackend
+
+class StubMapsServer:
+    """Local HTTP server speaking just enough of the Maps web service API."""
+
+    def __init__(self):
+        self.requests = []
+        self.fail_next = []   # HTTP statuses to return before succeeding
+        self.delay = 0.0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                params = {key: values[0] for key, values in parse_qs(url.query).items()}
+                stub.requests.append((url.path, params))
+                time.sleep(stub.delay)
+                if stub.fail_next:
+                    self.send_response(stub.fail_next.pop(0))
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(json.dumps(stub.respond(url.path, params)).encode())
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def respond(self, path, params):
+        if path.endswith("/geocode/json"):
+            if params["address"] == "Nowhere":
+                return {"status": "ZERO_RESULTS", "results": []}
+            return {"status": "OK", "results": [{"geometry": {"location": {"lat": 37.7749, "lng": -122.4194}}}]}
+        if path.endswith("/nearbysearch/json"):
+            return {"status": "OK", "results": [{"name": "Cafe", "place_id": "cafe-1"}]}
+        if path.endswith("/details/json"):
+            if params["place_id"] == "invalid":
+                return {"status": "INVALID_REQUEST"}
+            return {"status": "OK", "result": {"place_id": params["place_id"]}}
+        return {"status": "NOT_FOUND"}
+
+    def count(self, suffix):
+        return sum(1 for path, _ in self.requests if path.endswith(suffix))
+
+@pytest.fixture
+def stub_server():
+    stub = StubMapsServer()
+    stub.thread.start()
+    yield stub
+    stub.server.shutdown()
+
+def make_service(stub, **kwargs):
+    kwargs.setdefault("retry_backoff", 0.01)
+    return AsyncGoogleMapsService(api_key="test-key", base_url=stub.url, **kwargs)
+
+@pytest.mark.asyncio
+async def test_search_nearby(stub_server):
+    service = make_service(stub_server)
+    results = await service.search_nearby("San Francisco", radius=1000, type="cafe")
+    await service.aclose()
+
+    assert results == [{"name": "Cafe", "place_id": "cafe-1"}]
+    path, params = stub_server.requests[-1]
+    assert params["location"] == "37.7749,-122.4194"
+    assert params["radius"] == "1000"
+    assert params["type"] == "cafe"
+    assert params["key"] == "test-key"
+
+@pytest.mark.asyncio
+async def test_unknown_location(stub_server):
+    service = make_service(stub_server)
+    assert await service.search_nearby("Nowhere") == []
+    assert stub_server.count("/nearbysearch/json") == 0
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_retries_on_429_and_5xx(stub_server):
+    stub_server.fail_next = [429, 503]
+    service = make_service(stub_server, max_retries=3)
+    assert await service.geocode("San Francisco") == {"lat": 37.7749, "lng": -122.4194}
+    assert service.stats["retries"] == 2
+    assert stub_server.count("/geocode/json") == 3
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_retries(stub_server):
+    stub_server.fail_next = [500, 500, 500]
+    service = make_service(stub_server, max_retries=2)
+    assert await service.search_nearby("San Francisco") == []
+    assert stub_server.count("/geocode/json") == 3
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_identical_requests_are_deduplicated(stub_server):
+    stub_server.delay = 0.1
+    service = make_service(stub_server)
+    results = await asyncio.gather(*(service.get_place_details("abc") for _ in range(5)))
+    await service.aclose()
+
+    assert all(result == results[0] for result in results)
+    assert stub_server.count("/details/json") == 1
+    assert service.stats["deduplicated"] == 4
+
+@pytest.mark.asyncio
+async def test_place_details_batch_fans_out(stub_server):
+    stub_server.delay = 0.1
+    service = make_service(stub_server)
+    started = time.perf_counter()
+    results = await service.get_place_details_batch(["a", "b", "invalid", "c"])
+    elapsed = time.perf_counter() - started
+    await service.aclose()
+
+    assert [r["result"]["place_id"] if r else None for r in results] == ["a", "b", None, "c"]
+    # Concurrent, not 4 sequential round trips
+    assert elapsed < 0.35
+
+@pytest.mark.asyncio
+async def test_api_error_status_raises(stub_server):
+    service = make_service(stub_server)
+    with pytest.raises(MapsAPIError):
+        await service._get_json("/maps/api/place/details/json", {"place_id": "invalid"})
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_shares_maps_cache(stub_server):
+    service = make_service(stub_server, cache=MapsCache(MemoryCacheBackend()))
+    await service.search_nearby("San Francisco", type="cafe")
+    await service.search_nearby("san francisco", type="cafe")
+    await service.aclose()
+
+    assert stub_server.count("/geocode/json") == 1
+    assert stub_server.count("/nearbysearch/json") == 1
+    assert service.cache.stats()["geocode"]["hits"] == 1
+
+@pytest.mark.asyncio
+async def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=20, capacity=1)
+    started = time.perf_counter()
+    for _ in range(5):
+        await bucket.acquire()
+    # One banked token, then four more at 20/s
+    assert time.perf_counter() - started >= 0.18
+
+@pytest.mark.asyncio
+async def test_search_nearby_many_shares_geocode(stub_server):
+    stub_server.delay = 0.1
+    service = make_service(stub_server)
+    started = time.perf_counter()
+    results = await service.search_nearby_many("San Francisco", [
+        {"type": "cafe", "radius": 1000, "keyword": None},
+        {"type": "bakery", "radius": 1000, "keyword": "coffee"},
+    ])
+    elapsed = time.perf_counter() - started
+    await service.aclose()
+
+    assert results == [[{"name": "Cafe", "place_id": "cafe-1"}]] * 2
+    assert stub_server.count("/geocode/json") == 1
+    assert stub_server.count("/nearbysearch/json") == 2
+    assert {params.get("keyword") for _, params in stub_server.requests} == {None, "coffee"}
+    # Geocode, then both searches at once
+    assert elapsed < 0.35
+
+def test_retry_after_is_parsed_and_clamped():
+    service = AsyncGoogleMapsService(api_key="test-key", retry_backoff=0.25, max_retries=3)
+    assert service._backoff(0, "1.5") == 1.5
+    assert service._backoff(0, "3600") == 2.0
+    soon = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 < parse_retry_after(soon) <= 30
+    assert service._backoff(0, soon) == 2.0
+    assert service._backoff(0, "Thu, 01 Jan 1970 00:00:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+    assert 0 <= service._backoff(0, "soon") <= 0.25
+
+def test_client_from_previous_loop_is_closed(stub_server):
+    service = make_service(stub_server)
+    asyncio.run(service.geocode("San Francisco"))
+    first = service._client
+
+    async def second_loop():
+        await service.geocode("Oakland")
+        await asyncio.gather(*service._closing)
+        await service.aclose()
+
+    asyncio.run(second_loop())
+    assert service._client is not first
+    assert first.is_closed
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+import time
+import pytest
+from app.main import api_builder
+from app.models.batching import MicroBatcher, BatchQueueFullError
+
+def test_results_are_returned_to_each_caller():
+    batcher = MicroBatcher(lambda items: [item * 2 for item in items], max_batch_size=8, max_wait_ms=20)
+    results = {}
+
+    def call(value):
+        results[value] = batcher.run(value, timeout=5)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    batcher.stop()
+
+    assert results == {i: i * 2 for i in range(20)}
+
+def test_concurrent_requests_share_a_batch():
+    batch_sizes = []
+
+    def process(items):
+        batch_sizes.append(len(items))
+        return items
+
+    batcher = MicroBatcher(process, max_batch_size=4, max_wait_ms=200)
+    futures = [batcher.submit(i) for i in range(4)]
+    assert [future.result(timeout=5) for future in futures] == [0, 1, 2, 3]
+    batcher.stop()
+
+    # All four requests were queued within the window, so one pass handled them
+    assert batch_sizes == [4]
+    stats = batcher.stats.snapshot()
+    assert stats["total_batches"] == 1
+    assert stats["total_requests"] == 4
+    assert stats["max_batch_size"] == 4
+
+def test_queue_full_raises():
+    release = threading.Event()
+
+    def process(items):
+        release.wait(5)
+        return items
+
+    batcher = MicroBatcher(process, max_batch_size=1, max_wait_ms=0, max_queue_size=1)
+    first = batcher.submit("a")
+    # Wait for the worker to pick up the first item so the queue is empty again
+    deadline = time.monotonic() + 5
+    while batcher.queue_depth and time.monotonic() < deadline:
+        time.sleep(0.01)
+    batcher.submit("b")
+
+    with pytest.raises(BatchQueueFullError):
+        batcher.submit("c")
+    assert batcher.stats.snapshot()["rejected"] == 1
+
+    release.set()
+    assert first.result(timeout=5) == "a"
+    batcher.stop()
+
+def test_errors_propagate_to_every_caller():
+    def process(items):
+        raise RuntimeError("boom")
+
+    batcher = MicroBatcher(process, max_batch_size=4, max_wait_ms=50)
+    futures = [batcher.submit(i) for i in range(3)]
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(timeout=5)
+    batcher.stop()
+
+class BatchedModel:
+    """Stands in for NLUModel with micro-batching on; records the batch sizes."""
+
+    def __init__(self):
+        self.sizes = []
+        self.batcher = MicroBatcher(self.process, max_batch_size=32, max_wait_ms=200)
+
+    def process(self, items):
+        self.sizes.append(len(items))
+        return [{"intent": "park", "entities": {}, "confidence": 0.9} for _ in items]
+
+    def submit(self, text, location=None):
+        return self.batcher.submit((text, location))
+
+@pytest.mark.asyncio
+async def test_async_requests_batch_beyond_the_pool_size(monkeypatch):
+    model = BatchedModel()
+    monkeypatch.setattr(api_builder, "nlu_model", model)
+    requests = 3 * api_builder.inference_executor.max_workers
+    responses = await asyncio.gather(*[api_builder.build_api_call_async(f"query {i}") for i in range(requests)])
+    model.batcher.stop()
+    assert [response["intent"] for response in responses] == ["park"] * requests
+    assert max(model.sizes) > api_builder.inference_executor.max_workers
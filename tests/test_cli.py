@@ -0,0 +1,81 @@
+import csv
+import json
+import pytest
+from app import cli
+
+QUERIES = [
+    "Find me a good restaurant",
+    "Show me nearby parks",
+    "Where can I find a pharmacy?",
+    "cheap thai food near me",
+    "Is there a grocery store open now?",
+]
+
+def write_ndjson(path, count):
+    with open(path, "w") as f:
+        for i in range(count):
+            f.write(json.dumps({"id": i, "query": QUERIES[i % len(QUERIES)]}) + "\n")
+
+def read_ndjson(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+def test_ndjson_in_order(tmp_path):
+    source, output = tmp_path / "in.ndjson", tmp_path / "out.ndjson"
+    write_ndjson(source, 11)
+    with open(source, "a") as f:
+        f.write("\nnot json\n")
+
+    cli.main([str(source), "-o", str(output), "--chunk-size", "3", "--progress-interval", "0"])
+
+    rows = read_ndjson(output)
+    assert [row.get("id") for row in rows] == list(range(11)) + [None]
+    assert all({"intent", "confidence", "entities"} <= set(row) for row in rows[:11])
+    assert rows[-1]["error"].startswith("Invalid JSON")
+    assert rows[3]["entities"]["cuisine"] == "thai"
+
+def test_csv_with_multiline_rows(tmp_path):
+    source, output = tmp_path / "in.csv", tmp_path / "out.csv"
+    with open(source, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["query", "location"])
+        writer.writerow(["Show me nearby\nparks", "Oakland"])
+        writer.writerow(["Find me a good restaurant", ""])
+
+    cli.main([str(source), "-o", str(output), "--progress-interval", "0"])
+
+    with open(output, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["query"] for row in rows] == ["Show me nearby\nparks", "Find me a good restaurant"]
+    assert rows[0]["location"] == "Oakland"
+    assert json.loads(rows[1]["entities"]) == {"category": "restaurant"}
+    assert float(rows[1]["confidence"]) >= 0
+
+class Crash(BaseException):
+    pass
+
+def test_resume_after_crash(tmp_path, monkeypatch):
+    source, output = tmp_path / "in.ndjson", tmp_path / "out.ndjson"
+    write_ndjson(source, 10)
+    classify = cli._classify
+    calls, crash_at = [], [3]
+
+    def crash_on_third_chunk(texts, locations):
+        calls.append(texts)
+        if len(calls) == crash_at[0]:
+            raise Crash()
+        return classify(texts, locations)
+
+    monkeypatch.setattr(cli, "_classify", crash_on_third_chunk)
+    args = [str(source), "-o", str(output), "--chunk-size", "2", "--progress-interval", "0"]
+    with pytest.raises(Crash):
+        cli.main(args)
+    state = json.loads((tmp_path / "out.ndjson.offset").read_text())
+    assert state["rows"] == 4
+
+    calls.clear()
+    crash_at[0] = None
+    cli.main(args)
+    # Only the unfinished chunks were classified again
+    assert len(calls) == 3
+    assert [row["id"] for row in read_ndjson(output)] == list(range(10))
@@ -0,0 +1,128 @@
+import asyncio
+import csv
+import pytest
+import data_augmentation
+from data_augmentation import augment_dataset, paraphrase_batch
+
+class StubParaphraser:
+    """Stands in for the transformers pipeline; records one call per batch."""
+
+    def __init__(self, fail_on_call=None):
+        self.calls = []
+        self.fail_on_call = fail_on_call
+
+    def __call__(self, texts, num_return_sequences=1, **kwargs):
+        self.calls.append(list(texts))
+        if len(self.calls) == self.fail_on_call:
+            raise Interrupted()
+        return [
+            [{"generated_text": f"{text} (p{i})"} for i in range(num_return_sequences)]
+            for text in texts
+        ]
+
+class _Translation:
+    def __init__(self, text):
+        self.text = text
+
+class StubTranslator:
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.round_trips = 0
+
+    async def translate(self, text, dest="en"):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.001)
+        self.in_flight -= 1
+        if dest != "en":
+            return _Translation(f"[{dest}] {text}")
+        # Every round trip comes back as a distinct rewording of the original
+        self.round_trips += 1
+        return _Translation(f"{text.split('] ', 1)[-1]} (t{self.round_trips})")
+
+class Interrupted(BaseException):
+    pass
+
+def write_dataset(path, count):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["sentence", "label"])
+        writer.writerows((f"sentence {i}", f"intent_{i % 3}") for i in range(count))
+
+def read_rows(path):
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
+
+def test_paraphrase_batch_uses_one_call():
+    paraphraser = StubParaphraser()
+    result = paraphrase_batch(["a", "b"], num_paraphrases=3, paraphraser=paraphraser)
+    assert paraphraser.calls == [["a", "b"]]
+    assert result == [["a (p0)", "a (p1)", "a (p2)"], ["b (p0)", "b (p1)", "b (p2)"]]
+
+def test_augment_dataset(tmp_path):
+    source, output = tmp_path / "in.csv", tmp_path / "out.csv"
+    write_dataset(source, 5)
+    paraphraser, translator = StubParaphraser(), StubTranslator()
+
+    asyncio.run(augment_dataset(
+        str(source), str(output), num_paraphrases=2, num_translations=2, batch_size=2,
+        max_concurrency=3, rate_limit=0, paraphraser=paraphraser, translator=translator
+    ))
+
+    rows = read_rows(output)
+    # Original + 2 paraphrases + 2 back-translations per sentence, grouped by sentence
+    assert len(rows) == 25
+    assert rows[0] == {"sentence": "sentence 0", "label": "intent_0"}
+    assert rows[1]["sentence"] == "sentence 0 (p0)"
+    assert {row["label"] for row in rows[5:10]} == {"intent_1"}
+    assert len(paraphraser.calls) == 3
+    assert translator.max_in_flight <= 3
+
+class EchoTranslator(StubTranslator):
+    """Round trips back to the original sentence."""
+
+    async def translate(self, text, dest="en"):
+        return _Translation(text.split("] ", 1)[-1] if dest == "en" else f"[{dest}] {text}")
+
+def test_variants_repeating_the_original_are_skipped(tmp_path):
+    source, output = tmp_path / "in.csv", tmp_path / "out.csv"
+    write_dataset(source, 5)
+
+    asyncio.run(augment_dataset(
+        str(source), str(output), num_paraphrases=2, num_translations=2, batch_size=2,
+        rate_limit=0, paraphraser=StubParaphraser(), translator=EchoTranslator()
+    ))
+
+    # Original + 2 paraphrases per sentence
+    assert len(read_rows(output)) == 15
+
+def test_interrupted_run_resumes(tmp_path):
+    source, output = tmp_path / "in.csv", tmp_path / "out.csv"
+    write_dataset(source, 6)
+    kwargs = dict(num_paraphrases=1, num_translations=1, batch_size=2, rate_limit=0, translator=StubTranslator())
+
+    with pytest.raises(Interrupted):
+        asyncio.run(augment_dataset(str(source), str(output), paraphraser=StubParaphraser(fail_on_call=2), **kwargs))
+    assert data_augmentation.load_checkpoint(str(output))[0] == 2
+
+    paraphraser = StubParaphraser()
+    asyncio.run(augment_dataset(str(source), str(output), paraphraser=paraphraser, **kwargs))
+    assert paraphraser.calls == [["sentence 2", "sentence 3"], ["sentence 4", "sentence 5"]]
+    rows = read_rows(output)
+    # Each sentence appears once with one paraphrase and one back-translation,
+    # with no rows repeated from the interrupted batch
+    assert len(rows) == 18
+    assert [row["sentence"] for row in rows if "(" not in row["sentence"]] == [f"sentence {i}" for i in range(6)]
+
+def test_resume_counts_records_not_lines(tmp_path):
+    source, output = tmp_path / "in.csv", tmp_path / "out.csv"
+    # A blank line and a quoted sentence spanning two lines: four records on seven lines
+    source.write_text('sentence,label\nsentence 0,a\n\n"sentence 1\nsecond line",b\nsentence 2,c\nsentence 3,a\n')
+    kwargs = dict(num_paraphrases=1, num_translations=1, batch_size=2, rate_limit=0, translator=StubTranslator())
+
+    with pytest.raises(Interrupted):
+        asyncio.run(augment_dataset(str(source), str(output), paraphraser=StubParaphraser(fail_on_call=2), **kwargs))
+    paraphraser = StubParaphraser()
+    asyncio.run(augment_dataset(str(source), str(output), paraphraser=paraphraser, **kwargs))
+    assert paraphraser.calls == [["sentence 2", "sentence 3"]]
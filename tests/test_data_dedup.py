@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+from data_dedup import choose_bands, deduplicate, minhash_signatures, near_duplicates, normalize_text
+
+def test_normalize_text():
+    assert normalize_text("  Find COFFEE, near me!! ") == "find coffee near me"
+
+def test_exact_duplicates_removed_per_label():
+    df = pd.DataFrame({
+        "sentence": ["Find coffee near me", "find coffee near me!", "Find coffee near me", "Where is the park"],
+        "label": ["find_cafe", "find_cafe", "find_food", "find_park"],
+    })
+    result, report = deduplicate(df, threshold=1.0)
+    # The same sentence under another label is kept
+    assert result.to_dict("records") == [
+        {"sentence": "Find coffee near me", "label": "find_cafe"},
+        {"sentence": "Find coffee near me", "label": "find_food"},
+        {"sentence": "Where is the park", "label": "find_park"},
+    ]
+    assert report.loc["find_cafe", "before"] == 2
+    assert report.loc["find_cafe", "after_exact"] == 1
+    assert report.loc["TOTAL"].tolist()[:3] == [4, 3, 3]
+
+def test_near_duplicates_removed_keeps_first():
+    base = [f"show me cheap {food} restaurants open late near union square" for food in
+            ("pizza", "sushi", "taco", "burger", "ramen", "thai", "curry", "salad")]
+    variants = [sentence + " please" for sentence in base]
+    df = pd.DataFrame({"sentence": base[:1] + variants[:1] + ["where can I park my bike downtown"],
+                       "label": ["find_food"] * 3})
+    result, report = deduplicate(df, threshold=0.7)
+    assert result["sentence"].tolist() == [base[0], "where can I park my bike downtown"]
+    assert report.loc["find_food", "after_near"] == 2
+
+def test_minhash_estimates_similarity():
+    texts = ["find a coffee shop near the train station", "find a coffee shop near the bus station",
+             "what time does the museum close today"]
+    signatures = minhash_signatures(texts, num_perm=128)
+    similar = (signatures[0] == signatures[1]).mean()
+    different = (signatures[0] == signatures[2]).mean()
+    assert similar > 0.5 > different
+
+def test_near_duplicates_respects_groups_and_chunks():
+    texts = ["best ramen in the east village tonight"] * 3 + ["a completely unrelated sentence here"]
+    signatures = np.concatenate([minhash_signatures(texts[:2], chunk_size=1), minhash_signatures(texts[2:])])
+    flagged = near_duplicates(signatures, np.array([0, 0, 1, 1]), threshold=0.8)
+    assert flagged.tolist() == [False, True, False, False]
+
+def test_choose_bands():
+    assert 64 % choose_bands(64, 0.8) == 0
+    # A lower threshold needs more (shorter) bands
+    assert choose_bands(64, 0.5) > choose_bands(64, 0.8)
@@ -0,0 +1,71 @@
+import threading
+import numpy as np
+import pytest
+from app.models.embedding_cache import EmbeddingCache, normalize_query, ENTRY_OVERHEAD_BYTES
+
+def test_normalize_query():
+    assert normalize_query("  Restaurants   NEAR me ") == "restaurants near me"
+    assert normalize_query("Coffee shop\topen now") == "coffee shop open now"
+
+    # The appended location suffix is dropped when the location is known
+    assert normalize_query("Find sushi near San  Francisco", "San Francisco") == "find sushi"
+    # ...but only when it is actually the suffix
+    assert normalize_query("Find sushi near me", "San Francisco") == "find sushi near me"
+
+def test_hits_misses_and_lru_eviction():
+    vector = np.ones(4, dtype=np.float32)
+    entry_size = vector.nbytes + ENTRY_OVERHEAD_BYTES + 60
+    cache = EmbeddingCache(max_bytes=entry_size * 2)
+
+    cache.put("a", vector)
+    cache.put("b", vector * 2)
+    assert cache.get("a") is not None  # "a" is now most recently used
+    cache.put("c", vector * 3)          # evicts "b"
+
+    assert cache.get("b") is None
+    np.testing.assert_array_equal(cache.get("c"), vector * 3)
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+    assert stats["entries"] == 2
+    assert stats["bytes"] <= cache.max_bytes
+
+def test_ttl_expiry():
+    cache = EmbeddingCache(max_bytes=1 << 20, ttl=60)
+    cache.put_many(["old"], [np.zeros(4)], stored_at=0)
+    cache.put("new", np.zeros(4))
+
+    assert cache.get("old") is None
+    assert cache.get("new") is not None
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / "cache.npz")
+    cache = EmbeddingCache(max_bytes=1 << 20)
+    cache.put("restaurants near me", np.arange(4, dtype=np.float32))
+    cache.put("coffee shop open now", np.ones(4, dtype=np.float32))
+    cache.save(path)
+
+    restored = EmbeddingCache(max_bytes=1 << 20)
+    assert restored.load(path) == 2
+    np.testing.assert_array_equal(restored.get("restaurants near me"), np.arange(4))
+
+def test_concurrent_access():
+    cache = EmbeddingCache(max_bytes=64 * 1024)
+
+    def worker(offset):
+        for i in range(500):
+            key = f"query {(i + offset) % 50}"
+            if cache.get(key) is None:
+                cache.put(key, np.full(8, i, dtype=np.float32))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = cache.stats()
+    assert stats["hits"] + stats["misses"] == 8 * 500
+    assert stats["bytes"] <= cache.max_bytes
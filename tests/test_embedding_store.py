@@ -0,0 +1,91 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from embedding_store import EmbeddingStore, encode_labels, encoder_version, export_matrices, iter_batches
+
+class CountingEncoder:
+    """Deterministic 4-d "embeddings" derived from the text; records what it encoded."""
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, batch_size=64):
+        self.encoded.extend(texts)
+        return np.array([[len(t), t.count(" "), ord(t[0]), 1.0] for t in texts], dtype=np.float32)
+
+@pytest.fixture
+def dataset(tmp_path):
+    path = tmp_path / "data.csv"
+    pd.DataFrame({
+        "sentence": ["Find a park", "find  a PARK", "pizza near me", "where to buy socks", "a quiet cafe"],
+        "label": ["park", "park", "restaurant", "store", "restaurant"],
+    }).to_csv(path, index=False)
+    return str(path)
+
+def test_update_encodes_only_new_normalized_sentences(tmp_path, dataset):
+    sentences = pd.read_csv(dataset)["sentence"].tolist()
+    encoder = CountingEncoder()
+    store = EmbeddingStore(str(tmp_path / "store"), "v1")
+    assert store.update(sentences, encoder, chunk_size=2) == 4
+    assert encoder.encoded == ["find a park", "pizza near me", "where to buy socks", "a quiet cafe"]
+
+    # Reopened store: nothing to do, then only the changed sentence is encoded
+    reopened = EmbeddingStore(str(tmp_path / "store"), "v1")
+    assert len(reopened) == 4
+    assert reopened.update(sentences, encoder) == 0
+    assert reopened.update(sentences[:4] + ["a loud cafe"], encoder) == 1
+    assert encoder.encoded[-1] == "a loud cafe"
+    np.testing.assert_array_equal(reopened.get(["Find a park"]), [[11, 2, ord("f"), 1]])
+
+    # A different encoder version shares no keys
+    assert EmbeddingStore(str(tmp_path / "store"), "v2").update(sentences, encoder) == 4
+
+def test_float16_store_and_interrupted_append(tmp_path):
+    store = EmbeddingStore(str(tmp_path / "store"), "v1", dtype="float16")
+    store.update(["one", "two"], CountingEncoder())
+    # Bytes written by an update that died before recording its rows are dropped
+    with open(tmp_path / "store" / "vectors.bin", "ab") as f:
+        f.write(b"\x00" * 7)
+    store = EmbeddingStore(str(tmp_path / "store"), "v1")
+    store.update(["three"], CountingEncoder())
+    assert store.vectors.dtype == np.float16
+    np.testing.assert_array_equal(store.get(["two", "three"])[:, 0], [3, 5])
+    with pytest.raises(KeyError):
+        store.get(["four"])
+
+def test_batches_and_export_are_label_aligned(tmp_path, dataset):
+    store = EmbeddingStore(str(tmp_path / "store"), "v1")
+    store.update(pd.read_csv(dataset)["sentence"].tolist(), CountingEncoder())
+    classes = np.array(["park", "restaurant", "store"])
+
+    batches = list(iter_batches(store, dataset, classes, batch_size=2))
+    assert [len(y) for _, y in batches] == [2, 2, 1]
+    assert np.concatenate([y for _, y in batches]).tolist() == [0, 0, 1, 2, 1]
+
+    assert export_matrices(store, dataset, str(tmp_path / "export"), classes, batch_size=2) == 5
+    X = np.load(tmp_path / "export" / "X.npy", mmap_mode="r")
+    y = np.load(tmp_path / "export" / "y.npy")
+    assert X.shape == (5, 4) and X.dtype == np.float32
+    np.testing.assert_array_equal(X[0], X[1])
+    assert y.tolist() == [0, 0, 1, 2, 1]
+    assert json.loads((tmp_path / "export" / "classes.json").read_text()) == ["park", "restaurant", "store"]
+
+def test_compact_keeps_only_current_rows(tmp_path):
+    store = EmbeddingStore(str(tmp_path / "store"), "v1")
+    store.update(["one", "two", "three"], CountingEncoder())
+    assert store.compact(["three", "one"]) == 2
+    store = EmbeddingStore(str(tmp_path / "store"), "v1")
+    np.testing.assert_array_equal(store.get(["one", "three"])[:, 0], [3, 5])
+    assert store.lookup(store.keys_for(["two"])).tolist() == [-1]
+
+def test_unknown_labels_and_encoder_version(tmp_path):
+    with pytest.raises(ValueError, match="gym"):
+        encode_labels(["park", "gym"], np.array(["park"]))
+    model = tmp_path / "encoder"
+    model.mkdir()
+    (model / "weights.bin").write_bytes(b"1234")
+    before = encoder_version("torch", str(model))
+    (model / "weights.bin").write_bytes(b"123456")
+    assert encoder_version("torch", str(model)) != before
+    assert encoder_version("torch", "all-MiniLM-L6-v2") == "torch:all-MiniLM-L6-v2"
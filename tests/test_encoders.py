@@ -0,0 +1,61 @@
+import json
+import numpy as np
+import pytest
+from app.models.encoders import load_encoder, l2_normalize, mean_pool
+
+def test_mean_pool_ignores_padding():
+    tokens = np.array([[[1.0, 1.0], [3.0, 3.0], [100.0, 100.0]]])
+    mask = np.array([[1, 1, 0]])
+    np.testing.assert_allclose(mean_pool(tokens, mask), [[2.0, 2.0]])
+
+def test_l2_normalize():
+    normalized = l2_normalize(np.array([[3.0, 4.0], [0.0, 0.0]]))
+    np.testing.assert_allclose(normalized[0], [0.6, 0.8])
+    np.testing.assert_allclose(normalized[1], [0.0, 0.0])
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        load_encoder("tflite", "all-MiniLM-L6-v2", "models/encoder_onnx")
+
+def export_tiny_encoder(model_dir, table, vocab):
+    """Write an ONNX "transformer" that looks up one embedding row per token, and its tokenizer."""
+    from onnx import TensorProto, helper, numpy_helper
+    from tokenizers import Tokenizer, models, pre_tokenizers
+    from transformers import PreTrainedTokenizerFast
+
+    graph = helper.make_graph(
+        [helper.make_node("Gather", ["table", "input_ids"], ["token_embeddings"])],
+        "tiny_encoder",
+        [helper.make_tensor_value_info("input_ids", TensorProto.INT64, ["batch", "sequence"])],
+        [helper.make_tensor_value_info("token_embeddings", TensorProto.FLOAT, ["batch", "sequence", table.shape[1]])],
+        initializer=[numpy_helper.from_array(table, name="table")],
+    )
+    # An IR version old enough for every supported onnxruntime
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)], ir_version=8)
+    with open(model_dir / "model.onnx", "wb") as f:
+        f.write(model.SerializeToString())
+
+    tokenizer = Tokenizer(models.WordLevel(vocab, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    PreTrainedTokenizerFast(tokenizer_object=tokenizer, pad_token="[PAD]", unk_token="[UNK]").save_pretrained(
+        str(model_dir)
+    )
+    with open(model_dir / "encoder_config.json", "w") as f:
+        json.dump({"embedding_dim": table.shape[1], "max_seq_length": 16, "normalize": True}, f)
+
+def test_onnx_encoder_mean_pools_and_normalizes(tmp_path):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("onnx")
+    pytest.importorskip("transformers")
+    vocab = {"[PAD]": 0, "[UNK]": 1, "park": 2, "cafe": 3}
+    table = np.array([[100.0, 100.0], [0.0, 1.0], [3.0, 0.0], [1.0, 4.0]], dtype=np.float32)
+    export_tiny_encoder(tmp_path, table, vocab)
+
+    encoder = load_encoder("onnx", "unused", str(tmp_path), offline=True)
+    assert encoder.get_sentence_embedding_dimension() == 2
+    # The shorter query is padded: the [PAD] row must not leak into its embedding
+    embeddings = encoder.encode(["park cafe", "park"], batch_size=2)
+    assert embeddings.dtype == np.float32 and embeddings.shape == (2, 2)
+    np.testing.assert_allclose(embeddings, l2_normalize(np.array([[2.0, 2.0], [3.0, 0.0]])), rtol=1e-6)
+    np.testing.assert_allclose(encoder.encode(["park cafe", "park"], batch_size=1), embeddings, rtol=1e-6)
+    assert encoder.encode([]).shape == (0, 2)
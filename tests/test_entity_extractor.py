@@ -0,0 +1,55 @@
+import json
+from app.models.entity_extractor import GazetteerExtractor, get_extractor
+
+LEXICON = {
+    "version": "test-1",
+    "entities": {
+        "location_hint": {"nearby": ["near", "near me", "around here"]},
+        "time_hint": {"open_now": ["open", "now", "open now"], "open_late": ["open late"]},
+        "distance": {"{num} km": ["<num> km", "within <num> km"]},
+    },
+}
+
+def test_whole_word_matches_only():
+    extractor = GazetteerExtractor(LEXICON)
+    assert extractor.extract("I have known him for years") == {}
+    assert extractor.extract("Is the store opening soon") == {}
+    assert extractor.extract("Is it open?") == {"time_hint": "open_now"}
+
+def test_leftmost_longest_match():
+    extractor = GazetteerExtractor(LEXICON)
+    spans = extractor.extract_spans("Bars open late near me")
+    assert [(s.label, s.value, s.text) for s in spans] == [
+        ("time_hint", "open_late", "open late"),
+        ("location_hint", "nearby", "near me"),
+    ]
+
+def test_span_offsets():
+    text = "Pizza around here"
+    span = GazetteerExtractor(LEXICON).extract_spans(text)[0]
+    assert text[span.start:span.end] == "around here"
+
+def test_number_placeholder():
+    extractor = GazetteerExtractor(LEXICON)
+    assert extractor.extract("sushi within 2.5 km") == {"distance": "2.5 km"}
+    assert extractor.extract("sushi 3km away") == {"distance": "3 km"}
+    assert extractor.extract("within a few km") == {}
+
+def test_custom_lexicon_file(tmp_path):
+    path = tmp_path / "lexicon.json"
+    path.write_text(json.dumps(LEXICON))
+    extractor = get_extractor(str(path))
+    assert extractor is get_extractor(str(path))
+    assert extractor.version == "test-1"
+    assert extractor.size == 9
+    assert extractor.max_phrase_tokens == 3
+
+def test_default_lexicon():
+    entities = get_extractor().extract("Cheap vegan restaurants within 2 miles that are open now")
+    assert entities == {
+        "price_level": "cheap",
+        "cuisine": "vegan",
+        "category": "restaurant",
+        "distance": "2 mi",
+        "time_hint": "open_now",
+    }
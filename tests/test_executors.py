@@ -0,0 +1,54 @@
+import asyncio
+import threading
+import time
+import pytest
+from app.services.executors import BoundedExecutor, ExecutorOverloadedError
+
+@pytest.mark.asyncio
+async def test_run_returns_result():
+    executor = BoundedExecutor("test", max_workers=2, max_pending=4)
+    assert await executor.run(lambda a, b: a + b, 2, 3) == 5
+    assert executor.pending == 0
+    executor.shutdown()
+
+@pytest.mark.asyncio
+async def test_rejects_when_full():
+    release = threading.Event()
+    executor = BoundedExecutor("test", max_workers=1, max_pending=2)
+
+    blocked = [asyncio.ensure_future(executor.run(release.wait, 5)) for _ in range(2)]
+    await asyncio.sleep(0.05)
+
+    with pytest.raises(ExecutorOverloadedError):
+        await executor.run(lambda: None)
+    assert executor.stats()["rejected"] == 1
+
+    release.set()
+    await asyncio.gather(*blocked)
+    assert executor.pending == 0
+    executor.shutdown()
+
+@pytest.mark.asyncio
+async def test_timeout_keeps_slot_until_thread_finishes():
+    executor = BoundedExecutor("test", max_workers=1, max_pending=1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await executor.run(time.sleep, 0.3, timeout=0.05)
+    # The sleeping thread still occupies the pool
+    assert executor.pending == 1
+
+    await asyncio.sleep(0.5)
+    assert executor.pending == 0
+    executor.shutdown()
+
+@pytest.mark.asyncio
+async def test_event_loop_stays_responsive():
+    executor = BoundedExecutor("test", max_workers=2, max_pending=8)
+    work = asyncio.ensure_future(asyncio.gather(*(executor.run(time.sleep, 0.2) for _ in range(4))))
+
+    started = time.perf_counter()
+    await asyncio.sleep(0)
+    assert time.perf_counter() - started < 0.05
+
+    await work
+    executor.shutdown()
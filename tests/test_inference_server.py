@@ -0,0 +1,68 @@
+import os
+import tempfile
+import threading
+import pytest
+from app.models.inference_server import InferenceServer, RemoteNLUModel
+from app.models.nlu_model import NLUModel, ModelNotReadyError
+
+@pytest.fixture
+def socket_path():
+    # Unix socket paths are length-limited, so keep them short
+    directory = tempfile.mkdtemp(prefix="nlu")
+    yield os.path.join(directory, "s")
+
+def serve(model, path):
+    server = InferenceServer(path, model)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def test_remote_predictions_match_local(socket_path):
+    model = NLUModel()
+    server = serve(model, socket_path)
+    remote = RemoteNLUModel(socket_path)
+
+    texts = ["Find me a restaurant", "Show me nearby parks open now"]
+    assert remote.is_ready
+    assert remote.predict_batch(texts) == model.predict_batch(texts)
+    assert remote.predict(texts[0], "San Francisco") == model.predict(texts[0], "San Francisco")
+    assert remote.predict_batch([]) == []
+
+    server.shutdown()
+    server.server_close()
+
+def test_concurrent_clients(socket_path):
+    model = NLUModel()
+    server = serve(model, socket_path)
+    remote = RemoteNLUModel(socket_path)
+    results = {}
+
+    def call(i):
+        results[i] = remote.predict(f"Find me a coffee shop number {i}")
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 16
+    assert all("intent" in result for result in results.values())
+    server.shutdown()
+    server.server_close()
+
+def test_not_ready_error_is_propagated(socket_path):
+    server = serve(NLUModel(lazy=True), socket_path)
+    remote = RemoteNLUModel(socket_path)
+
+    assert not remote.is_ready
+    assert remote.readiness()["status"] == "not_loaded"
+    with pytest.raises(ModelNotReadyError):
+        remote.predict("Find me a restaurant")
+
+    server.shutdown()
+    server.server_close()
+
+def test_unavailable_sidecar(socket_path):
+    remote = RemoteNLUModel(socket_path)
+    assert remote.readiness()["status"] == "unavailable"
+    assert not remote.is_ready
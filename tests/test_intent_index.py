@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from app.models.intent_index import IntentIndex
+
+@pytest.fixture
+def corpus():
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(500, 16)).astype(np.float32)
+    intents = [f"intent_{i % 7}" for i in range(500)]
+    return embeddings, intents
+
+@pytest.mark.parametrize("ivf_lists", [0, 8])
+def test_exact_match_returns_stored_intent(corpus, ivf_lists):
+    embeddings, intents = corpus
+    index = IntentIndex.build(embeddings, intents, ivf_lists=ivf_lists, nprobe=2)
+    # Scaling doesn't change cosine similarity
+    similarities, found = index.search(embeddings[:20] * 3.0)
+    np.testing.assert_allclose(similarities, 1.0, atol=1e-5)
+    assert found == intents[:20]
+
+def test_save_load_memory_maps(corpus, tmp_path):
+    embeddings, intents = corpus
+    IntentIndex.build(embeddings, intents, ivf_lists=4).save(str(tmp_path))
+    index = IntentIndex.load(str(tmp_path))
+    assert isinstance(index.embeddings, np.memmap)
+    assert index.embeddings.dtype == np.float32
+    assert index.embeddings.flags["C_CONTIGUOUS"]
+    assert index.stats()["ivf_lists"] == 4
+    assert index.search(embeddings[:5])[1] == intents[:5]
+
+def test_incremental_add(corpus, tmp_path):
+    embeddings, intents = corpus
+    index = IntentIndex.build(embeddings, intents)
+    extra = np.eye(16, dtype=np.float32)[:2]
+    index.add(extra, ["brand_new", "intent_1"])
+    assert len(index) == 502
+    assert index.search(extra)[1] == ["brand_new", "intent_1"]
+
+    index.save(str(tmp_path))
+    reloaded = IntentIndex.load(str(tmp_path))
+    assert reloaded.stats()["added_rows"] == 0
+    assert reloaded.search(extra)[1] == ["brand_new", "intent_1"]
+
+def test_empty_index_never_matches():
+    index = IntentIndex.build(np.zeros((0, 4), dtype=np.float32), [])
+    similarities, found = index.search(np.ones((2, 4), dtype=np.float32))
+    assert list(similarities) == [-1.0, -1.0]
+    assert found == [None, None]
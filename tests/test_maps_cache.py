@@ -0,0 +1,89 @@
+import threading
+import pytest
+from app.services.google_maps import GoogleMapsService
+from app.services.maps_cache import MapsCache, MemoryCacheBackend, SQLiteCacheBackend
+
+@pytest.fixture(params=["memory", "sqlite"])
+def cache(request, tmp_path):
+    if request.param == "memory":
+        return MapsCache(MemoryCacheBackend(max_entries=100))
+    return MapsCache(SQLiteCacheBackend(str(tmp_path / "maps.sqlite3")))
+
+def count_calls(client, name):
+    return sum(1 for call in client.calls if call[0] == name)
+
+def test_search_nearby_is_cached(cache, fake_maps_client):
+    service = GoogleMapsService(client=fake_maps_client, cache=cache)
+
+    first = service.search_nearby("San Francisco", radius=1000, type="restaurant")
+    second = service.search_nearby("  san   francisco ", radius=1000, type="restaurant")
+
+    assert first == second
+    assert len(first) == 3
+    assert count_calls(fake_maps_client, "geocode") == 1
+    assert count_calls(fake_maps_client, "places_nearby") == 1
+
+    stats = service.cache_stats()
+    assert stats["geocode"]["hits"] == 1
+    assert stats["nearby"]["hits"] == 1
+
+def test_nearby_key_includes_radius_and_type(cache, fake_maps_client):
+    service = GoogleMapsService(client=fake_maps_client, cache=cache)
+
+    service.search_nearby("San Francisco", radius=1000, type="restaurant")
+    service.search_nearby("San Francisco", radius=2000, type="restaurant")
+    service.search_nearby("San Francisco", radius=1000, type="park")
+
+    assert count_calls(fake_maps_client, "geocode") == 1
+    assert count_calls(fake_maps_client, "places_nearby") == 3
+
+def test_nearby_key_rounds_coordinates():
+    cache = MapsCache(MemoryCacheBackend(), coordinate_precision=3)
+    a = cache.nearby_key({"lat": 37.77492, "lng": -122.41941}, 1000, "restaurant")
+    b = cache.nearby_key({"lat": 37.77488, "lng": -122.41938}, 1000, "restaurant")
+    assert a == b
+
+def test_unknown_location(cache, fake_maps_client):
+    service = GoogleMapsService(client=fake_maps_client, cache=cache)
+    assert service.search_nearby("Nowhere") == []
+    assert service.search_nearby("Nowhere") == []
+    assert count_calls(fake_maps_client, "geocode") == 1
+
+def test_concurrent_misses_are_coalesced(fake_maps_client):
+    fake_maps_client.delay = 0.2
+    service = GoogleMapsService(client=fake_maps_client, cache=MapsCache(MemoryCacheBackend()))
+
+    threads = [threading.Thread(target=service.geocode, args=("San Francisco",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert count_calls(fake_maps_client, "geocode") == 1
+    stats = service.cache_stats()["geocode"]
+    assert stats["misses"] == 1
+    assert stats["hits"] + stats["coalesced"] == 7
+
+def test_errors_are_not_cached():
+    cache = MapsCache(MemoryCacheBackend())
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise RuntimeError("upstream down")
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            cache.get_or_fetch("geocode", "x", 60, failing)
+    assert len(calls) == 2
+    assert cache.stats()["geocode"]["errors"] == 2
+
+def test_memory_backend_evicts_lru():
+    backend = MemoryCacheBackend(max_entries=2)
+    backend.set("a", 1, 60)
+    backend.set("b", 2, 60)
+    backend.get("a")
+    backend.set("c", 3, 60)
+    assert backend.get("b") is None
+    assert backend.get("a") == 1
+    assert backend.get("c") == 3
@@ -0,0 +1,57 @@
+import pytest
+from app.metrics import (
+    Counter, Histogram, Registry, STAGE_ERRORS, STAGE_SECONDS,
+    end_request_timing, server_timing_header, start_request_timing, timed
+)
+
+def test_histogram_render_is_cumulative():
+    histogram = Histogram("test_seconds", "Test", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value, "encode")
+    lines = histogram.render()
+    assert 'test_seconds_bucket{stage="encode",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{stage="encode",le="1"} 3' in lines
+    assert 'test_seconds_bucket{stage="encode",le="+Inf"} 4' in lines
+    assert 'test_seconds_sum{stage="encode"} 6.05' in lines
+    assert 'test_seconds_count{stage="encode"} 4' in lines
+
+def test_registry_render_with_collectors():
+    registry = Registry()
+    counter = registry.register(Counter("test_total", "Test", ("kind",)))
+    counter.inc('say "hi"')
+    registry.register_collector("a", lambda: [("test_depth", "gauge", "Depth", [({"pool": "a"}, 3)])])
+    registry.register_collector("b", lambda: [("test_depth", "gauge", "Depth", [({"pool": "b"}, 1.5)])])
+    registry.register_collector("broken", lambda: 1 / 0)
+
+    body = registry.render()
+    assert "# TYPE test_total counter" in body
+    assert 'test_total{kind="say \\"hi\\""} 1' in body
+    # Families reported by several collectors are rendered once
+    assert body.count("# TYPE test_depth gauge") == 1
+    assert 'test_depth{pool="a"} 3' in body
+    assert 'test_depth{pool="b"} 1.5' in body
+
+def test_timed_records_duration_and_errors():
+    before = STAGE_SECONDS.count("test_stage")
+    errors = STAGE_ERRORS.value("test_stage")
+    with timed("test_stage"):
+        pass
+    with pytest.raises(RuntimeError):
+        with timed("test_stage"):
+            raise RuntimeError("upstream failed")
+    assert STAGE_SECONDS.count("test_stage") == before + 2
+    assert STAGE_ERRORS.value("test_stage") == errors + 1
+
+def test_request_timing_scope():
+    timings, token = start_request_timing()
+    try:
+        with timed("geocode"):
+            pass
+        with timed("geocode"):
+            pass
+    finally:
+        end_request_timing(token)
+    with timed("geocode"):
+        pass
+    assert list(timings) == ["geocode"]
+    assert server_timing_header({"encode": 0.0031}, total=0.004) == "encode;dur=3.10, total;dur=4.00"
@@ -0,0 +1,172 @@
+import os
+import threading
+import time
+import numpy as np
+import pytest
+from app.models.model_bundle import (
+    NUMPY_CLASSIFIER_FILE, ModelBundle, bundle_path, current_version, list_versions, set_current, write_manifest
+)
+from app.models.ngram_classifier import HashedNgramClassifier
+from app.models.nlu_model import NLUModel
+from app.models.numpy_classifier import NumpyClassifier
+
+@pytest.fixture
+def bundles_dir(tmp_path, monkeypatch):
+    path = str(tmp_path / "bundles")
+    monkeypatch.setattr("app.models.nlu_model.INFERENCE_MODE", "numpy")
+    monkeypatch.setattr("app.models.nlu_model.MODEL_BUNDLES_DIR", path)
+    return path
+
+@pytest.fixture(scope="module")
+def embedding_dim():
+    return NLUModel._load_encoder().get_sentence_embedding_dimension()
+
+def publish(bundles_dir, version, intent, dim):
+    """A bundle whose classifier answers `intent` for every query."""
+    path = bundle_path(bundles_dir, version)
+    os.makedirs(path)
+    layers = [{"type": "dense", "kernel": np.zeros((dim, 2), dtype=np.float32),
+               "bias": np.array([4.0, 0.0], dtype=np.float32), "activation": "softmax"}]
+    NumpyClassifier(layers, [intent, "other"]).save(os.path.join(path, NUMPY_CLASSIFIER_FILE))
+    write_manifest(path, version)
+
+def test_current_version_resolution(tmp_path):
+    bundles = str(tmp_path)
+    os.makedirs(tmp_path / "002")  # No bundle.json yet: still being published
+    assert current_version(bundles) is None
+    write_manifest(str(tmp_path / "002"), "002")
+    os.makedirs(tmp_path / "001")
+    write_manifest(str(tmp_path / "001"), "001")
+    assert list_versions(bundles) == ["001", "002"]
+    assert current_version(bundles) == "002"
+    set_current(bundles, "001")
+    assert current_version(bundles) == "001"
+    with pytest.raises(ValueError):
+        bundle_path(bundles, "../elsewhere")
+    with pytest.raises(FileNotFoundError):
+        ModelBundle.load(bundles, "003", mode="numpy")
+
+def test_reload_swaps_version(bundles_dir, embedding_dim):
+    publish(bundles_dir, "v1", "park", embedding_dim)
+    model = NLUModel()
+    assert model.predict("somewhere green")["intent"] == "park"
+    assert model.readiness()["model_version"] == "v1"
+
+    publish(bundles_dir, "v2", "cafe", embedding_dim)
+    result = model.reload()
+    assert result["swapped"] and result["previous"] == "v1" and result["version"] == "v2"
+    prediction = model.predict("somewhere green")
+    assert prediction["intent"] == "cafe" and prediction["model_version"] == "v2"
+    assert model.swap_count == 1
+    assert model.reload("v2")["swapped"] is False
+
+def test_in_flight_requests_finish_on_old_bundle(bundles_dir, embedding_dim):
+    publish(bundles_dir, "v1", "park", embedding_dim)
+    model = NLUModel()
+    old = model.bundle
+    entered, release = threading.Event(), threading.Event()
+    forward = old.forward
+
+    def slow_forward(embeddings):
+        entered.set()
+        release.wait(5)
+        return forward(embeddings)
+    old.forward = slow_forward
+
+    predictions, reloads = [], []
+    request = threading.Thread(target=lambda: predictions.extend(model.predict_batch(["somewhere green"])))
+    request.start()
+    assert entered.wait(5)
+
+    publish(bundles_dir, "v2", "cafe", embedding_dim)
+    swap = threading.Thread(target=lambda: reloads.append(model.reload()))
+    swap.start()
+    deadline = time.time() + 5
+    while model.model_version != "v2" and time.time() < deadline:
+        time.sleep(0.01)
+    # New requests already use v2 while the old one is still running
+    assert model.predict("somewhere green")["intent"] == "cafe"
+    assert old.model is not None and swap.is_alive()
+
+    release.set()
+    request.join(5)
+    swap.join(5)
+    assert predictions[0]["intent"] == "park" and predictions[0]["model_version"] == "v1"
+    assert reloads[0]["drained"] is True
+    assert old.model is None and old.in_flight == 0
+
+def test_broken_bundle_keeps_current_model(bundles_dir, embedding_dim):
+    publish(bundles_dir, "v1", "park", embedding_dim)
+    model = NLUModel()
+    publish(bundles_dir, "v2", "cafe", embedding_dim + 1)
+    with pytest.raises(ValueError):
+        model.reload()
+    assert model.model_version == "v1"
+    assert model.readiness()["reload_error"].startswith("v2:")
+    assert model.predict("somewhere green")["intent"] == "park"
+
+def test_watcher_swaps_when_current_changes(bundles_dir, embedding_dim):
+    publish(bundles_dir, "v1", "park", embedding_dim)
+    publish(bundles_dir, "v2", "cafe", embedding_dim)
+    set_current(bundles_dir, "v1")
+    model = NLUModel()
+    assert model.model_version == "v1"
+    model.start_watching(interval=0.02)
+    try:
+        set_current(bundles_dir, "v2")
+        deadline = time.time() + 5
+        while model.model_version != "v2" and time.time() < deadline:
+            time.sleep(0.02)
+        assert model.model_version == "v2"
+    finally:
+        model.stop_watching()
+
+def test_drain_timeout_leaves_stragglers_their_bundle(bundles_dir, embedding_dim):
+    publish(bundles_dir, "v1", "park", embedding_dim)
+    model = NLUModel()
+    old = model.bundle
+    entered, release = threading.Event(), threading.Event()
+    forward = old.forward
+
+    def slow_forward(embeddings):
+        entered.set()
+        release.wait(5)
+        return forward(embeddings)
+    old.forward = slow_forward
+
+    predictions = []
+    request = threading.Thread(target=lambda: predictions.extend(model.predict_batch(["somewhere green"])))
+    request.start()
+    assert entered.wait(5)
+
+    publish(bundles_dir, "v2", "cafe", embedding_dim)
+    result = model.reload(drain_timeout=0.1)
+    assert result["swapped"] and result["drained"] is False
+    # The straggler still holds the old bundle, so it must not be released yet
+    assert old.model is not None and old.retired
+
+    release.set()
+    request.join(5)
+    assert predictions[0]["intent"] == "park" and predictions[0]["model_version"] == "v1"
+    assert old.model is None and old.in_flight == 0
+    assert model.predict("somewhere green")["intent"] == "cafe"
+
+def test_reload_disables_a_cascade_with_other_intents(bundles_dir, embedding_dim, tmp_path, monkeypatch):
+    texts = ["a park nearby", "a quiet park", "any playground", "a museum", "a cinema", "the zoo"]
+    cascade = HashedNgramClassifier.train(texts, ["park"] * 3 + ["other"] * 3, n_buckets=1024, epochs=5)
+    path = str(tmp_path / "cascade.npz")
+    cascade.save(path)
+    monkeypatch.setattr("app.models.nlu_model.CASCADE_PATH", path)
+    publish(bundles_dir, "v1", "park", embedding_dim)
+    model = NLUModel()
+    assert model.cascade is not None
+
+    publish(bundles_dir, "v2", "cafe", embedding_dim)
+    model.reload()
+    assert model.cascade is None
+    assert model.predict("a quiet park")["intent"] == "cafe"
+
+    # Reloaded from NLU_CASCADE_PATH once a bundle with its intents is back
+    publish(bundles_dir, "v3", "park", embedding_dim)
+    model.reload()
+    assert model.cascade is not None
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from app.models.ngram_classifier import HashedNgramClassifier, ngram_features
+from app.models.nlu_model import NLUModel
+
+TEMPLATES = ["find me a {} near me", "where is the closest {}", "I want {} nearby", "any good {} open now"]
+KEYWORDS = {"restaurant": ["pizza", "sushi", "tacos"], "park": ["park", "playground", "trail"],
+            "store": ["pharmacy", "grocery", "hardware"]}
+
+@pytest.fixture(scope="module")
+def dataset():
+    texts, labels = [], []
+    for label, keywords in KEYWORDS.items():
+        for keyword in keywords:
+            for template in TEMPLATES:
+                texts.append(template.format(keyword))
+                labels.append(label)
+    return texts, labels
+
+@pytest.fixture(scope="module")
+def cascade(dataset):
+    model = HashedNgramClassifier.train(*dataset, n_buckets=4096, epochs=20)
+    model.calibrate(["pizza park", "sushi", "trail", "a good park for tacos", "grocery"],
+                    ["restaurant", "restaurant", "park", "park", "store"])
+    return model
+
+def test_features_are_normalized_ngrams():
+    features = ngram_features("Find  PIZZA")
+    assert features[:3] == [b"w find", b"w pizza", b"b find pizza"]
+    assert b"c <fi" in features and b"c za>" in features
+    assert ngram_features("find pizza") == features
+    assert ngram_features("") == []
+
+def test_trained_cascade_separates_keywords(cascade):
+    intents, confidences = cascade.predict(["where is the closest sushi", "I want a trail nearby", ""])
+    assert intents[:2].tolist() == ["restaurant", "park"]
+    # No features: only the bias speaks, so the cascade is less sure
+    assert min(confidences[:2]) > confidences[2]
+    np.testing.assert_allclose(cascade.predict_proba(["x", "pizza"]).sum(axis=1), 1.0, rtol=1e-5)
+
+def test_save_and_load_round_trip(cascade, tmp_path):
+    cascade.threshold = 0.8
+    path = str(tmp_path / "cascade.npz")
+    cascade.save(path, metadata={"source": "test"})
+    loaded = HashedNgramClassifier.from_file(path)
+    assert loaded.threshold == 0.8 and loaded.temperature == cascade.temperature
+    assert loaded.metadata == {"source": "test"}
+    texts = ["pizza near me", "where is a playground"]
+    np.testing.assert_array_equal(loaded.predict_proba(texts), cascade.predict_proba(texts))
+
+def test_nlu_model_escalates_unsure_queries(cascade, tmp_path, monkeypatch):
+    texts = ["find me a pizza near me", "Loves vegan food."]
+    _, confidences = cascade.predict(texts)
+    assert confidences[0] > confidences[1]
+    cascade.threshold = float(confidences.mean())
+    path = str(tmp_path / "cascade.npz")
+    cascade.save(path)
+    monkeypatch.setattr("app.models.nlu_model.CASCADE_PATH", path)
+    model = NLUModel()
+
+    results = model.predict_batch(texts)
+    assert results[0]["intent"] == "restaurant" and results[0]["stage"] == "cascade"
+    assert "stage" not in results[1]
+    assert results[0]["confidence"] == pytest.approx(float(confidences[0]))
+    assert model.cascade_stats() == {"answered": 1, "escalated": 1, "threshold": cascade.threshold}
+    assert model.predict("where is the closest park")["intent"] == "park"
+    assert model.cascade_stats()["answered"] == 2
+
+    # Without the first stage, every query is classified by the transformer
+    model.predict_batch(texts[:1], cascade=False)
+    assert model.cascade_stats()["answered"] == 2
+
+def test_cascade_with_other_intents_is_disabled(dataset, tmp_path, monkeypatch):
+    texts, labels = dataset
+    cascade = HashedNgramClassifier.train(
+        [t for t, label in zip(texts, labels) if label != "store"], [label for label in labels if label != "store"],
+        n_buckets=4096, epochs=5
+    )
+    path = str(tmp_path / "cascade.npz")
+    cascade.save(path)
+    monkeypatch.setattr("app.models.nlu_model.CASCADE_PATH", path)
+
+    model = NLUModel()
+    assert model.cascade is None and model.cascade_stats() is None
+    assert "stage" not in model.predict("find me a pizza near me")
@@ -1,7 +1,9 @@
 import pytest
 import numpy as np
 import warnings
-from app.models.nlu_model import NLUModel
+from app.models.intent_index import IntentIndex
+from app.models.nlu_model import NLUModel, ModelNotReadyError
+from app.models.numpy_classifier import NumpyClassifier
 
 # Filter out the specific TensorFlow deprecation warning
 # warnings.filterwarnings("ignore", category=DeprecationWarning, 
@@ -79,4 +81,96 @@ def test_predict_empty_input(nlu_model):
     assert isinstance(result, dict)
     assert "intent" in result
     assert "entities" in result
-    assert "confidence" in result 
\ No newline at end of file
+    assert "confidence" in result 
+
+def test_predict_batch_matches_predict(nlu_model):
+    texts = ["Find me a restaurant", "Show me nearby parks", "Is there a grocery store open now?"]
+    results = nlu_model.predict_batch(texts)
+
+    assert len(results) == len(texts)
+    for text, result in zip(texts, results):
+        single = nlu_model.predict(text)
+        assert result["intent"] == single["intent"]
+        assert result["entities"] == single["entities"]
+        assert abs(result["confidence"] - single["confidence"]) < 1e-5
+
+def test_predict_batch_empty(nlu_model):
+    assert nlu_model.predict_batch([]) == []
+
+def test_compiled_forward_matches_keras_predict(nlu_model):
+    texts = ["Find me a restaurant", "Show me nearby parks", "I need a doctor near me"]
+    embeddings = nlu_model.encoder.encode(texts)
+    dim = embeddings.shape[1]
+
+    compiled = NLUModel.build_forward_fn(nlu_model.model, dim, mode="compiled")
+    keras = NLUModel.build_forward_fn(nlu_model.model, dim, mode="keras")
+
+    np.testing.assert_allclose(compiled(embeddings), keras(embeddings), rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(compiled(embeddings[:1]), keras(embeddings[:1]), rtol=1e-5, atol=1e-6)
+
+def test_unknown_inference_mode(nlu_model):
+    with pytest.raises(ValueError):
+        NLUModel.build_forward_fn(nlu_model.model, 384, mode="turbo")
+
+def test_predict_uses_embedding_cache(nlu_model):
+    if nlu_model.embedding_cache is None:
+        pytest.skip("Embedding cache disabled")
+
+    nlu_model.predict("Coffee shop open now")
+    before = nlu_model.embedding_cache_stats()
+    result = nlu_model.predict("  coffee SHOP open now ")
+    after = nlu_model.embedding_cache_stats()
+
+    assert after["hits"] == before["hits"] + 1
+    assert result["entities"]["time_hint"] == "open_now"
+
+def test_lazy_loading():
+    model = NLUModel(lazy=True)
+    assert model.readiness()["status"] == "not_loaded"
+    with pytest.raises(ModelNotReadyError):
+        model.predict("Find me a restaurant")
+
+    thread = model.start_loading()
+    assert thread is not None
+    assert model.start_loading() is None  # only the first call starts loading
+    assert model.wait_until_ready(timeout=120)
+
+    readiness = model.readiness()
+    assert readiness["status"] == "ready"
+    assert readiness["load_seconds"] >= 0
+    assert "intent" in model.predict("Find me a restaurant")
+
+def test_extract_entities_whole_words():
+    # "known" and "snow" used to match "now" as a substring
+    assert NLUModel.extract_entities("Have you known snow?") == {}
+    spans = NLUModel.extract_entity_spans("Find a pharmacy nearby")
+    assert [(s.label, s.value) for s in spans] == [("category", "pharmacy"), ("location_hint", "nearby")]
+
+def test_intent_index_fast_path(nlu_model):
+    sentence = "Where can I find a pharmacy?"
+    stored = nlu_model.label_encoder.classes_[0]
+    nlu_model.intent_index = IntentIndex.build(nlu_model.embed([sentence]), [stored])
+
+    result = nlu_model.predict(sentence)
+    assert result["intent"] == stored
+    assert result["confidence"] == pytest.approx(1.0, abs=1e-5)
+    # Unrelated queries still go through the classifier
+    nlu_model.predict("Show me nearby parks")
+
+    stats = nlu_model.intent_index_stats()
+    assert stats["lookups"] == 2
+    assert stats["fast_path"] == 1
+    assert stats["rows"] == 1
+
+def test_numpy_inference_mode_matches_keras(nlu_model, tmp_path, monkeypatch):
+    path = str(tmp_path / "classifier.npz")
+    NumpyClassifier.from_keras(nlu_model.model, nlu_model.label_encoder.classes_).save(path)
+    monkeypatch.setattr("app.models.nlu_model.INFERENCE_MODE", "numpy")
+    monkeypatch.setattr("app.models.nlu_model.NUMPY_CLASSIFIER_PATH", path)
+
+    numpy_model = NLUModel()
+    assert isinstance(numpy_model.model, NumpyClassifier)
+    texts = ["I want mexican food near me", "Show me nearby parks", "Where can I find a pharmacy?"]
+    for expected, actual in zip(nlu_model.predict_batch(texts), numpy_model.predict_batch(texts)):
+        assert actual["intent"] == expected["intent"]
+        assert actual["confidence"] == pytest.approx(expected["confidence"], abs=1e-5)
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from app.models.numpy_classifier import NumpyClassifier
+
+class _Layer:
+    def __init__(self, weights=(), **config):
+        self.name = type(self).__name__.lower()
+        self._weights = [np.asarray(w, dtype=np.float32) for w in weights]
+        self._config = config
+
+    def get_weights(self):
+        return self._weights
+
+    def get_config(self):
+        return self._config
+
+class Dense(_Layer):
+    pass
+
+class Dropout(_Layer):
+    pass
+
+class BatchNormalization(_Layer):
+    pass
+
+class Conv1D(_Layer):
+    pass
+
+class _Model:
+    def __init__(self, layers):
+        self.layers = layers
+
+@pytest.fixture
+def keras_like():
+    rng = np.random.default_rng(0)
+    w1, b1 = rng.normal(size=(8, 6)), rng.normal(size=6)
+    gamma, beta, mean, var = rng.normal(size=6), rng.normal(size=6), rng.normal(size=6), rng.uniform(0.5, 2, 6)
+    w2, b2 = rng.normal(size=(6, 3)), rng.normal(size=3)
+    model = _Model([
+        Dense([w1, b1], activation="relu"),
+        BatchNormalization([gamma, beta, mean, var], epsilon=1e-3),
+        Dropout(rate=0.5),
+        Dense([w2, b2], activation="softmax"),
+    ])
+
+    def reference(x):
+        h = np.maximum(x @ w1 + b1, 0)
+        h = (h - mean) / np.sqrt(var + 1e-3) * gamma + beta
+        z = h @ w2 + b2
+        e = np.exp(z - z.max(axis=1, keepdims=True))
+        return e / e.sum(axis=1, keepdims=True)
+    return model, reference
+
+def test_matches_reference_forward_pass(keras_like):
+    model, reference = keras_like
+    classifier = NumpyClassifier.from_keras(model, ["a", "b", "c"])
+    x = np.random.default_rng(1).normal(size=(32, 8)).astype(np.float32)
+    np.testing.assert_allclose(classifier.predict_proba(x), reference(x), atol=1e-5)
+    assert classifier.input_dim == 8
+
+def test_save_and_load_round_trip(keras_like, tmp_path):
+    model, _ = keras_like
+    classifier = NumpyClassifier.from_keras(model, ["park", "restaurant", "store"])
+    path = str(tmp_path / "classifier.npz")
+    classifier.save(path, metadata={"source": "test"})
+
+    loaded = NumpyClassifier.from_file(path)
+    x = np.random.default_rng(2).normal(size=(4, 8)).astype(np.float32)
+    np.testing.assert_array_equal(loaded.predict_proba(x), classifier.predict_proba(x))
+    assert list(loaded.inverse_transform([2, 0])) == ["store", "park"]
+    assert loaded.metadata == {"source": "test"}
+
+def test_unsupported_layer_fails_export():
+    with pytest.raises(ValueError, match="Conv1D"):
+        NumpyClassifier.from_keras(_Model([Conv1D([np.zeros((3, 3))])]), ["a"])
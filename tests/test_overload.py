@@ -0,0 +1,91 @@
+import time
+import pytest
+from app.main import api_builder
+from app.models.nlu_model import NLUModel
+from app.services.overload import OverloadController, ServerOverloadedError
+
+def test_levels_step_with_in_flight():
+    controller = OverloadController(max_in_flight=10, target_latency=1.0)
+    levels = []
+    for _ in range(10):
+        levels.append(controller.acquire())
+    assert levels[:6] == [OverloadController.FULL] * 6
+    assert levels[6:8] == [OverloadController.SKIP_MAPS] * 2
+    assert levels[8:] == [OverloadController.MODEL_FREE] * 2
+
+    with pytest.raises(ServerOverloadedError):
+        controller.acquire()
+    assert controller.stats()["requests"]["reject"] == 1
+
+    for level in levels:
+        controller.release(level)
+    assert controller.acquire() == OverloadController.FULL
+
+def test_latency_pressure_expires():
+    controller = OverloadController(max_in_flight=100, target_latency=0.1, window=0.1, min_latency_samples=10)
+    for _ in range(10):
+        controller.release(controller.acquire(), seconds=0.2)
+    # Latency is re-evaluated at most every 50ms
+    time.sleep(0.06)
+    with pytest.raises(ServerOverloadedError):
+        controller.acquire()
+
+    time.sleep(0.15)
+    assert controller.acquire() == OverloadController.FULL
+
+def test_single_slow_request_on_idle_server_does_not_degrade():
+    controller = OverloadController(max_in_flight=64, target_latency=1.0)
+    controller.release(controller.acquire(), seconds=1.05)
+    time.sleep(0.06)
+    assert controller.acquire() == OverloadController.FULL
+    assert controller.stats()["latency_p90"] == pytest.approx(1.05)
+
+def test_model_free_latency_is_not_recorded():
+    controller = OverloadController(max_in_flight=100, target_latency=0.1, min_latency_samples=1)
+    controller.release(controller.acquire(), seconds=5.0)
+    controller.in_flight += 1
+    controller.release(OverloadController.MODEL_FREE, seconds=5.0)
+    time.sleep(0.06)
+    assert controller.pressure() == pytest.approx(50.0)
+
+def test_keyword_prediction():
+    prediction = NLUModel.keyword_prediction("cheap thai food near me")
+    assert prediction["intent"] == "restaurant"
+    assert prediction["confidence"] == 0.0
+    assert prediction["degraded"] == "keyword"
+    assert prediction["entities"]["cuisine"] == "thai"
+
+class FixedLevel(OverloadController):
+    def __init__(self, level):
+        super().__init__(max_in_flight=1, target_latency=1.0)
+        self.level = level
+
+    def acquire(self):
+        if self.level == self.REJECT:
+            raise ServerOverloadedError("test", retry_after=2)
+        return self.level
+
+@pytest.mark.parametrize("level, degraded", [
+    (OverloadController.FULL, None),
+    (OverloadController.SKIP_MAPS, "maps_skipped"),
+])
+def test_query_degrades(client, monkeypatch, level, degraded):
+    monkeypatch.setattr(api_builder, "overload", FixedLevel(level))
+    response = client.post("/query", json={"query": "Find me a good restaurant"})
+    assert response.status_code == 200
+    assert response.json()["degraded"] == degraded
+
+def test_query_model_free(client, monkeypatch):
+    monkeypatch.setattr(api_builder, "overload", FixedLevel(OverloadController.MODEL_FREE))
+    monkeypatch.setattr(api_builder.nlu_model, "predict", lambda *a: pytest.fail("model was run"))
+    response = client.post("/query", json={"query": "italian food near me"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["degraded"] in ("cached", "keyword")
+    assert data["results"] is None
+
+def test_query_rejected(client, monkeypatch):
+    monkeypatch.setattr(api_builder, "overload", FixedLevel(OverloadController.REJECT))
+    response = client.post("/query", json={"query": "Find me a good restaurant"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "2"
@@ -0,0 +1,84 @@
+import time
+import numpy as np
+import pytest
+from app.services.google_maps import GoogleMapsService
+from app.services.place_index import PlaceIndex, PlaceIndexWriter, _ranges
+
+CENTER = {"lat": 37.7749, "lng": -122.4194}
+
+def place(place_id, lat, lng, *types):
+    return {"place_id": place_id, "name": place_id, "types": list(types),
+            "geometry": {"location": {"lat": lat, "lng": lng}}}
+
+@pytest.fixture
+def index_path(tmp_path):
+    writer = PlaceIndexWriter(str(tmp_path / "places"))
+    writer.add(place("cafe-near", 37.7759, -122.4194, "cafe", "food"))       # ~110m
+    writer.add(place("cafe-mid", 37.7849, -122.4194, "cafe"))                # ~1.1km
+    writer.add(place("pharmacy", 37.7750, -122.4200, "pharmacy"))            # ~50m
+    writer.add(place("cafe-far", 37.8749, -122.4194, "cafe"))                # ~11km
+    writer.cover(37.70, -122.52, 37.83, -122.35)
+    assert writer.close() == 4
+    return str(tmp_path / "places")
+
+def test_ranges_concatenates_aranges():
+    assert _ranges(np.array([2, 10, 5]), np.array([4, 10, 8])).tolist() == [2, 3, 5, 6, 7]
+
+def test_radius_and_type_query_nearest_first(index_path):
+    index = PlaceIndex.load(index_path)
+    assert len(index) == 4
+    assert [p["place_id"] for p in index.query(CENTER, 2000)] == ["pharmacy", "cafe-near", "cafe-mid"]
+    assert [p["place_id"] for p in index.query(CENTER, 2000, type="cafe")] == ["cafe-near", "cafe-mid"]
+    assert [p["place_id"] for p in index.query(CENTER, 500, type="cafe")] == ["cafe-near"]
+    assert index.query(CENTER, 2000, type="cafe", limit=1)[0]["place_id"] == "cafe-near"
+
+def test_falls_back_when_index_cannot_answer(index_path):
+    index = PlaceIndex.load(index_path)
+    assert index.places_nearby(CENTER, 1000, "cafe", keyword="espresso") is None
+    assert index.places_nearby(CENTER, 1000, "gym") is None
+    # The box reaches past the --bbox region, where no cell is covered
+    assert index.places_nearby(CENTER, 20000, "cafe") is None
+    # An empty cell inside the covered region is answered locally
+    assert index.places_nearby({"lat": 37.72, "lng": -122.45}, 300) == []
+    assert index.stats == {"served": 1, "uncovered": 1, "stale": 0, "unsupported": 2}
+
+def test_stale_cells_fall_back(tmp_path):
+    writer = PlaceIndexWriter(str(tmp_path / "old"), fetched_at=time.time() - 3600)
+    # In the middle of its grid cell, so a 100m search touches no other cell
+    writer.add(place("cafe", 37.775, -122.415, "cafe"))
+    writer.close(cover_places=True)
+    center = {"lat": 37.775, "lng": -122.415}
+    assert PlaceIndex.load(str(tmp_path / "old"), max_age=7200).places_nearby(center, 100, "cafe") is not None
+    stale = PlaceIndex.load(str(tmp_path / "old"), max_age=60)
+    assert stale.places_nearby(center, 100, "cafe") is None
+    assert stale.stats["stale"] == 1
+
+def test_search_responses_do_not_cover_other_types(tmp_path, fake_maps_client):
+    # Accumulated results of a park search, which happened to include a cafe
+    writer = PlaceIndexWriter(str(tmp_path / "responses"))
+    writer.add(place("p1", 37.775, -122.415, "park"))
+    writer.add(place("c1", 37.7752, -122.4152, "cafe"))
+    writer.close()
+    index = PlaceIndex.load(str(tmp_path / "responses"))
+    center = {"lat": 37.775, "lng": -122.415}
+    assert index.places_nearby(center, 200, "cafe") is None
+    assert index.stats["served"] == 0 and index.stats["uncovered"] == 1
+
+    service = GoogleMapsService(client=fake_maps_client, cache=None, place_index=index)
+    assert [p["place_id"] for p in service.places_nearby(center, 200, type="cafe")] == ["cafe-0", "cafe-1", "cafe-2"]
+
+def test_maps_service_serves_from_index(index_path, fake_maps_client):
+    service = GoogleMapsService(client=fake_maps_client, cache=None, place_index=PlaceIndex.load(index_path))
+
+    assert [p["place_id"] for p in service.places_nearby(CENTER, 500, type="cafe")] == ["cafe-near"]
+    assert fake_maps_client.calls == []
+    # Keyword searches still go to the live API
+    assert len(service.places_nearby(CENTER, 500, type="cafe", keyword="espresso")) == 3
+    assert [call[0] for call in fake_maps_client.calls] == ["places_nearby"]
+
+def test_unreadable_index_falls_back_to_api(tmp_path, fake_maps_client, monkeypatch):
+    monkeypatch.setattr("app.services.google_maps.PLACE_INDEX_PATH", str(tmp_path / "missing"))
+    service = GoogleMapsService(client=fake_maps_client, cache=None)
+
+    assert service.place_index is None
+    assert len(service.places_nearby(CENTER, 500, type="cafe")) == 3
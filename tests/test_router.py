@@ -0,0 +1,129 @@
+import json
+import time
+import pytest
+from app.config import ENTITY_LEXICON_PATH, MAPS_ROUTES_PATH
+from app.main import api_builder
+from app.services.google_maps import GoogleMapsService
+from app.services.router import RoutingTable, SearchSpec, merge_places
+
+TABLE = {
+    "version": 1,
+    "default_radius": 5000,
+    "intents": {
+        "restaurant": [{"type": "restaurant", "keyword_entity": "cuisine"}],
+        "park": [{"type": "park", "radius": 10000}],
+    },
+    "categories": {
+        "pharmacy": [{"type": "pharmacy"}],
+        "gym": [{"type": "gym"}],
+        "cafe": [{"type": "cafe"}, {"type": "bakery", "keyword": "coffee"}],
+    },
+}
+
+@pytest.fixture
+def routes():
+    return RoutingTable.from_dict(TABLE)
+
+def test_compiles_specs(routes):
+    assert routes.intents["park"] == (SearchSpec("park", 10000),)
+    assert routes.missing_intents(["park", "restaurant", "store"]) == ["store"]
+
+def test_routes_by_intent_with_entity_keyword(routes):
+    assert routes.route("restaurant", {"cuisine": "thai"}) == [
+        {"type": "restaurant", "radius": 5000, "keyword": "thai"}
+    ]
+    assert routes.route("restaurant", {}) == [{"type": "restaurant", "radius": 5000, "keyword": None}]
+    assert routes.route("unknown", {}) == []
+
+def test_categories_take_precedence_and_fan_out(routes):
+    searches = routes.route("park", {}, ["pharmacy", "gym", "cafe"])
+    assert [search["type"] for search in searches] == ["pharmacy", "gym", "cafe", "bakery"]
+    # An unrouted category falls back to the intent
+    assert routes.route("park", {}, ["zoo"]) == [{"type": "park", "radius": 10000, "keyword": None}]
+
+def test_merge_places_dedupes_by_place_id():
+    merged = merge_places([[{"place_id": "a"}, {"place_id": "b"}], [{"place_id": "b"}, {"place_id": "c"}, {}]])
+    assert [place.get("place_id") for place in merged] == ["a", "b", "c", None]
+
+def test_shipped_table_covers_lexicon_categories():
+    routes = RoutingTable.from_file(MAPS_ROUTES_PATH)
+    assert routes.missing_intents(["park", "restaurant", "store"]) == []
+    with open(ENTITY_LEXICON_PATH) as f:
+        categories = json.load(f)["entities"]["category"]
+    assert set(categories) <= set(routes.categories)
+
+def test_build_api_call_fans_out_with_one_geocode(fake_maps_client, monkeypatch):
+    monkeypatch.setattr(api_builder, "google_maps", GoogleMapsService(client=fake_maps_client, cache=None))
+    monkeypatch.setattr(api_builder.nlu_model, "predict", lambda text, location=None: {
+        "intent": "store", "entities": {"category": "pharmacy"}, "confidence": 0.9
+    })
+
+    response = api_builder.build_api_call("is there a pharmacy or a gym open near me", location="Oakland")
+
+    assert response["api_call"]["location"] == "Oakland"
+    assert [search["type"] for search in response["api_call"]["searches"]] == ["pharmacy", "gym"]
+    calls = [call[0] for call in fake_maps_client.calls]
+    assert calls.count("geocode") == 1
+    assert calls.count("places_nearby") == 2
+    assert [place["place_id"] for place in response["results"]] == [
+        "pharmacy-0", "pharmacy-1", "pharmacy-2", "gym-0", "gym-1", "gym-2"
+    ]
+
+@pytest.mark.asyncio
+async def test_location_is_geocoded_during_inference(fake_maps_client, monkeypatch):
+    monkeypatch.setattr(api_builder, "google_maps", GoogleMapsService(client=fake_maps_client, cache=None))
+    monkeypatch.setattr(api_builder, "async_google_maps", None)
+    monkeypatch.setattr(api_builder, "speculative_geocode", True)
+    seen = {}
+
+    def predict(text, location=None):
+        time.sleep(0.1)
+        seen["text"] = text
+        seen["geocoded"] = ("geocode", "Oakland") in fake_maps_client.calls
+        return {"intent": "park", "entities": {}, "confidence": 0.9}
+    monkeypatch.setattr(api_builder.nlu_model, "predict", predict)
+    used = api_builder.speculation_stats["used"]
+
+    response = await api_builder.build_api_call_async("somewhere green to walk", location="Oakland")
+
+    assert seen == {"text": "somewhere green to walk", "geocoded": True}
+    calls = [call[0] for call in fake_maps_client.calls]
+    assert calls == ["geocode", "places_nearby"]
+    assert len(response["results"]) == 3
+    assert api_builder.speculation_stats["used"] == used + 1
+
+@pytest.mark.asyncio
+async def test_failed_geocode_is_counted_as_failed(fake_maps_client, monkeypatch):
+    monkeypatch.setattr(api_builder, "google_maps", GoogleMapsService(client=fake_maps_client, cache=None))
+    monkeypatch.setattr(api_builder, "async_google_maps", None)
+    monkeypatch.setattr(api_builder, "speculative_geocode", True)
+    monkeypatch.setattr(api_builder.nlu_model, "predict", lambda text, location=None: {
+        "intent": "park", "entities": {}, "confidence": 0.9
+    })
+
+    def geocode(location):
+        raise RuntimeError("upstream timeout")
+    monkeypatch.setattr(fake_maps_client, "geocode", geocode)
+    stats = dict(api_builder.speculation_stats)
+
+    response = await api_builder.build_api_call_async("somewhere green to walk", location="Oakland")
+
+    assert response["results"] == []
+    assert api_builder.speculation_stats["failed"] == stats["failed"] + 1
+    assert api_builder.speculation_stats["used"] == stats["used"]
+
+@pytest.mark.asyncio
+async def test_unneeded_geocode_is_discarded(fake_maps_client, monkeypatch):
+    monkeypatch.setattr(api_builder, "google_maps", GoogleMapsService(client=fake_maps_client, cache=None))
+    monkeypatch.setattr(api_builder, "async_google_maps", None)
+    monkeypatch.setattr(api_builder, "speculative_geocode", True)
+    monkeypatch.setattr(api_builder.nlu_model, "predict", lambda text, location=None: {
+        "intent": "unrouted", "entities": {}, "confidence": 0.9
+    })
+    discarded = api_builder.speculation_stats["discarded"]
+
+    response = await api_builder.build_api_call_async("tell me a joke", location="Oakland")
+
+    assert response["api_call"] is None and response["results"] is None
+    assert api_builder.speculation_stats["discarded"] == discarded + 1
+    assert [call[0] for call in fake_maps_client.calls] in ([], ["geocode"])
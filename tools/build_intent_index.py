@@ -0,0 +1,67 @@
+"""
+Build the nearest-neighbour intent index used by NLUModel's fast path.
+
+Encodes every training sentence with the configured encoder (after the same
+normalization NLUModel applies to queries) and writes an index directory.
+Point NLU_INTENT_INDEX_PATH at it to enable the fast path.
+
+Usage:
+    python tools/build_intent_index.py [--data data/full_natural_lifestyle_sentence_dataset.csv]
+        [--output models/intent_index] [--ivf-lists 0] [--nprobe 8] [--append]
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from app.models.embedding_cache import normalize_query  # noqa: E402
+from app.models.intent_index import IntentIndex  # noqa: E402
+from app.models.nlu_model import NLUModel  # noqa: E402
+
+DEFAULT_DATA = os.path.join(ROOT, "data", "full_natural_lifestyle_sentence_dataset.csv")
+DEFAULT_OUTPUT = os.path.join(ROOT, "models", "intent_index")
+
+
+def load_sentences(path: str):
+    with open(path, newline="") as f:
+        rows = [(row["sentence"], row["label"]) for row in csv.DictReader(f)]
+    # Identical sentences only need to be stored once
+    return list(dict((normalize_query(sentence, None), label) for sentence, label in rows).items())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data", default=DEFAULT_DATA, help="CSV with 'sentence' and 'label' columns")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--ivf-lists", type=int, default=0,
+                        help="Cluster into this many IVF lists (0 = exhaustive search, fine below ~100k rows)")
+    parser.add_argument("--nprobe", type=int, default=8, help="IVF lists scored per query")
+    parser.add_argument("--append", action="store_true", help="Add the sentences to the existing index")
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    rows = load_sentences(args.data)
+    sentences = [sentence for sentence, _ in rows]
+    intents = [label for _, label in rows]
+
+    encoder = NLUModel._load_encoder()
+    started = time.perf_counter()
+    embeddings = encoder.encode(sentences, batch_size=args.batch_size)
+    print(f"Encoded {len(sentences)} sentences in {time.perf_counter() - started:.1f}s")
+
+    if args.append:
+        index = IntentIndex.load(args.output, mmap=False)
+        index.add(embeddings, intents)
+    else:
+        index = IntentIndex.build(embeddings, intents, ivf_lists=args.ivf_lists, nprobe=args.nprobe)
+    index.save(args.output)
+    print(f"Wrote {len(index)} rows ({len(index.intents)} intents) to {args.output}: {index.stats()}")
+
+
+if __name__ == "__main__":
+    main()
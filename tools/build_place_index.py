@@ -0,0 +1,73 @@
+"""
+Build the local place index used for nearby searches.
+
+Reads NDJSON place records: either one Places API result per line (e.g. a
+licensed bulk export converted to the Places format) or one Nearby Search
+response per line ({"results": [...]}, e.g. accumulated live responses).
+Places are deduplicated by place_id, keeping the last record seen.
+
+Only --bbox regions, which an export is known to be complete for, are
+marked as covered; searches touching any other cell go to the live API.
+Accumulated Nearby Search responses only hold the places of the types that
+were searched for, so never cover their cells. --cover-places marks every
+cell containing a place as covered, for exports that are complete
+everywhere they have data. Point PLACE_INDEX_PATH at the output to enable it.
+
+Usage:
+    python tools/build_place_index.py places.ndjson [more.ndjson ...] [--output models/place_index]
+        [--cell-size 0.01] [--fetched-at 2026-10-01] [--bbox south,west,north,east] [--cover-places]
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from app.services.place_index import DEFAULT_CELL_SIZE, PlaceIndexWriter  # noqa: E402
+
+DEFAULT_OUTPUT = os.path.join(ROOT, "models", "place_index")
+
+
+def read_places(paths):
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                yield from record["results"] if "results" in record else [record]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("inputs", nargs="+", help="NDJSON files of places or Nearby Search responses")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--cell-size", type=float, default=DEFAULT_CELL_SIZE, help="Grid cell size in degrees")
+    parser.add_argument("--fetched-at", help="ISO date the data was fetched (default: now)")
+    parser.add_argument("--bbox", action="append", default=[],
+                        help="south,west,north,east of a region the data is complete for (repeatable)")
+    parser.add_argument("--cover-places", action="store_true",
+                        help="Also treat every cell containing a place as covered, for every type "
+                             "(complete exports only, never accumulated search responses)")
+    args = parser.parse_args()
+
+    fetched_at = datetime.fromisoformat(args.fetched_at).timestamp() if args.fetched_at else None
+    places = {}
+    for place in read_places(args.inputs):
+        places[place.get("place_id") or id(place)] = place
+
+    writer = PlaceIndexWriter(args.output, cell_size=args.cell_size, fetched_at=fetched_at)
+    for place in places.values():
+        writer.add(place)
+    for bbox in args.bbox:
+        writer.cover(*(float(value) for value in bbox.split(",")))
+    count = writer.close(cover_places=args.cover_places)
+    print(f"Wrote {count} places ({len(writer.type_names)} types) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
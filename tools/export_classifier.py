@@ -0,0 +1,85 @@
+"""
+Export the Keras intent classifier to a TensorFlow-free NumPy file.
+
+Converts the SavedModel at NLU_MODEL_PATH plus the label encoder into one
+.npz (layer weights, class names and a JSON header), then checks numerical
+parity against Keras on a reference set: real sentences encoded with the
+configured encoder plus random unit vectors. Exits non-zero if any
+probability differs by more than --atol or any predicted intent changes.
+Serve the result with NLU_INFERENCE_MODE=numpy.
+
+Usage:
+    python tools/export_classifier.py [--output models/intent_classifier.npz]
+        [--samples data/full_natural_lifestyle_sentence_dataset.csv] [--limit 1000]
+        [--random 1000] [--atol 1e-5] [--no-encoder]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from app.config import MODEL_PATH, NUMPY_CLASSIFIER_PATH  # noqa: E402
+from app.models.encoders import l2_normalize  # noqa: E402
+from app.models.nlu_model import NLUModel  # noqa: E402
+from app.models.numpy_classifier import NumpyClassifier  # noqa: E402
+from export_encoder import DEFAULT_SAMPLES, load_samples  # noqa: E402
+
+
+def reference_embeddings(dim: int, samples, random_count: int, use_encoder: bool) -> np.ndarray:
+    parts = []
+    if use_encoder:
+        encoder = NLUModel._load_encoder()
+        parts.append(np.asarray(encoder.encode(samples), dtype=np.float32))
+    # Random unit vectors exercise regions of the input space the samples don't
+    rng = np.random.default_rng(0)
+    parts.append(l2_normalize(rng.normal(size=(random_count, dim))).astype(np.float32))
+    return np.concatenate(parts)
+
+
+def check_parity(keras_model, classifier: NumpyClassifier, embeddings: np.ndarray):
+    expected = np.asarray(keras_model.predict(embeddings, verbose=0), dtype=np.float32)
+    actual = classifier.predict_proba(embeddings)
+    return {
+        "rows": len(embeddings),
+        "max_abs_diff": float(np.max(np.abs(expected - actual))),
+        "mean_abs_diff": float(np.mean(np.abs(expected - actual))),
+        "argmax_agreement": float(np.mean(np.argmax(expected, axis=1) == np.argmax(actual, axis=1))),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", default=NUMPY_CLASSIFIER_PATH)
+    parser.add_argument("--samples", default=DEFAULT_SAMPLES, help="CSV with a 'sentence' column")
+    parser.add_argument("--limit", type=int, default=1000)
+    parser.add_argument("--random", type=int, default=1000, help="Random unit vectors added to the reference set")
+    parser.add_argument("--atol", type=float, default=1e-5)
+    parser.add_argument("--no-encoder", action="store_true", help="Check parity on random vectors only")
+    args = parser.parse_args()
+
+    keras_model = NLUModel._load_classifier()
+    label_encoder = NLUModel._load_label_encoder()
+    classifier = NumpyClassifier.from_keras(keras_model, label_encoder.classes_)
+
+    samples = [] if args.no_encoder else load_samples(args.samples, args.limit)
+    embeddings = reference_embeddings(classifier.input_dim, samples, args.random, not args.no_encoder)
+    report = check_parity(keras_model, classifier, embeddings)
+    print(json.dumps(report, indent=2))
+    if report["max_abs_diff"] > args.atol or report["argmax_agreement"] < 1.0:
+        print(f"Parity check failed (atol {args.atol}); not writing {args.output}")
+        sys.exit(1)
+
+    classifier.save(args.output, metadata={"source": MODEL_PATH, "parity": report})
+    size_kb = os.path.getsize(args.output) / 1024.0
+    print(f"Wrote {args.output} ({size_kb:.0f} KB, {len(classifier.layers)} layers, "
+          f"{len(classifier.classes_)} intents)")
+
+
+if __name__ == "__main__":
+    main()
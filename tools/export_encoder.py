@@ -0,0 +1,151 @@
+"""
+Export the sentence encoder to ONNX (fp32 and int8) and validate it.
+
+Writes model.onnx, model_int8.onnx, the tokenizer files and
+encoder_config.json to the output directory, then compares every backend
+against the original PyTorch encoder on a sample set: cosine similarity of
+the embeddings, intent agreement through the trained classifier, and
+single-query encode latency. Point NLU_ONNX_ENCODER_PATH at the output
+directory and set NLU_ENCODER_BACKEND=onnx or onnx-int8 to serve it.
+
+Usage:
+    python tools/export_encoder.py [--model all-MiniLM-L6-v2] [--output models/encoder_onnx]
+        [--samples data/full_natural_lifestyle_sentence_dataset.csv] [--limit 1000]
+        [--validate-only] [--report report.json]
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from app.config import ENCODER_PATH, ONNX_ENCODER_PATH  # noqa: E402
+from app.models.encoders import (  # noqa: E402
+    ENCODER_CONFIG_FILE, ONNX_MODEL_FILES, OnnxEncoder, SentenceTransformerEncoder
+)
+from app.models.nlu_model import WARMUP_QUERIES, NLUModel  # noqa: E402
+
+DEFAULT_SAMPLES = os.path.join(ROOT, "data", "full_natural_lifestyle_sentence_dataset.csv")
+
+
+def export(model_name: str, output_dir: str, opset: int = 14):
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    st = SentenceTransformer(model_name)
+    module_names = [type(module).__name__ for module in st]
+    if module_names[:2] != ["Transformer", "Pooling"] or not st[1].pooling_mode_mean_tokens:
+        raise ValueError(f"Only Transformer + mean Pooling encoders are supported, got {module_names}")
+
+    transformer = st[0]
+    auto_model = transformer.auto_model.eval()
+    tokenizer = transformer.tokenizer
+    os.makedirs(output_dir, exist_ok=True)
+
+    dummy = tokenizer(["Find me a coffee shop near me"], return_tensors="pt", padding=True)
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in dummy]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]}
+    fp32_path = os.path.join(output_dir, ONNX_MODEL_FILES["onnx"])
+    with torch.no_grad():
+        torch.onnx.export(
+            auto_model,
+            tuple(dummy[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+        )
+
+    quantize_dynamic(
+        fp32_path, os.path.join(output_dir, ONNX_MODEL_FILES["onnx-int8"]), weight_type=QuantType.QInt8
+    )
+    tokenizer.save_pretrained(output_dir)
+    with open(os.path.join(output_dir, ENCODER_CONFIG_FILE), "w") as f:
+        json.dump({
+            "source_model": model_name,
+            "embedding_dim": st.get_sentence_embedding_dimension(),
+            "max_seq_length": st.max_seq_length,
+            "pooling": "mean",
+            "normalize": "Normalize" in module_names,
+        }, f, indent=2)
+    print(f"Exported {model_name} to {output_dir}")
+
+
+def load_samples(path: str, limit: int):
+    if not os.path.exists(path):
+        print(f"{path} not found, validating on the built-in warm-up queries")
+        return list(WARMUP_QUERIES)
+    with open(path, newline="") as f:
+        return [row["sentence"] for _, row in zip(range(limit), csv.DictReader(f))]
+
+
+def encode_latency_ms(encoder, samples, count: int = 50) -> float:
+    timings = []
+    for text in samples[:count]:
+        started = time.perf_counter()
+        encoder.encode([text])
+        timings.append(time.perf_counter() - started)
+    return float(np.median(timings) * 1000)
+
+
+def validate(model_name: str, output_dir: str, samples):
+    reference = SentenceTransformerEncoder(model_name)
+    reference_embeddings = reference.encode(samples)
+
+    classifier = NLUModel._load_classifier()
+    forward = NLUModel.build_forward_fn(classifier, reference_embeddings.shape[1], mode="compiled")
+    reference_intents = np.argmax(forward(reference_embeddings), axis=1)
+
+    report = {
+        "samples": len(samples),
+        "torch": {"encode_p50_ms": encode_latency_ms(reference, samples)},
+    }
+    for backend, model_file in ONNX_MODEL_FILES.items():
+        encoder = OnnxEncoder(output_dir, model_file)
+        embeddings = encoder.encode(samples)
+        cosine = np.sum(embeddings * reference_embeddings, axis=1) / (
+            np.linalg.norm(embeddings, axis=1) * np.linalg.norm(reference_embeddings, axis=1)
+        )
+        intents = np.argmax(forward(embeddings), axis=1)
+        report[backend] = {
+            "cosine_mean": float(cosine.mean()),
+            "cosine_min": float(cosine.min()),
+            "cosine_p5": float(np.percentile(cosine, 5)),
+            "intent_agreement": float(np.mean(intents == reference_intents)),
+            "encode_p50_ms": encode_latency_ms(encoder, samples),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default=ENCODER_PATH)
+    parser.add_argument("--output", default=ONNX_ENCODER_PATH)
+    parser.add_argument("--samples", default=DEFAULT_SAMPLES, help="CSV with a 'sentence' column")
+    parser.add_argument("--limit", type=int, default=1000)
+    parser.add_argument("--opset", type=int, default=14)
+    parser.add_argument("--validate-only", action="store_true")
+    parser.add_argument("--report", help="Also write the validation report to this JSON file")
+    args = parser.parse_args()
+
+    if not args.validate_only:
+        export(args.model, args.output, args.opset)
+
+    report = validate(args.model, args.output, load_samples(args.samples, args.limit))
+    print(json.dumps(report, indent=2))
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Download the sentence encoder once and save it to a local directory.
+
+Point NLU_ENCODER_PATH at the directory and set NLU_MODEL_OFFLINE=true so
+the service loads it with no network lookups at startup.
+
+Usage:
+    python tools/pin_encoder.py [--model all-MiniLM-L6-v2] [--output models/encoder/all-MiniLM-L6-v2]
+"""
+
+import argparse
+import os
+
+from sentence_transformers import SentenceTransformer
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--output", default=os.path.join(ROOT, "models", "encoder", "all-MiniLM-L6-v2"))
+    args = parser.parse_args()
+
+    encoder = SentenceTransformer(args.model)
+    encoder.save(args.output)
+
+    # Round-trip to make sure the pinned copy loads without the hub
+    SentenceTransformer(args.output, local_files_only=True).encode(["warm up"])
+    print(f"Saved {args.model} to {args.output}")
+    print(f"Set NLU_ENCODER_PATH={args.output} and NLU_MODEL_OFFLINE=true to load it offline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Publish a trained classifier as a versioned model bundle.
+
+Copies the SavedModel, label encoder and (if present) the exported NumPy
+classifier into <bundles-dir>/<version>/, then writes bundle.json last so
+servers never see a half-copied bundle. Unless --no-activate is given,
+CURRENT is pointed at the new version, and running servers polling
+NLU_MODEL_BUNDLES_DIR swap it in without a restart (or trigger the swap
+with POST /admin/model/reload).
+
+Usage:
+    python tools/publish_model.py --version 2026-10-18 [--bundles-dir models/bundles]
+        [--model models/transformer_nlu_model] [--label-encoder models/transformer_label_encoder.pkl]
+        [--numpy-classifier models/intent_classifier.npz] [--no-activate]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from app.config import LABEL_ENCODER_PATH, MODEL_BUNDLES_DIR, MODEL_PATH, NUMPY_CLASSIFIER_PATH  # noqa: E402
+from app.models.model_bundle import (  # noqa: E402
+    CLASSIFIER_DIR, LABEL_ENCODER_FILE, NUMPY_CLASSIFIER_FILE, bundle_path, set_current, write_manifest
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--version", required=True, help="Bundle name; bundles are served in sorted order")
+    parser.add_argument("--bundles-dir", default=MODEL_BUNDLES_DIR or os.path.join(ROOT, "models", "bundles"))
+    parser.add_argument("--model", default=MODEL_PATH, help="Keras SavedModel directory")
+    parser.add_argument("--label-encoder", default=LABEL_ENCODER_PATH)
+    parser.add_argument("--numpy-classifier", default=NUMPY_CLASSIFIER_PATH,
+                        help="Exported classifier for NLU_INFERENCE_MODE=numpy (skipped if missing)")
+    parser.add_argument("--no-activate", action="store_true", help="Don't point CURRENT at the new version")
+    args = parser.parse_args()
+
+    path = bundle_path(args.bundles_dir, args.version)
+    if os.path.exists(path):
+        sys.exit(f"{path} already exists; bundles are immutable, publish a new version")
+    os.makedirs(path)
+
+    files = []
+    if os.path.isdir(args.model):
+        shutil.copytree(args.model, os.path.join(path, CLASSIFIER_DIR))
+        shutil.copy2(args.label_encoder, os.path.join(path, LABEL_ENCODER_FILE))
+        files += [CLASSIFIER_DIR, LABEL_ENCODER_FILE]
+    if os.path.isfile(args.numpy_classifier):
+        shutil.copy2(args.numpy_classifier, os.path.join(path, NUMPY_CLASSIFIER_FILE))
+        files.append(NUMPY_CLASSIFIER_FILE)
+    if not files:
+        shutil.rmtree(path)
+        sys.exit(f"Neither {args.model} nor {args.numpy_classifier} exists; nothing to publish")
+
+    write_manifest(path, args.version, {"files": files, "source": os.path.abspath(args.model)})
+    print(f"Published {args.version} ({', '.join(files)}) to {path}")
+    if not args.no_activate:
+        set_current(args.bundles_dir, args.version)
+        print(f"CURRENT -> {args.version}")
+
+
+if __name__ == "__main__":
+    main()
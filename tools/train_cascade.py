@@ -0,0 +1,168 @@
+"""
+Train the hashed n-gram first stage of the classifier cascade.
+
+Splits the labelled sentences into training, calibration and tuning sets,
+trains a HashedNgramClassifier and fits its temperature on the
+calibration set. The tuning set is then classified by the transformer
+model, and the threshold is the lowest confidence at which the cascade's
+answers still agree with the transformer on --target-agreement of the
+queries it would answer. The report gives the agreement, the share of
+traffic the cascade answers on its own, and the mean single-query latency
+of NLUModel with and without the cascade. Exits non-zero without writing
+if no threshold reaches the target. Enable the result with NLU_CASCADE_PATH.
+
+Usage:
+    python tools/train_cascade.py [--data data/full_natural_lifestyle_sentence_dataset.csv]
+        [--output models/intent_cascade.npz] [--target-agreement 0.99] [--holdout 0.2]
+        [--buckets 262144] [--epochs 10] [--latency-samples 200] [--no-transformer]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from app.models.ngram_classifier import DEFAULT_BUCKETS, HashedNgramClassifier  # noqa: E402
+from app.models.nlu_model import NLUModel  # noqa: E402
+from build_intent_index import DEFAULT_DATA, load_sentences  # noqa: E402
+
+DEFAULT_OUTPUT = os.path.join(ROOT, "models", "intent_cascade.npz")
+REPORT_THRESHOLDS = [0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.99]
+
+
+def pick_threshold(confidences: np.ndarray, agrees: np.ndarray, target: float):
+    """
+    Return the lowest threshold whose answered queries agree at least `target` of the time.
+
+    Queries are answered when their confidence is at or above the
+    threshold, so only the distinct confidences are candidates.
+
+    Returns:
+        float: The threshold, or None if no threshold reaches the target
+    """
+    order = np.argsort(-confidences, kind="stable")
+    confidences, agrees = confidences[order], agrees[order]
+    agreement = np.cumsum(agrees) / np.arange(1, len(agrees) + 1)
+    # The last query of each run of equal confidences: a threshold admits all or none of a run
+    ends = np.flatnonzero(np.append(confidences[1:] != confidences[:-1], True))
+    reaching = ends[agreement[ends] >= target]
+    return float(confidences[reaching[-1]]) if len(reaching) else None
+
+
+def sweep(confidences: np.ndarray, agrees: np.ndarray, thresholds):
+    rows = []
+    for threshold in thresholds:
+        answered = confidences >= threshold
+        rows.append({
+            "threshold": round(float(threshold), 4),
+            "offloaded": round(float(answered.mean()), 4),
+            "agreement": round(float(agrees[answered].mean()), 4) if answered.any() else None,
+        })
+    return rows
+
+
+def mean_latency_ms(model: NLUModel, texts, cascade: bool) -> float:
+    started = time.perf_counter()
+    for text in texts:
+        model.predict_batch([text], cascade=cascade)
+    return (time.perf_counter() - started) * 1000 / len(texts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data", default=DEFAULT_DATA, help="CSV with 'sentence' and 'label' columns")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--target-agreement", type=float, default=0.99,
+                        help="Required agreement with the transformer on the queries the cascade answers")
+    parser.add_argument("--holdout", type=float, default=0.2,
+                        help="Fraction held out, split evenly between calibration and threshold tuning")
+    parser.add_argument("--buckets", type=int, default=DEFAULT_BUCKETS, help="Hashed feature buckets")
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--latency-samples", type=int, default=200, help="Tuning queries timed one at a time")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--no-transformer", action="store_true",
+                        help="Tune against the labels instead of the transformer, and skip the latency report")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rows = load_sentences(args.data)
+    order = np.random.default_rng(args.seed).permutation(len(rows))
+    holdout = int(len(rows) * args.holdout)
+    split = [order[holdout:], order[:holdout // 2], order[holdout // 2:holdout]]
+    (train_texts, train_labels), (calib_texts, calib_labels), (tune_texts, tune_labels) = [
+        ([rows[i][0] for i in part], [rows[i][1] for i in part]) for part in split
+    ]
+
+    started = time.perf_counter()
+    cascade = HashedNgramClassifier.train(
+        train_texts, train_labels, n_buckets=args.buckets, epochs=args.epochs, seed=args.seed
+    )
+    print(f"Trained on {len(train_texts)} sentences in {time.perf_counter() - started:.1f}s")
+    cascade.calibrate(calib_texts, calib_labels)
+
+    model = None
+    if args.no_transformer:
+        reference = np.asarray(tune_labels, dtype=object)
+    else:
+        model = NLUModel()
+        reference = np.empty(len(tune_texts), dtype=object)
+        for start in range(0, len(tune_texts), args.batch_size):
+            chunk = tune_texts[start:start + args.batch_size]
+            reference[start:start + len(chunk)] = [
+                p["intent"] for p in model.predict_batch(chunk, cascade=False)
+            ]
+
+    intents, confidences = cascade.predict(tune_texts)
+    # Answers go through the same low-confidence fallback as the transformer's
+    answers = np.array([
+        NLUModel.apply_confidence_fallback(str(intent), float(confidence))
+        for intent, confidence in zip(intents, confidences)
+    ], dtype=object)
+    agrees = answers == reference
+
+    threshold = pick_threshold(confidences, agrees, args.target_agreement)
+    report = {
+        "train": len(train_texts),
+        "calibration": len(calib_texts),
+        "tuning": len(tune_texts),
+        "reference": "labels" if args.no_transformer else "transformer",
+        "temperature": round(cascade.temperature, 4),
+        "target_agreement": args.target_agreement,
+        "threshold": threshold,
+        "sweep": sweep(confidences, agrees, REPORT_THRESHOLDS + ([threshold] if threshold is not None else [])),
+    }
+    if threshold is None:
+        print(json.dumps(report, indent=2))
+        print(f"No threshold reaches {args.target_agreement} agreement; not writing {args.output}")
+        sys.exit(1)
+    cascade.threshold = threshold
+
+    if model is not None and args.latency_samples:
+        samples = tune_texts[:args.latency_samples]
+        # Time the model itself, not the embedding cache
+        model.embedding_cache = None
+        model.cascade = cascade
+        model.warm_up()
+        transformer_ms = mean_latency_ms(model, samples, cascade=False)
+        cascade_ms = mean_latency_ms(model, samples, cascade=True)
+        report["latency_ms"] = {
+            "queries": len(samples),
+            "transformer_only": round(transformer_ms, 3),
+            "with_cascade": round(cascade_ms, 3),
+            "reduction": round(1 - cascade_ms / transformer_ms, 4),
+        }
+    print(json.dumps(report, indent=2))
+
+    cascade.save(args.output, metadata={"source": os.path.abspath(args.data), "report": report})
+    size_mb = os.path.getsize(args.output) / 1e6
+    print(f"Wrote {args.output} ({size_mb:.1f} MB, {len(cascade.classes_)} intents, threshold {threshold:.4f})")
+
+
+if __name__ == "__main__":
+    main()